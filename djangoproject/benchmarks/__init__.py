@@ -0,0 +1,7 @@
+# Performance benchmarks; run from the djangoproject directory, e.g.
+#   python -m benchmarks.bench_search --sizes 10000 100000
+#   python -m benchmarks.bench_views --registrations 1000 100000 --out views.json
+#   python -m benchmarks.datagen --registrations 100000 && python -m benchmarks.loadtest --users 50
+#   python -m benchmarks.bench_asgi --clients 16 64          # WSGI vs ASGI req/s (needs gunicorn/uvicorn)
+#   python -m benchmarks.bench_db --threads 1 4 16           # write throughput per DB_PROFILE
+# Every script can write its results as JSON (--out) so runs can be compared over time.
@@ -0,0 +1,165 @@
+"""
+Requests/second of the read-heavy endpoints served over WSGI (sync views) and over ASGI
+(core.async_views), with the same stdlib load generator against each server in turn.
+
+    python -m benchmarks.datagen --registrations 100000        # once, into the dev database
+    python -m benchmarks.bench_asgi --clients 16 32 64 --duration 20 --out asgi.json
+
+Servers are started as subprocesses from --wsgi-cmd / --asgi-cmd ({port} is substituted);
+the defaults need gunicorn and uvicorn installed. A server whose command cannot be started
+is reported as skipped. Pin both to one worker process so the comparison is per process.
+"""
+import argparse
+import http.client
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+from benchmarks import common
+
+from benchmarks.datagen import CURRENT_SEMESTER, CURRENT_YEAR, PASSWORD  # noqa: E402
+from benchmarks.loadtest import VirtualStudent  # noqa: E402
+from core.models import Course, Student  # noqa: E402
+
+DEFAULT_SERVERS = {
+    'wsgi': 'gunicorn lukwaproject.wsgi:application --bind 127.0.0.1:{port} --workers 1 --threads 16',
+    'asgi': 'uvicorn lukwaproject.asgi:application --host 127.0.0.1 --port {port} --workers 1 --no-access-log',
+}
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(('127.0.0.1', port)) == 0:
+                return True
+        time.sleep(0.2)
+    return False
+
+
+def start_server(command, port):
+    try:
+        proc = subprocess.Popen(shlex.split(command.format(port=port)), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    except FileNotFoundError as exc:
+        return None, str(exc)
+    if not wait_for_port(port):
+        proc.kill()
+        return None, proc.stderr.read().decode(errors='replace')[-500:] or 'server did not start'
+    return proc, None
+
+
+def session_cookie(base_url, username, password):
+    # log in once through the real login form; every client reuses the session
+    student = VirtualStudent(base_url, username, password, [], None, lambda *a: None)
+    student.login()
+    return '; '.join(f'{c.name}={c.value}' for c in student.jar)
+
+
+def hammer(port, paths, clients, duration, cookie):
+    """
+    `clients` threads, each with one keep-alive connection, cycling through paths for `duration` seconds.
+    Returns {path_name: [latency_ms, ...]} and {status: n}.
+    """
+    samples = {name: [] for name, _ in paths}
+    statuses = {}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(n):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local = {name: [] for name, _ in paths}
+        local_status = {}
+        i = n
+        while time.monotonic() < stop_at:
+            name, path = paths[i % len(paths)]
+            i += 1
+            t0 = time.perf_counter()
+            try:
+                conn.request('GET', path, headers={'Cookie': cookie})
+                resp = conn.getresponse()
+                resp.read()
+                status = resp.status
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                status = 0
+            local[name].append((time.perf_counter() - t0) * 1000)
+            local_status[status] = local_status.get(status, 0) + 1
+        conn.close()
+        with lock:
+            for name, values in local.items():
+                samples[name].extend(values)
+            for status, count in local_status.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=client, args=(n,), daemon=True) for n in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples, statuses
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='WSGI vs ASGI requests/second on the read-heavy endpoints')
+    parser.add_argument('--clients', type=int, nargs='+', default=[16, 64], help='Concurrent connections per run')
+    parser.add_argument('--duration', type=float, default=15, help='Seconds per run')
+    parser.add_argument('--wsgi-cmd', default=DEFAULT_SERVERS['wsgi'])
+    parser.add_argument('--asgi-cmd', default=DEFAULT_SERVERS['asgi'])
+    parser.add_argument('--only', choices=sorted(DEFAULT_SERVERS), help='Benchmark one server only')
+    parser.add_argument('--port', type=int, default=8799)
+    parser.add_argument('--out', help='Write results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    username = Student.objects.filter(student_id__startswith='b').values_list('student_id', flat=True).first()
+    course_ids = list(Course.objects.order_by('code').values_list('pk', flat=True)[:20])
+    if not username or not course_ids:
+        parser.error('no generated students/courses found; run `python -m benchmarks.datagen` first')
+    term = {'year': CURRENT_YEAR, 'semester': CURRENT_SEMESTER}
+    paths = [
+        ('course_list', '/courses/'),
+        ('course_search', '/courses/search/?' + urllib.parse.urlencode({'limit': 24, **term})),
+        ('seat_availability', '/courses/seats/?' + urllib.parse.urlencode({'ids': ','.join(map(str, course_ids)), **term})),
+        ('results', '/results/'),
+    ]
+
+    commands = {'wsgi': args.wsgi_cmd, 'asgi': args.asgi_cmd}
+    results = {}
+    for kind in ([args.only] if args.only else sorted(commands)):
+        proc, error = start_server(commands[kind], args.port)
+        if proc is None:
+            print(f'{kind}: skipped ({error.strip()})')
+            results[kind] = {'skipped': error}
+            continue
+        try:
+            cookie = session_cookie(f'http://127.0.0.1:{args.port}', username, PASSWORD)
+            hammer(args.port, paths, 2, 1, cookie)  # warm-up
+            runs = []
+            for clients in args.clients:
+                samples, statuses = hammer(args.port, paths, clients, args.duration, cookie)
+                total = sum(len(v) for v in samples.values())
+                runs.append({
+                    'clients': clients,
+                    'rps': round(total / args.duration, 1),
+                    'status': statuses,
+                    'endpoints': {name: common.summarize(v) for name, v in samples.items()},
+                })
+                print(f"{kind} clients={clients:>4}  {runs[-1]['rps']:>8.1f} req/s  {statuses}")
+                for name, row in runs[-1]['endpoints'].items():
+                    print(f"    {name:<18} p50 {row.get('p50_ms', 0):>8.1f} ms  p99 {row.get('p99_ms', 0):>8.1f} ms")
+            results[kind] = {'command': commands[kind], 'runs': runs}
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    if args.out:
+        common.write_results(args.out, 'asgi', results, duration=args.duration)
+    return results
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,139 @@
+"""
+Registration write throughput under each database profile (lukwaproject/dbprofiles.py):
+threads taking and releasing seats (reserve_seat + delete, with all their signals) against
+one throw-away database, counting completed writes and "database is locked" failures.
+
+    python -m benchmarks.bench_db --threads 1 4 16 --duration 10 --out db.json
+    DATABASE_URL=postgres://user:pw@localhost/kanitha python -m benchmarks.bench_db --profiles postgres
+
+Each profile runs in its own process, since the profile is read when Django starts.
+The postgres profile is skipped unless DATABASE_URL or PGHOST is set.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks import common
+
+from django.conf import settings  # noqa: E402
+from django.db import close_old_connections, connection  # noqa: E402
+from django.db.utils import OperationalError  # noqa: E402
+
+from core.models import Course, Department, Faculty, Registration, Student  # noqa: E402
+from core.seats import reserve_seat  # noqa: E402
+
+PROFILES = ('sqlite-plain', 'sqlite', 'postgres')
+YEAR, SEMESTER = 2025, '1'
+
+
+def populate(threads, courses=20, per_thread=5):
+    fac = Faculty.objects.create(code='BENCH', name='bench')
+    dept = Department.objects.create(code='BENCH', name='bench', faculty=fac)
+    course_objs = [Course.objects.create(code=f'BD{i:03d}', name=f'bench {i}', units=3, department=dept, capacity=10 ** 6)
+                   for i in range(courses)]
+    students = [Student.objects.create(student_id=f'bd{n:06d}', first_name='b', last_name='d', department=dept)
+                for n in range(threads * per_thread)]
+    # each thread works with its own students so rows never collide, only locks do
+    return course_objs, [students[i::threads] for i in range(threads)]
+
+
+def churn(threads, duration):
+    courses, groups = populate(threads)
+    lock = threading.Lock()
+    totals = {'writes': 0, 'locked': 0, 'latencies': []}
+    stop_at = time.monotonic() + duration
+
+    def client(n):
+        rng = random.Random(n)
+        writes = locked = 0
+        latencies = []
+        try:
+            while time.monotonic() < stop_at:
+                student, course = rng.choice(groups[n]), rng.choice(courses)
+                t0 = time.perf_counter()
+                try:
+                    if reserve_seat(student, course, YEAR, SEMESTER) is not None:
+                        Registration.objects.filter(student=student, course=course, year=YEAR, semester=SEMESTER).delete()
+                        writes += 2
+                except OperationalError:
+                    locked += 1
+                latencies.append((time.perf_counter() - t0) * 1000)
+        finally:
+            close_old_connections()
+            connection.close()
+        with lock:
+            totals['writes'] += writes
+            totals['locked'] += locked
+            totals['latencies'].extend(latencies)
+
+    pool = [threading.Thread(target=client, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return {
+        'threads': threads,
+        'writes_per_s': round(totals['writes'] / duration, 1),
+        'locked_errors': totals['locked'],
+        'cycle': common.summarize(totals['latencies']),
+    }
+
+
+def run_profile(args):
+    """
+    Child process: every thread count against a fresh database of this process's profile.
+    """
+    settings.WAITLIST_PROMOTION = 'inline'  # no promotion thread competing for the lock
+    runs = []
+    for threads in args.threads:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_file = os.path.join(tmp, 'bench.sqlite3') if connection.vendor == 'sqlite' else None
+            with common.test_database(db_file):
+                runs.append(churn(threads, args.duration))
+    return runs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Registration write throughput per database profile')
+    parser.add_argument('--profiles', nargs='+', choices=PROFILES, default=list(PROFILES))
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per run')
+    parser.add_argument('--out', help='Write results as JSON to this file')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_profile(args)))
+        return None
+
+    results = {}
+    for profile in args.profiles:
+        if profile == 'postgres' and not (os.environ.get('DATABASE_URL') or os.environ.get('PGHOST')):
+            print(f'{profile}: skipped (set DATABASE_URL or PGHOST)')
+            results[profile] = {'skipped': 'no PostgreSQL configured'}
+            continue
+        command = [sys.executable, '-m', 'benchmarks.bench_db', '--child', '--duration', str(args.duration),
+                   '--threads', *map(str, args.threads)]
+        proc = subprocess.run(command, env={**os.environ, 'DB_PROFILE': profile}, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f'{profile}: failed\n{proc.stderr[-2000:]}')
+            results[profile] = {'failed': proc.stderr[-2000:]}
+            continue
+        results[profile] = json.loads(proc.stdout.strip().splitlines()[-1])
+        for run in results[profile]:
+            print(f"{profile:<13} threads={run['threads']:>3}  {run['writes_per_s']:>9.1f} writes/s  "
+                  f"locked={run['locked_errors']:<5} p99 {run['cycle'].get('p99_ms', 0):>8.1f} ms")
+
+    if args.out:
+        common.write_results(args.out, 'db', results, duration=args.duration)
+    return results
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,95 @@
+"""
+Compare n-gram index lookups (core.search) with plain icontains scans on Student.
+
+    python -m benchmarks.bench_search --sizes 10000 100000 1000000 --out search.json
+
+Runs against a throw-away test database (in-memory SQLite unless --db-file is given;
+use a file for 1M rows so the index does not have to fit in RAM).
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from benchmarks import common
+
+from django.db.models import Q  # noqa: E402
+
+from core import search  # noqa: E402
+from core.models import Student  # noqa: E402
+
+SYLLABLES = ['สม', 'ชาย', 'สุ', 'ดา', 'นิ', 'รัน', 'ดร์', 'วริน', 'ทร์', 'กม', 'ล', 'ทอง', 'ดี', 'ใจ', 'งาม',
+             'แสง', 'สุข', 'สวัสดิ์', 'นุ่ม', 'นวล', 'ประ', 'เสริฐ', 'ศรี', 'พร', 'มณี', 'รัตน์', 'ชัย', 'วงศ์']
+QUERIES = ['สมชาย', 'ทองดี', 'รัตน์', 'kpru00123', 'kpru0009876', 'ศรีพร', 'zzz-no-match']
+
+
+def thai_name(rng, parts):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(parts))
+
+
+def populate(total, rng, batch=5000):
+    """
+    Grow the Student table to `total` rows (bulk_create skips signals; the index is rebuilt after).
+    """
+    have = Student.objects.count()
+    while have < total:
+        n = min(batch, total - have)
+        Student.objects.bulk_create([
+            Student(student_id=f'kpru{have + i:07d}', first_name=thai_name(rng, 2), last_name=thai_name(rng, 3))
+            for i in range(n)
+        ])
+        have += n
+    search.rebuild([search.STUDENT])
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return {'median_ms': round(statistics.median(samples), 3), 'max_ms': round(max(samples), 3)}
+
+
+def icontains(query, limit=20):
+    cond = Q()
+    for word in query.split():
+        cond &= Q(student_id__icontains=word) | Q(first_name__icontains=word) | Q(last_name__icontains=word)
+    return list(Student.objects.filter(cond).order_by('student_id')[:limit])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--db-file', help='SQLite file for the test database (default: in memory)')
+    parser.add_argument('--out', help='Write results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    rng = random.Random(1234)
+    results = []
+    with common.test_database(args.db_file):
+        for size in sorted(args.sizes):
+            t0 = time.perf_counter()
+            populate(size, rng)
+            build_s = time.perf_counter() - t0
+            row = {'rows': size, 'populate_and_index_s': round(build_s, 2), 'queries': {}}
+            for q in QUERIES:
+                row['queries'][q] = {
+                    'icontains': timed(lambda: icontains(q), args.repeat),
+                    'ngram_index': timed(lambda: search.search_students(q), args.repeat),
+                }
+            results.append(row)
+            print(f"rows={size:>9}  (built in {build_s:.1f}s)")
+            for q, r in row['queries'].items():
+                print(f"  {q:<14} icontains {r['icontains']['median_ms']:>9.2f} ms   "
+                      f"index {r['ngram_index']['median_ms']:>9.2f} ms")
+
+    if args.out:
+        common.write_results(args.out, 'search', results, repeat=args.repeat)
+    return results
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,112 @@
+"""
+Bytes transferred per page for its local static assets, before and after the production
+static pipeline (core.staticfiles):
+
+    python -m benchmarks.bench_static --out static.json
+
+before: the source files as django.contrib.staticfiles serves them, uncompressed and unhashed,
+        so a repeat visit revalidates every asset (one request each, a 304 at best)
+after:  collectstatic into a temporary STATIC_ROOT with the manifest storage; each asset
+        is counted as the variant the in-process server sends for "Accept-Encoding: gzip, br",
+        and a repeat visit costs nothing (hashed names are immutable)
+
+Also reports what collectstatic writes in total, with Django's ignore patterns and with
+the pruned Bootstrap builds. HTML is counted as rendered; it is not compressed by the app.
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+from benchmarks import common
+
+from django.conf import settings  # noqa: E402
+from django.contrib.staticfiles import finders  # noqa: E402
+from django.contrib.staticfiles.apps import StaticFilesConfig as DjangoStaticFilesConfig  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from benchmarks.datagen import generate  # noqa: E402
+from core.staticfiles import PRUNED, StaticFileServer  # noqa: E402
+
+PAGES = ('core:index', 'core:faculties', 'core:departments', 'core:courses', 'core:login')
+_ASSET = re.compile(r'''(?:href|src)=["']([^"']+)["']''')
+
+
+def assets(html):
+    return sorted({url for url in _ASSET.findall(html) if url.startswith(settings.STATIC_URL)})
+
+
+def source_size(url):
+    path = finders.find(url[len(settings.STATIC_URL):])
+    return os.path.getsize(path) if path else 0
+
+
+def collected_bytes(patterns):
+    total = files = 0
+    for finder in finders.get_finders():
+        for path, storage in finder.list(patterns):
+            total += storage.size(path)
+            files += 1
+    return {'files': files, 'bytes': total}
+
+
+def render_pages(client):
+    cache.clear()  # anonymous pages would come from the page cache (core.httpcache)
+    return {name: client.get(reverse(name)).content.decode() for name in PAGES}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Static bytes per page before/after the static pipeline')
+    parser.add_argument('--out', help='Write results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    setup_test_environment()
+    results = {'collected': {
+        'django_ignore_patterns': collected_bytes(DjangoStaticFilesConfig.ignore_patterns),
+        'pruned': collected_bytes(DjangoStaticFilesConfig.ignore_patterns + PRUNED),
+    }, 'pages': {}}
+
+    with common.test_database():
+        generate(200)
+        before = render_pages(Client())
+        # hashed URLs are only emitted with DEBUG off
+        with tempfile.TemporaryDirectory() as root, override_settings(
+                DEBUG=False, STATIC_ROOT=root,
+                STORAGES={**settings.STORAGES, 'staticfiles': {
+                    'BACKEND': 'core.staticfiles.CompressedManifestStaticFilesStorage'}}):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            server = StaticFileServer(root, settings.STATIC_URL)
+            after = render_pages(Client())
+            for name in PAGES:
+                old_assets, new_assets = assets(before[name]), assets(after[name])
+                sent = []
+                for url in new_assets:
+                    static_file = server.find(url)
+                    sent.append(server.choose(static_file, 'gzip, br')[1] if static_file else 0)
+                row = {
+                    'html_bytes': len(after[name].encode()),
+                    'before': {'assets': len(old_assets), 'first_visit_bytes': sum(source_size(u) for u in old_assets),
+                               'repeat_visit_requests': len(old_assets)},
+                    'after': {'assets': len(new_assets), 'first_visit_bytes': sum(sent),
+                              'repeat_visit_requests': sum(1 for u in new_assets
+                                                           if not (server.find(u) and server.find(u).immutable))},
+                }
+                results['pages'][name] = row
+                print(f"{name:<18} assets {row['before']['assets']}  first visit {row['before']['first_visit_bytes']:>8} B "
+                      f"-> {row['after']['first_visit_bytes']:>8} B  repeat-visit requests "
+                      f"{row['before']['repeat_visit_requests']} -> {row['after']['repeat_visit_requests']}")
+
+    for label, c in results['collected'].items():
+        print(f"collectstatic ({label}): {c['files']} files, {c['bytes']} B")
+    if args.out:
+        common.write_results(args.out, 'static', results)
+    return results
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
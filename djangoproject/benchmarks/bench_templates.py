@@ -0,0 +1,120 @@
+"""
+Render time per template, with the context the real view builds, so a template that gets
+slower (or a context that grows) shows up as a number:
+
+    python -m benchmarks.bench_templates --registrations 1000 --renders 200 --out templates.json
+
+Each page is requested once through its view to capture the template and its context; the
+template alone is then rendered --renders times. "cold" clears the fragment cache
+({% catalogue_cache %}) before every render, "warm" leaves it filled. Compile time comes
+from core.precompile with a fresh engine, i.e. what the cached loader saves per request.
+"""
+import argparse
+import sys
+import time
+
+from benchmarks import common
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.template import Engine, engines  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from benchmarks.datagen import CURRENT_SEMESTER, CURRENT_YEAR, generate  # noqa: E402
+from core import precompile  # noqa: E402
+from core.models import Course, Department, Faculty, Student  # noqa: E402
+
+
+def pages():
+    """
+    {name: (client, url)}; logged-in clients, so the page cache (core.httpcache) never answers
+    instead of the view.
+    """
+    student = Student.objects.order_by('id').first()
+    student_client = Client()
+    student_client.force_login(User.objects.get(username=student.student_id))
+    staff_client = Client()
+    staff_client.force_login(User.objects.create_user(username='bench-templates', is_staff=True))
+    course = Course.objects.order_by('id').first()
+    return {
+        'index': (student_client, reverse('core:index')),
+        'faculties': (student_client, reverse('core:faculties')),
+        'faculty_detail': (student_client, reverse('core:faculty_detail', args=[Faculty.objects.order_by('id').first().pk])),
+        'departments': (staff_client, reverse('core:departments')),
+        'department_detail': (student_client, reverse('core:department_detail', args=[Department.objects.order_by('id').first().pk])),
+        'courses': (staff_client, reverse('core:courses')),
+        'course_detail': (staff_client, reverse('core:course_detail', args=[course.pk])),
+        'registration_page': (student_client, reverse('core:register') + f'?year={CURRENT_YEAR}&semester={CURRENT_SEMESTER}'),
+        'results': (student_client, reverse('core:results')),
+        'registrations': (staff_client, reverse('core:registrations')),
+        'students': (staff_client, reverse('core:students')),
+    }
+
+
+def capture(client, url):
+    """
+    (template name, flattened context) of the top-level template the view rendered.
+    """
+    resp = client.get(url)
+    if resp.status_code != 200 or not resp.templates:
+        raise RuntimeError(f'{url}: status {resp.status_code}, no template rendered')
+    context = resp.context[0] if isinstance(resp.context, list) else resp.context
+    return resp.templates[0].name, context.flatten()
+
+
+def time_renders(template, context, n, cold):
+    samples = []
+    for _ in range(n):
+        if cold:
+            cache.clear()
+        t0 = time.perf_counter()
+        template.render(context)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return common.summarize(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render time per template with real view contexts')
+    parser.add_argument('--registrations', type=int, default=1000)
+    parser.add_argument('--renders', type=int, default=200, help='Renders per template and mode')
+    parser.add_argument('--only', nargs='+', help='Only these pages')
+    parser.add_argument('--out', help='Write results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    setup_test_environment()
+    backend = engines['django']
+    # a private engine with no cached loader: what compiling costs without it
+    fresh = Engine(dirs=backend.engine.dirs, app_dirs=True, libraries=backend.engine.libraries)
+    compile_ms, errors = precompile.precompile(engine=fresh)
+    for name, message in errors:
+        print(f'{name}: {message}')
+
+    results = {}
+    with common.test_database():
+        generate(args.registrations)
+        for page, (client, url) in pages().items():
+            if args.only and page not in args.only:
+                continue
+            name, context = capture(client, url)
+            template = backend.get_template(name)
+            results[page] = {
+                'template': name,
+                'context_keys': len(context),
+                'compile_ms': round(compile_ms.get(name, 0), 3),
+                'cold': time_renders(template, context, args.renders, cold=True),
+                'warm': time_renders(template, context, args.renders, cold=False),
+            }
+            r = results[page]
+            print(f"{page:<20} {name:<24} compile {r['compile_ms']:>7.2f} ms  "
+                  f"cold p50 {r['cold']['p50_ms']:>7.2f} ms  warm p50 {r['warm']['p50_ms']:>7.2f} ms  "
+                  f"keys {r['context_keys']}")
+
+    if args.out:
+        common.write_results(args.out, 'templates', results, registrations=args.registrations, renders=args.renders)
+    return results
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
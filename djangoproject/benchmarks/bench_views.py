@@ -0,0 +1,118 @@
+"""
+Micro-benchmarks of the hot views through the Django test client: latency percentiles and
+SQL query counts per request.
+
+    python -m benchmarks.bench_views --registrations 1000 100000 --requests 50 --out views.json
+
+Each scale gets a fresh throw-away database filled by benchmarks.datagen.
+"""
+import argparse
+import random
+import sys
+import time
+
+from benchmarks import common
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext, setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from benchmarks.datagen import CURRENT_SEMESTER, CURRENT_YEAR, generate  # noqa: E402
+from core.models import Course, Student  # noqa: E402
+
+
+def measure(make_request, n):
+    """
+    Run make_request() n times; return the latency summary plus query-count stats.
+    """
+    samples, queries, statuses = [], [], {}
+    for i in range(n):
+        with CaptureQueriesContext(connection) as ctx:
+            t0 = time.perf_counter()
+            resp = make_request(i)
+            samples.append((time.perf_counter() - t0) * 1000)
+        queries.append(len(ctx.captured_queries))
+        statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+    out = common.summarize(samples)
+    out['queries_max'] = max(queries)
+    out['queries_mean'] = round(sum(queries) / len(queries), 1)
+    out['status'] = statuses
+    return out
+
+
+def scenarios(rng):
+    """
+    {name: make_request(i)}; student actions run as a real generated student.
+    """
+    student = Student.objects.order_by('?').first()
+    student_client = Client()
+    student_client.force_login(User.objects.get(username=student.student_id))
+    staff_client = Client()
+    staff_client.force_login(User.objects.create_user(username='bench-staff', is_staff=True))
+    anon = Client()
+
+    register_url = reverse('core:register')
+    # courses with no prerequisites, so register/drop cycles are accepted by the validator
+    open_courses = list(Course.objects.filter(prerequisites__isnull=True).values_list('pk', flat=True)[:200])
+    term = {'year': CURRENT_YEAR, 'semester': CURRENT_SEMESTER}
+
+    def register_cycle(i):
+        course = open_courses[i % len(open_courses)]
+        resp = student_client.post(register_url, {'action': 'register', 'course': course, **term})
+        student_client.post(register_url, {'action': 'drop', 'course': course, **term})
+        return resp
+
+    def cart_cycle(i):
+        course = open_courses[i % len(open_courses)]
+        resp = student_client.post(register_url, {'action': 'add_course', 'course': course, **term})
+        student_client.post(register_url, {'action': 'remove_course', 'course': course, **term})
+        return resp
+
+    words = ['การ', 'ฐานข้อมูล', 'สถิติ', 'D01', 'โปรแกรม']
+    return {
+        'course_list': lambda i: anon.get(reverse('core:courses')),
+        'course_search_json': lambda i: anon.get(reverse('core:course_search'), {'q': rng.choice(words)}),
+        'registration_create_get': lambda i: student_client.get(register_url, term),
+        'registration_create_register': register_cycle,
+        'registration_create_add_course': cart_cycle,
+        'results_view': lambda i: student_client.get(reverse('core:results')),
+        'registration_list_staff': lambda i: staff_client.get(reverse('core:registrations')),
+        'registration_list_student': lambda i: student_client.get(reverse('core:registrations')),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Latency/query-count benchmarks of the hot views')
+    parser.add_argument('--registrations', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--requests', type=int, default=50, help='Requests per view and scale')
+    parser.add_argument('--only', nargs='+', help='Only these scenarios')
+    parser.add_argument('--db-file', help='SQLite file for the test database (default: in memory)')
+    parser.add_argument('--out', help='Write results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    setup_test_environment()
+    rng = random.Random(7)
+    results = []
+    for size in sorted(args.registrations):
+        with common.test_database(args.db_file):
+            sizes = generate(size)
+            row = {'scale': sizes, 'views': {}}
+            for name, make_request in scenarios(rng).items():
+                if args.only and name not in args.only:
+                    continue
+                make_request(0)  # warm caches/templates before timing
+                row['views'][name] = measure(make_request, args.requests)
+            results.append(row)
+            print(f"registrations={sizes['registrations']:>9}")
+            for name, r in row['views'].items():
+                print(f"  {name:<32} p50 {r['p50_ms']:>8.2f} ms  p99 {r['p99_ms']:>8.2f} ms  queries {r['queries_max']:>3}")
+
+    if args.out:
+        common.write_results(args.out, 'views', results, requests=args.requests)
+    return results
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
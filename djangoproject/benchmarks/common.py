@@ -0,0 +1,86 @@
+"""
+Shared helpers for the benchmark scripts: Django setup, throw-away databases,
+latency statistics and JSON result files.
+"""
+import contextlib
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lukwaproject.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+
+
+@contextlib.contextmanager
+def test_database(db_file=None):
+    """
+    Create a throw-away test database (in-memory SQLite unless db_file is given) and drop it afterwards.
+    """
+    if db_file:
+        settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = db_file
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def percentile(sorted_samples, pct):
+    if not sorted_samples:
+        return None
+    k = (len(sorted_samples) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_samples) - 1)
+    return sorted_samples[lo] + (sorted_samples[hi] - sorted_samples[lo]) * (k - lo)
+
+
+def summarize(samples_ms):
+    """
+    Latency summary of a list of millisecond samples.
+    """
+    s = sorted(samples_ms)
+    if not s:
+        return {'n': 0}
+    return {
+        'n': len(s),
+        'mean_ms': round(statistics.fmean(s), 3),
+        'p50_ms': round(percentile(s, 50), 3),
+        'p90_ms': round(percentile(s, 90), 3),
+        'p99_ms': round(percentile(s, 99), 3),
+        'max_ms': round(s[-1], 3),
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path, benchmark, results, **extra):
+    """
+    Write one benchmark run as JSON, with enough context (revision, database, Python) to compare runs.
+    """
+    payload = {
+        'benchmark': benchmark,
+        'started_at': extra.pop('started_at', None) or datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'revision': _git_revision(),
+        'vendor': connection.vendor,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        **extra,
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(payload, fh, ensure_ascii=False, indent=2, default=str)
@@ -0,0 +1,163 @@
+"""
+Synthetic registry data: faculties, departments, courses (with prerequisites and schedules),
+students with login accounts, and historical graded registrations.
+
+    python -m benchmarks.datagen --registrations 100000 --force
+
+writes into the configured database (use it before `benchmarks.loadtest`); the other
+benchmarks call generate() on a throw-away test database. Every generated student can
+log in with username = student_id and the password given by --password.
+"""
+import argparse
+import random
+import sys
+import time
+
+from benchmarks import common  # noqa: F401  (sets up Django)
+
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import transaction  # noqa: E402
+
+from core import accounts, refdata, search, summaries  # noqa: E402
+from core.models import Faculty, Department, Course, Student, Registration  # noqa: E402
+from core.seats import reconcile_seats  # noqa: E402
+from core.timetable import sync_meetings_bulk  # noqa: E402
+
+PASSWORD = 'bench-pass'
+CURRENT_YEAR = 2025
+CURRENT_SEMESTER = '1'
+# historical registrations per student; the current term is left empty for registration day
+PER_STUDENT = 20
+
+FACULTY_NAMES = ['คณะวิทยาศาสตร์และเทคโนโลยี', 'คณะครุศาสตร์', 'คณะวิทยาการจัดการ', 'คณะเทคโนโลยีอุตสาหกรรม',
+                 'คณะมนุษยศาสตร์และสังคมศาสตร์', 'คณะเกษตรศาสตร์']
+SUBJECTS = ['การเขียนโปรแกรม', 'ฐานข้อมูล', 'คณิตศาสตร์', 'สถิติ', 'ภาษาอังกฤษ', 'การบัญชี', 'เคมี', 'ฟิสิกส์',
+            'เครือข่าย', 'การตลาด', 'ชีววิทยา', 'ภาษาไทย', 'ประวัติศาสตร์', 'เศรษฐศาสตร์']
+LEVELS = ['เบื้องต้น', 'ประยุกต์', 'ขั้นสูง', 'สัมมนา']
+SYLLABLES = ['สม', 'ชาย', 'สุ', 'ดา', 'นิ', 'รัน', 'วริน', 'ทอง', 'ดี', 'ใจ', 'งาม', 'แสง', 'สุข', 'ศรี', 'พร', 'มณี', 'ชัย']
+DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri']
+SLOTS = [(8, 0), (9, 30), (11, 0), (13, 0), (14, 30), (16, 0)]
+GRADES = ['A', 'A', 'B', 'B', 'B', 'C', 'C', 'D', 'F']
+
+
+def scale(registrations):
+    """
+    Derive table sizes from the number of historical registrations.
+    """
+    students = max(registrations // PER_STUDENT, 10)
+    courses = min(max(registrations // 300, 40), 3000)
+    departments = min(max(courses // 25, 4), 60)
+    faculties = min(len(FACULTY_NAMES), max(departments // 4, 2))
+    return {'faculties': faculties, 'departments': departments, 'courses': courses, 'students': students}
+
+
+def _schedule(rng):
+    # one or two 90-minute meetings a week
+    parts = []
+    for day in rng.sample(DAYS, rng.choice([1, 2])):
+        h, m = rng.choice(SLOTS)
+        end = h * 60 + m + 90
+        parts.append(f'{day} {h:02d}:{m:02d}-{end // 60:02d}:{end % 60:02d}')
+    return ','.join(parts)
+
+
+def _name(rng, parts):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(parts))
+
+
+def generate(registrations=1000, seed=42, batch_size=5000, password=PASSWORD, with_users=True, log=None):
+    """
+    Populate an empty registry. Returns the sizes that were created.
+    Derived tables (meetings, seat counters, search index, term summaries) are rebuilt at the end,
+    because bulk_create sends no signals.
+    """
+    log = log or (lambda msg: None)
+    rng = random.Random(seed)
+    sizes = scale(registrations)
+    t0 = time.perf_counter()
+
+    with transaction.atomic():
+        faculties = Faculty.objects.bulk_create([
+            Faculty(code=f'F{i:02d}', name=FACULTY_NAMES[i]) for i in range(sizes['faculties'])
+        ])
+        departments = Department.objects.bulk_create([
+            Department(code=f'D{i:02d}', name=f'สาขา{rng.choice(SUBJECTS)} {i}', faculty=faculties[i % len(faculties)])
+            for i in range(sizes['departments'])
+        ])
+        courses = Course.objects.bulk_create([
+            Course(code=f'{departments[i % len(departments)].code}{1000 + i}',
+                   name=f'{rng.choice(SUBJECTS)}{rng.choice(LEVELS)}', units=rng.choice([1, 2, 3, 3, 3]),
+                   department=departments[i % len(departments)], status=rng.choice('RRRE'),
+                   capacity=rng.choice([30, 40, 60, 120]), instructor=f'อ.{_name(rng, 2)}', schedule=_schedule(rng))
+            for i in range(sizes['courses'])
+        ], batch_size=batch_size)
+        # prerequisites point at lower-numbered courses, so the graph stays acyclic
+        through = Course.prerequisites.through
+        edges = set()
+        for i, course in enumerate(courses[10:], start=10):
+            for _ in range(rng.choice([0, 0, 1, 1, 2])):
+                edges.add((course.pk, courses[rng.randrange(i)].pk))
+        through.objects.bulk_create([through(from_course_id=a, to_course_id=b) for a, b in edges], batch_size=batch_size)
+    log(f"catalogue: {sizes['courses']} courses, {len(edges)} prerequisite edges")
+
+    hashed = make_password(password)  # one hash shared by every generated account
+    course_ids = [c.pk for c in courses]
+    course_units = {c.pk: c.units for c in courses}
+    first_id = Student.objects.count()  # keeps student ids unique when adding to existing data
+    made = 0
+    for start in range(0, sizes['students'], batch_size):
+        n = min(batch_size, sizes['students'] - start)
+        with transaction.atomic():
+            students = Student.objects.bulk_create([
+                Student(student_id=f'b{first_id + start + i:07d}', first_name=_name(rng, 2), last_name=_name(rng, 3),
+                        department=departments[(start + i) % len(departments)])
+                for i in range(n)
+            ])
+            if with_users:
+                User.objects.bulk_create([
+                    User(username=s.student_id, password=hashed, first_name=s.first_name[:150], last_name=s.last_name[:150])
+                    for s in students
+                ], batch_size=batch_size)
+                accounts.link_accounts({s.student_id: s.student_id for s in students})
+            regs = []
+            for s in students:
+                quota = min(PER_STUDENT, registrations - made - len(regs))
+                if quota <= 0:
+                    break
+                for k, course_id in enumerate(rng.sample(course_ids, min(quota, len(course_ids)))):
+                    year = CURRENT_YEAR - 1 - k // 10
+                    regs.append(Registration(student=s, course_id=course_id, year=year, semester=str(1 + (k // 5) % 2),
+                                             units=course_units[course_id], status='CONFIRMED', grade=rng.choice(GRADES)))
+            Registration.objects.bulk_create(regs, batch_size=batch_size)
+            made += len(regs)
+        log(f"students: {start + n}/{sizes['students']}, registrations: {made}")
+
+    sync_meetings_bulk(courses)
+    search.rebuild(batch_size=batch_size)
+    summaries.rebuild(batch_size=batch_size)
+    reconcile_seats()
+    refdata.invalidate()
+    sizes['registrations'] = made
+    sizes['seconds'] = round(time.perf_counter() - t0, 2)
+    log(f"done in {sizes['seconds']}s")
+    return sizes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic registry in the configured database')
+    parser.add_argument('--registrations', type=int, default=100000, help='Historical registrations (1k .. 1M)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--password', default=PASSWORD, help='Password of every generated student account')
+    parser.add_argument('--force', action='store_true', help='Generate even if the database already has students')
+    args = parser.parse_args(argv)
+
+    if Student.objects.exists() and not args.force:
+        parser.error('the database already has students; pass --force to add generated data anyway')
+    sizes = generate(args.registrations, seed=args.seed, batch_size=args.batch_size, password=args.password, log=print)
+    print(sizes)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,162 @@
+"""
+Registration-day load driver: many simulated students log in, browse the catalogue and
+register/drop courses concurrently against a running server.
+
+    python -m benchmarks.datagen --registrations 100000        # once, into the dev database
+    python manage.py runserver --noreload                      # or gunicorn/uvicorn
+    python -m benchmarks.loadtest --base-url http://127.0.0.1:8000 --users 50 --duration 60 --out load.json
+
+Only the standard library is used on the client side (threads + urllib), so the numbers
+include the driver's own overhead; compare runs made on the same machine.
+"""
+import argparse
+import http.cookiejar
+import random
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from benchmarks import common
+
+from benchmarks.datagen import CURRENT_SEMESTER, CURRENT_YEAR, PASSWORD  # noqa: E402
+from core.models import Course, Student  # noqa: E402
+
+CSRF_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+SEARCH_WORDS = ['การ', 'ฐานข้อมูล', 'สถิติ', 'โปรแกรม', 'ภาษา']
+
+
+class VirtualStudent:
+    """
+    One logged-in browser session (own cookie jar) replaying a registration-day visit.
+    """
+
+    def __init__(self, base_url, username, password, course_ids, rng, record):
+        self.base = base_url.rstrip('/')
+        self.username = username
+        self.password = password
+        self.course_ids = course_ids
+        self.rng = rng
+        self.record = record
+        self.jar = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.jar))
+
+    def request(self, name, path, data=None, params=None):
+        url = self.base + path + ('?' + urllib.parse.urlencode(params) if params else '')
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(url, data=body, headers={'Referer': self.base + path})
+        t0 = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=30) as resp:
+                text = resp.read().decode('utf-8', 'replace')
+                status = resp.status
+        except urllib.error.HTTPError as exc:
+            text, status = '', exc.code
+        except (urllib.error.URLError, OSError):
+            text, status = '', 0
+        self.record(name, (time.perf_counter() - t0) * 1000, status)
+        return text
+
+    def csrf(self, page):
+        m = CSRF_RE.search(page)
+        return m.group(1) if m else ''
+
+    def login(self):
+        page = self.request('login_form', '/login/')
+        self.request('login', '/login/', {'username': self.username, 'password': self.password,
+                                          'csrfmiddlewaretoken': self.csrf(page)})
+
+    def visit(self):
+        term = {'year': CURRENT_YEAR, 'semester': CURRENT_SEMESTER}
+        self.request('course_list', '/courses/')
+        self.request('course_search', '/courses/search/', params={'q': self.rng.choice(SEARCH_WORDS)})
+        page = self.request('register_page', '/register/', params=term)
+        token = self.csrf(page)
+        picks = self.rng.sample(self.course_ids, min(3, len(self.course_ids)))
+        for course_id in picks:
+            page = self.request('register', '/register/', {'action': 'register', 'course': course_id,
+                                                           'csrfmiddlewaretoken': token, **term})
+            token = self.csrf(page) or token
+        self.request('registrations', '/registrations/')
+        self.request('results', '/results/')
+        # drop again so long runs keep seats available
+        for course_id in picks:
+            self.request('drop', '/register/', {'action': 'drop', 'course': course_id,
+                                                'csrfmiddlewaretoken': token, **term})
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.statuses = {}
+
+    def __call__(self, name, ms, status):
+        with self.lock:
+            self.samples.setdefault(name, []).append(ms)
+            bucket = self.statuses.setdefault(name, {})
+            bucket[status] = bucket.get(status, 0) + 1
+
+    def summary(self, seconds):
+        out = {}
+        for name, samples in sorted(self.samples.items()):
+            row = common.summarize(samples)
+            row['rps'] = round(len(samples) / seconds, 2) if seconds else None
+            row['status'] = self.statuses[name]
+            out[name] = row
+        return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay registration-day traffic against a running server')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--users', type=int, default=20, help='Concurrent simulated students')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+    parser.add_argument('--ramp-up', type=float, default=5, help='Seconds over which users start')
+    parser.add_argument('--password', default=PASSWORD)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--out', help='Write results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    # generated students and registrable courses are read from the same database the server uses
+    usernames = list(Student.objects.filter(student_id__startswith='b').values_list('student_id', flat=True)[:args.users * 10])
+    course_ids = list(Course.objects.filter(prerequisites__isnull=True).values_list('pk', flat=True)[:500])
+    if not usernames or not course_ids:
+        parser.error('no generated students/courses found; run `python -m benchmarks.datagen` first')
+
+    recorder = Recorder()
+    stop_at = time.monotonic() + args.ramp_up + args.duration
+    visits = [0] * args.users
+
+    def worker(n):
+        rng = random.Random(args.seed + n)
+        time.sleep(args.ramp_up * n / max(args.users, 1))
+        student = VirtualStudent(args.base_url, usernames[n % len(usernames)], args.password, course_ids, rng, recorder)
+        student.login()
+        while time.monotonic() < stop_at:
+            student.visit()
+            visits[n] += 1
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(args.users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    seconds = time.monotonic() - started
+
+    results = {'visits': sum(visits), 'seconds': round(seconds, 2), 'endpoints': recorder.summary(seconds)}
+    print(f"{results['visits']} visits by {args.users} users in {seconds:.1f}s")
+    for name, row in results['endpoints'].items():
+        print(f"  {name:<16} n={row['n']:>6}  p50 {row['p50_ms']:>8.1f} ms  p99 {row['p99_ms']:>8.1f} ms  {row['status']}")
+    if args.out:
+        common.write_results(args.out, 'loadtest', results, base_url=args.base_url, users=args.users,
+                             duration=args.duration)
+    return results
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
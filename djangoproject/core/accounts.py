@@ -0,0 +1,46 @@
+"""
+Login account <-> Student: Student.user is the link, set at signup, by the registry import,
+by the seed scripts and, for accounts created anywhere else (admin, createsuperuser), when a
+User whose username is an unlinked student_id is created (core.signals).
+
+get_student / aget_student back request.student and request.astudent()
+(core.middleware.StudentMiddleware): one indexed query per request, on first use.
+"""
+from django.contrib.auth import get_user_model
+
+from .models import Student
+
+
+def _query(user):
+    return Student.objects.select_related('department__faculty').filter(user_id=user.pk)
+
+
+def get_student(request):
+    if not hasattr(request, '_cached_student'):
+        user = request.user
+        request._cached_student = _query(user).first() if user.is_authenticated else None
+    return request._cached_student
+
+
+async def aget_student(request):
+    if not hasattr(request, '_cached_student'):
+        user = await request.auser()
+        request._cached_student = await _query(user).afirst() if user.is_authenticated else None
+    return request._cached_student
+
+
+def link_accounts(usernames):
+    """
+    Link students without an account to existing users: usernames is {student_id: username}.
+    Returns how many were linked. Two queries plus the update.
+    """
+    if not usernames:
+        return 0
+    users = dict(get_user_model().objects.filter(username__in=set(usernames.values()), student__isnull=True)
+                 .values_list('username', 'pk'))
+    students = list(Student.objects.filter(student_id__in=list(usernames), user__isnull=True).only('pk', 'student_id'))
+    for student in students:
+        student.user_id = users.pop(usernames[student.student_id], None)
+    students = [s for s in students if s.user_id is not None]
+    Student.objects.bulk_update(students, ['user'], batch_size=1000)
+    return len(students)
@@ -1,8 +1,46 @@
 from django.contrib import admin
-from .models import Faculty, Department, Course, Student, Registration
+from .models import Faculty, Department, Course, Student, Registration, SeatCounter, StudentTermSummary, ImportCheckpoint, Waitlist, Job, Term, ArchivedRegistration
 
 admin.site.register(Faculty)
 admin.site.register(Department)
 admin.site.register(Course)
 admin.site.register(Student)
 admin.site.register(Registration)
+
+@admin.register(SeatCounter)
+class SeatCounterAdmin(admin.ModelAdmin):
+    list_display = ('course', 'year', 'semester', 'taken', 'updated_at')
+    list_filter = ('year', 'semester')
+
+@admin.register(StudentTermSummary)
+class StudentTermSummaryAdmin(admin.ModelAdmin):
+    list_display = ('student', 'year', 'semester', 'confirmed_units', 'draft_units', 'graded_units', 'gpa', 'updated_at')
+    list_filter = ('year', 'semester')
+
+@admin.register(ImportCheckpoint)
+class ImportCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'source', 'chunks_done', 'rows_imported', 'rows_rejected', 'finished_at', 'updated_at')
+    list_filter = ('kind',)
+
+@admin.register(Waitlist)
+class WaitlistAdmin(admin.ModelAdmin):
+    list_display = ('course', 'year', 'semester', 'student', 'status', 'created_at', 'note')
+    list_filter = ('status', 'year', 'semester')
+    raw_id_fields = ('student', 'course')
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'user', 'created_at', 'finished_at', 'worker')
+    list_filter = ('status', 'name')
+    readonly_fields = ('created_at', 'started_at', 'finished_at')
+
+@admin.register(Term)
+class TermAdmin(admin.ModelAdmin):
+    list_display = ('year', 'semester', 'status', 'closed_at', 'archived_at')
+    list_filter = ('status',)
+
+@admin.register(ArchivedRegistration)
+class ArchivedRegistrationAdmin(admin.ModelAdmin):
+    list_display = ('student', 'course', 'year', 'semester', 'units', 'grade', 'archived_at')
+    list_filter = ('year', 'semester')
+    raw_id_fields = ('student', 'course')
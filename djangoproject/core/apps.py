@@ -3,3 +3,11 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # connect model signal handlers (seat counters etc.)
+        from . import signals  # noqa: F401
+        # per-connection SQLite PRAGMAs of the database profile (see core.db)
+        from django.db.backends.signals import connection_created
+        from .db import apply_pragmas
+        connection_created.connect(apply_pragmas, dispatch_uid='core_db_pragmas')
@@ -0,0 +1,173 @@
+"""
+Async versions of the read-heavy endpoints and the seat feed, routed instead of their
+core.views counterparts when the project runs under ASGI (settings.ASYNC_VIEWS, set by
+lukwaproject/asgi.py).
+
+Reads go through the async ORM (aiterator/aget/acount/aaggregate) so a slow query does not
+hold a worker thread. Writes still use the sync ORM, in a bounded thread pool
+(settings.ASYNC_WRITE_WORKERS), so a registration rush cannot open more database
+connections than that.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.db import close_old_connections
+from django.db.utils import OperationalError
+from django.http import JsonResponse
+from django.shortcuts import redirect, render
+
+from .catalogue import CourseSearch, InvalidCursor, course_as_dict
+from .db import reads_from_replica
+from .httpcache import CATALOGUE, SEATS, cached_page
+from .models import Course, Registration
+from .seats import aavailability, reserve_seat
+from .validation import RegistrationValidator
+from . import refdata, seatfeed, summaries, terms, views, waitlist
+
+_write_pool = None
+
+
+def _pool():
+    global _write_pool
+    if _write_pool is None:
+        _write_pool = ThreadPoolExecutor(max_workers=settings.ASYNC_WRITE_WORKERS, thread_name_prefix='core-write')
+    return _write_pool
+
+
+async def run_write(func, *args):
+    """
+    Run a blocking (ORM write) function in the bounded write pool and await its result.
+    ASYNC_WRITE_WORKERS = 0 runs it on the request's own sync thread instead.
+    """
+    if not settings.ASYNC_WRITE_WORKERS:
+        return await sync_to_async(func)(*args)
+
+    def task():
+        try:
+            return func(*args)
+        finally:
+            # pool threads live outside the request cycle: honour CONN_MAX_AGE ourselves
+            close_old_connections()
+
+    return await sync_to_async(task, thread_sensitive=False, executor=_pool())()
+
+
+@cached_page(CATALOGUE, SEATS)
+@reads_from_replica
+async def course_list(request):
+    search = CourseSearch(request.GET)
+    db_error = False
+    next_cursor = None
+    try:
+        courses, next_cursor = await search.apage()
+        # cached snapshots; a miss loads from the database, hence the thread hop
+        faculties = await sync_to_async(refdata.faculties)()
+        departments = await sync_to_async(refdata.departments)()
+    except InvalidCursor:
+        return redirect('core:courses')
+    except OperationalError:
+        db_error = True
+        courses = []
+        faculties = departments = []
+    # the base template reads request.user; resolve it here rather than lazily during render
+    request.user = await request.auser()
+    return views._course_list_page(request, search, courses, next_cursor, faculties, departments, db_error)
+
+
+@reads_from_replica
+async def course_search(request):
+    search = CourseSearch(request.GET)
+    try:
+        courses, next_cursor = await search.apage()
+    except InvalidCursor:
+        return JsonResponse({'error': 'invalid cursor'}, status=400)
+    except OperationalError:
+        return JsonResponse({'error': 'database unavailable'}, status=503)
+    return JsonResponse({'results': [course_as_dict(c) for c in courses], 'next': next_cursor})
+
+
+async def seat_availability(request):
+    course_ids, year, semester = views._seat_query(request)
+    if not course_ids:
+        return JsonResponse({'error': 'ids required'}, status=400)
+    try:
+        rows = await aavailability(course_ids, year, semester)
+    except OperationalError:
+        return JsonResponse({'error': 'database unavailable'}, status=503)
+    return views._seat_response(year, semester, rows)
+
+
+async def seat_feed(request):
+    course_ids, year, semester = views._seat_query(request, seatfeed.MAX_IDS)
+    if not course_ids:
+        return JsonResponse({'error': 'ids required'}, status=400)
+    return views._event_stream_response(seatfeed.astream(course_ids, year, semester))
+
+
+async def results_view(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    request.user = user
+    db_error = False
+    results = []
+    try:
+        student = await request.astudent()
+        if student is not None:
+            regs = await terms.agraded_history(student)
+            rollup = await summaries.acumulative(student)
+            results.append({'student': student, 'total_units': rollup['graded_units'], 'gpa': rollup['gpa'], 'registrations': regs})
+    except OperationalError:
+        db_error = True
+        results = []
+    return render(request, 'results.html', {'results': results, 'db_error': db_error})
+
+
+def _register(student, course_id, year, semester):
+    verdict = RegistrationValidator(student, year, semester).validate([course_id])[0]
+    course = verdict.course
+    if not verdict.ok and not views._only_full(verdict):
+        return 409, {'ok': False, 'errors': [msg for _, msg in verdict.reasons]}
+    if verdict.ok and reserve_seat(student, course, year, semester) is not None:
+        return 200, {'ok': True, 'message': f'ลงทะเบียนวิชา {course.code} สำเร็จ'}
+    _, place = waitlist.join(student, course, year, semester)
+    return 202, {'ok': False, 'waitlist_position': place,
+                 'errors': [f'วิชา {course.code} เต็มแล้ว — อยู่ในรายชื่อรอลำดับที่ {place}']}
+
+
+def _drop(student, course, year, semester):
+    Registration.objects.filter(student=student, course=course, year=year, semester=semester).delete()
+    return 200, {'ok': True, 'message': f'ถอนรายวิชา {course.code} เรียบร้อย'}
+
+
+async def register_course(request):
+    """
+    JSON register/drop for one course: POST action=register|drop, course=<id>, year, semester.
+    The write runs in the bounded write pool.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=405)
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'login required'}, status=401)
+    action = request.POST.get('action', 'register')
+    year, semester = views._term_of(request.POST)
+    try:
+        student = await request.astudent()
+        if student is None:
+            return JsonResponse({'ok': False, 'errors': ['ไม่พบข้อมูลนักศึกษาของบัญชีนี้']}, status=404)
+        try:
+            course = await Course.objects.aget(pk=int(request.POST.get('course', '')))
+        except (ValueError, Course.DoesNotExist):
+            return JsonResponse({'ok': False, 'errors': ['ไม่พบวิชาที่เลือก']}, status=404)
+        if action == 'register':
+            status, body = await run_write(_register, student, course.pk, year, semester)
+        elif action == 'drop':
+            status, body = await run_write(_drop, student, course, year, semester)
+        else:
+            return JsonResponse({'error': 'unknown action'}, status=400)
+    except OperationalError:
+        return JsonResponse({'error': 'database unavailable'}, status=503)
+    return JsonResponse(body, status=status)
@@ -0,0 +1,133 @@
+"""
+The registration cart: courses a student has picked but not confirmed yet.
+
+Stored in the session as one short string, "<format>:<rev>:<id>.<id>...", e.g. "1:4:12.7.31",
+small enough for the signed-cookie session backend (see SESSION_ENGINE in settings), so cart
+edits need not write a session row. `rev` counts mutations. The session is only marked
+modified when the cart actually changes.
+
+Cart.for_request() memoizes one cart per request. Its courses are resolved with a single
+in_bulk() the first time they are needed, and units and clashes are computed once from that.
+"""
+from .models import Course
+from .timetable import find_clashes, load_meetings
+
+SESSION_KEY = 'cart'
+# the list-of-ids format used before this module; read once and converted
+LEGACY_KEY = 'registration_cart'
+FORMAT = 1
+
+
+def encode(ids, rev):
+    return f"{FORMAT}:{rev}:{'.'.join(str(i) for i in ids)}"
+
+
+def decode(value):
+    """
+    (ids, rev) from a stored cart; an unknown format or a damaged value is an empty cart.
+    """
+    try:
+        fmt, rev, packed = value.split(':', 2)
+        if int(fmt) != FORMAT:
+            return [], 0
+        return [int(i) for i in packed.split('.') if i], int(rev)
+    except (AttributeError, ValueError):
+        return [], 0
+
+
+class Cart:
+    def __init__(self, session):
+        self.session = session
+        if SESSION_KEY in session:
+            self.ids, self.rev = decode(session[SESSION_KEY])
+        else:
+            self.ids, self.rev = self._ints(session.get(LEGACY_KEY, [])), 0
+        self.ids = list(dict.fromkeys(self.ids))
+        if LEGACY_KEY in session:
+            del session[LEGACY_KEY]
+            self._store()
+        self._courses = None
+        self._clashes = None
+
+    @classmethod
+    def for_request(cls, request):
+        cart = getattr(request, '_registration_cart', None)
+        if cart is None:
+            cart = request._registration_cart = cls(request.session)
+        return cart
+
+    @staticmethod
+    def _ints(values):
+        out = []
+        for v in values:
+            try:
+                out.append(int(v))
+            except (TypeError, ValueError):
+                continue
+        return out
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, course_id):
+        return course_id in self.ids
+
+    def _store(self):
+        self.session[SESSION_KEY] = encode(self.ids, self.rev)
+
+    def _changed(self):
+        self.rev += 1
+        self._clashes = None
+        self._store()
+
+    def add(self, course):
+        if course.pk in self.ids:
+            return False
+        self.ids.append(course.pk)
+        if self._courses is not None:
+            self._courses[course.pk] = course
+        self._changed()
+        return True
+
+    def remove(self, course_id):
+        if course_id not in self.ids:
+            return False
+        self.ids.remove(course_id)
+        self._changed()
+        return True
+
+    def clear(self):
+        if self.ids:
+            self.ids = []
+            self._changed()
+
+    def by_id(self):
+        """
+        {pk: Course} of the cart's courses, loaded with one in_bulk() per request.
+        """
+        if self._courses is None:
+            self._courses = Course.objects.in_bulk(self.ids)
+        return self._courses
+
+    def courses(self):
+        # in cart order; ids whose course was deleted are skipped
+        by_id = self.by_id()
+        return [by_id[i] for i in self.ids if i in by_id]
+
+    def units(self):
+        return sum(c.units for c in self.courses())
+
+    def clashes(self):
+        """
+        {course_id: {clashing course_id, ...}} among the cart's courses (one meetings query).
+        """
+        if self._clashes is None:
+            meetings = load_meetings(self.ids)
+            self._clashes = {}
+            for a, b in find_clashes({i: meetings.get(i, ()) for i in self.ids}):
+                self._clashes.setdefault(a, set()).add(b)
+                self._clashes.setdefault(b, set()).add(a)
+        return self._clashes
@@ -0,0 +1,166 @@
+import base64
+import json
+
+from asgiref.sync import sync_to_async
+from django.db.models import F, Q
+from django.db.models.functions import Upper
+
+from .models import Course, SeatCounter
+from . import search
+
+DEFAULT_YEAR = 2025
+DEFAULT_SEMESTER = '1'
+PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(*values):
+    raw = json.dumps(list(values), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, arity=2):
+    """
+    Decode a cursor made by encode_cursor(); raise InvalidCursor on garbage.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != arity:
+        raise InvalidCursor(cursor)
+    return values
+
+
+def int_or_none(val):
+    """
+    A query parameter as an int, or None when it is missing or not a number.
+    """
+    try:
+        return int(val)
+    except (TypeError, ValueError):
+        return None
+
+
+class CourseSearch:
+    """
+    Server-side course catalogue filtering with keyset pagination on (code, id).
+
+    Filters (all optional, taken from a QueryDict/dict):
+      code        code prefix (case-insensitive)
+      q           words matched against code/name/instructor through the n-gram index
+      department  department id
+      faculty     faculty id
+      status      R / E / M
+      open        "1" to only show sections with free seats in the term
+      year, semester   term used for seat availability
+      after       cursor returned as `next` by the previous page
+      limit       page size (capped at MAX_PAGE_SIZE)
+    """
+
+    def __init__(self, params):
+        self.code = (params.get('code') or '').strip()
+        self.q = (params.get('q') or '').strip()
+        self.department = int_or_none(params.get('department'))
+        self.faculty = int_or_none(params.get('faculty'))
+        self.status = (params.get('status') or '').strip().upper()
+        self.open_only = params.get('open') in ('1', 'true', 'on')
+        self.year = int_or_none(params.get('year')) or DEFAULT_YEAR
+        self.semester = str(params.get('semester') or DEFAULT_SEMESTER)
+        self.limit = min(max(int_or_none(params.get('limit')) or PAGE_SIZE, 1), MAX_PAGE_SIZE)
+        self.after = params.get('after') or ''
+
+    @property
+    def filtered(self):
+        return bool(self.code or self.q or self.department or self.faculty or self.status or self.open_only)
+
+    def queryset(self):
+        qs = Course.objects.select_related('department')
+        if self.code:
+            # a range on UPPER(code) can use course_code_upper_idx; LIKE (istartswith) cannot
+            prefix = self.code.upper()
+            qs = qs.alias(code_upper=Upper('code')).filter(
+                code_upper__gte=prefix, code_upper__lt=prefix + '\U0010ffff', code__istartswith=self.code)
+        if self.q:
+            qs = search.filter_queryset(search.COURSE, qs, self.q)
+        if self.department:
+            qs = qs.filter(department_id=self.department)
+        if self.faculty:
+            qs = qs.filter(department__faculty_id=self.faculty)
+        if self.status:
+            qs = qs.filter(status=self.status)
+        if self.open_only:
+            full = SeatCounter.objects.filter(year=self.year, semester=self.semester, taken__gte=F('course__capacity'))
+            qs = qs.exclude(pk__in=full.values('course_id'))
+        return qs.order_by('code', 'id')
+
+    def _keyset(self, qs):
+        if self.after:
+            code, pk = decode_cursor(self.after)
+            if not isinstance(code, str) or not isinstance(pk, int):
+                raise InvalidCursor(self.after)
+            qs = qs.filter(Q(code__gt=code) | Q(code=code, id__gt=pk))
+        return qs[:self.limit + 1]
+
+    def _split(self, rows):
+        courses = rows[:self.limit]
+        next_cursor = None
+        if len(rows) > self.limit:
+            last = courses[-1]
+            next_cursor = encode_cursor(last.code, last.pk)
+        return courses, next_cursor
+
+    def page(self):
+        """
+        Return (courses, next_cursor). next_cursor is None on the last page.
+        Raises InvalidCursor for a malformed `after`.
+        """
+        courses, next_cursor = self._split(list(self._keyset(self.queryset())))
+        self.attach_seats(courses)
+        return courses, next_cursor
+
+    async def apage(self):
+        """
+        page() for async views: the page and its seat counts are read through the async ORM.
+        """
+        # the n-gram narrowing runs its COUNT probes while the queryset is built
+        qs = await sync_to_async(self.queryset)() if self.q else self.queryset()
+        courses, next_cursor = self._split([c async for c in self._keyset(qs)])
+        self._set_seats_left(courses, {pk: taken async for pk, taken in self._seat_counts(courses)} if courses else {})
+        return courses, next_cursor
+
+    def _seat_counts(self, courses):
+        return (SeatCounter.objects.filter(course__in=courses, year=self.year, semester=self.semester)
+                .values_list('course_id', 'taken'))
+
+    @staticmethod
+    def _set_seats_left(courses, taken):
+        for c in courses:
+            c.seats_left = max(c.capacity - taken.get(c.pk, 0), 0)
+
+    def attach_seats(self, courses):
+        """
+        Set `seats_left` on each course from the term's seat counters (one query).
+        """
+        self._set_seats_left(courses, dict(self._seat_counts(courses)) if courses else {})
+
+
+def course_as_dict(course):
+    dept = course.department
+    return {
+        'id': course.pk,
+        'code': course.code,
+        'name': course.name,
+        'units': course.units,
+        'status': course.status,
+        'capacity': course.capacity,
+        'seats_left': getattr(course, 'seats_left', None),
+        'instructor': course.instructor,
+        'schedule': course.schedule,
+        'department': {'id': dept.pk, 'code': dept.code, 'name': dept.name} if dept else None,
+    }
@@ -0,0 +1,79 @@
+"""
+Database plumbing for the profiles in lukwaproject/dbprofiles.py:
+
+- apply_pragmas: runs the alias's PRAGMAS (SQLite) on every new connection
+  (connection_created, connected in CoreConfig.ready)
+- ReadReplicaRouter: sends the reads inside replica_reads() / @reads_from_replica views
+  (the read-only catalogue, search and list pages) to the 'replica' alias. Everything else,
+  including the reads that precede a write (resolving a course before reserve_seat, the
+  importer's lookups), and reads inside a transaction on the primary stay on the primary.
+"""
+import asyncio
+import contextlib
+import contextvars
+import functools
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA = 'replica'
+
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    pragmas = connection.settings_dict.get('PRAGMAS')
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@contextlib.contextmanager
+def replica_reads():
+    """
+    Route every read in the block to the replica (when one is configured).
+    """
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def reads_from_replica(view):
+    """
+    View decorator: the view's reads go to the replica. For list pages, where a result a
+    moment old is acceptable; the writes of a POST still go to the primary.
+    """
+    if asyncio.iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            with replica_reads():
+                return await view(request, *args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with replica_reads():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if REPLICA not in connections.settings or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if _replica_reads.get():
+            return REPLICA
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return obj1._state.db in (DEFAULT_DB_ALIAS, REPLICA) and obj2._state.db in (DEFAULT_DB_ALIAS, REPLICA)
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # the replica is a copy of the primary, migrated through it
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,124 @@
+import csv
+import heapq
+import json
+from operator import itemgetter
+
+from .models import ArchivedRegistration, Registration
+
+CHUNK_SIZE = 2000
+FORMATS = ('csv', 'ndjson')
+
+# export name -> [(column header, Registration lookup)]
+COLUMNS = {
+    'registrations': [
+        ('student_id', 'student__student_id'),
+        ('first_name', 'student__first_name'),
+        ('last_name', 'student__last_name'),
+        ('course_code', 'course__code'),
+        ('course_name', 'course__name'),
+        ('department', 'course__department__code'),
+        ('year', 'year'),
+        ('semester', 'semester'),
+        ('units', 'units'),
+        ('status', 'status'),
+        ('grade', 'grade'),
+        ('created_at', 'created_at'),
+    ],
+    'classlist': [
+        ('student_id', 'student__student_id'),
+        ('first_name', 'student__first_name'),
+        ('last_name', 'student__last_name'),
+        ('student_department', 'student__department__code'),
+        ('year', 'year'),
+        ('semester', 'semester'),
+        ('status', 'status'),
+        ('grade', 'grade'),
+    ],
+    'transcript': [
+        ('year', 'year'),
+        ('semester', 'semester'),
+        ('course_code', 'course__code'),
+        ('course_name', 'course__name'),
+        ('units', 'units'),
+        ('grade', 'grade'),
+        ('status', 'status'),
+    ],
+}
+ORDERING = {
+    'registrations': ('id',),
+    'classlist': ('year', 'semester', 'student__student_id', 'id'),
+    'transcript': ('year', 'semester', 'course__code', 'id'),
+}
+# exports that also read archived terms (core.terms); `registrations` is the live table only
+WITH_ARCHIVE = ('classlist', 'transcript')
+
+
+def export_queryset(name, year=None, semester=None, department=None, course=None, student=None,
+                    model=Registration):
+    """
+    values_list() queryset of one export, filtered by term/department/course/student.
+    `department` is a department code or id and filters on the course's department.
+    """
+    qs = model.objects.all()
+    if year:
+        qs = qs.filter(year=year)
+    if semester:
+        qs = qs.filter(semester=str(semester))
+    if department:
+        if str(department).isdecimal():
+            qs = qs.filter(course__department_id=int(department))
+        else:
+            qs = qs.filter(course__department__code=department)
+    if course is not None:
+        qs = qs.filter(course_id=course)
+    if student is not None:
+        qs = qs.filter(student_id=student)
+    lookups = [lookup for _, lookup in COLUMNS[name]]
+    return qs.order_by(*ORDERING[name]).values_list(*lookups)
+
+
+def header(name):
+    return [column for column, _ in COLUMNS[name]]
+
+
+class _Echo:
+    # csv.writer target that hands the formatted line straight back instead of buffering it
+    def write(self, value):
+        return value
+
+
+def csv_lines(columns, rows):
+    writer = csv.writer(_Echo())
+    yield '\ufeff' + writer.writerow(columns)  # BOM so Excel opens Thai text as UTF-8
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(columns, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str) + '\n'
+
+
+def _merge_key(name):
+    # both sources come sorted by ORDERING; merge on the ordering columns that are exported
+    lookups = [lookup for _, lookup in COLUMNS[name]]
+    return itemgetter(*[lookups.index(field) for field in ORDERING[name] if field in lookups])
+
+
+def stream(name, fmt='csv', chunk_size=CHUNK_SIZE, **filters):
+    """
+    Generator of text lines for an export. Rows are read with a server-side cursor
+    (`iterator(chunk_size)`) as tuples, so memory use does not grow with the row count.
+    Exports in WITH_ARCHIVE merge the archived rows in order, still streaming.
+    """
+    rows = export_queryset(name, **filters).iterator(chunk_size=chunk_size)
+    if name in WITH_ARCHIVE:
+        archived = export_queryset(name, model=ArchivedRegistration, **filters).iterator(chunk_size=chunk_size)
+        rows = heapq.merge(archived, rows, key=_merge_key(name))
+    if fmt == 'ndjson':
+        return ndjson_lines(header(name), rows)
+    return csv_lines(header(name), rows)
+
+
+def content_type(fmt):
+    return 'application/x-ndjson; charset=utf-8' if fmt == 'ndjson' else 'text/csv; charset=utf-8'
@@ -0,0 +1,214 @@
+"""
+HTTP caching for the public catalogue pages, driven by cheap version stamps instead of
+timeouts, so an edit is visible on the next request:
+
+- CATALOGUE: the reference-data version (core.refdata), bumped after every Faculty,
+  Department or Course change is committed
+- SEATS: bumped after every committed seat change (core.signals), for pages showing seats left
+
+@cached_page(*stamps) gives a view an ETag (path + stamps + who is asking) and Last-Modified,
+answers matching conditional GETs with 304 before the view runs, and keeps whole pages for
+anonymous visitors in the PAGE_CACHE cache. {% catalogue_cache %} (core.templatetags.catalogue_cache)
+does the same for template fragments.
+
+Lookups are counted per process by layer, name and outcome (stats(); /metrics/ and /refdata/stats/).
+"""
+import asyncio
+import functools
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from . import refdata
+
+CATALOGUE = 'catalogue'
+SEATS = 'seats'
+
+SEATS_VERSION_KEY = 'httpcache:seats:version'
+SEATS_CHANGED_KEY = 'httpcache:seats:changed'
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def _cache():
+    return caches[getattr(settings, 'PAGE_CACHE', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'PAGE_CACHE_TIMEOUT', 60 * 10)
+
+
+def count(layer, name, outcome):
+    with _stats_lock:
+        bucket = _stats.setdefault((layer, name), {'hits': 0, 'misses': 0, 'not_modified': 0, 'bypassed': 0})
+        bucket[outcome] += 1
+
+
+def stats():
+    """
+    {'page': {'index': {'hits': .., 'misses': .., 'not_modified': .., 'bypassed': .., 'hit_ratio': ..}},
+    'fragment': {...}} for this process. The ratio counts 304s as hits: both skipped the render.
+    """
+    out = {}
+    with _stats_lock:
+        for (layer, name), bucket in sorted(_stats.items()):
+            served = bucket['hits'] + bucket['not_modified']
+            lookups = served + bucket['misses']
+            out.setdefault(layer, {})[name] = {**bucket, 'hit_ratio': round(served / lookups, 3) if lookups else None}
+    return out
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def bump_seats():
+    """
+    A seat was taken or released (called after commit).
+    """
+    cache = _cache()
+    try:
+        cache.incr(SEATS_VERSION_KEY)
+    except ValueError:
+        cache.set(SEATS_VERSION_KEY, int(time.time() * 1000), timeout=None)
+    cache.set(SEATS_CHANGED_KEY, int(time.time()), timeout=None)
+
+
+def _seats_stamp():
+    cache = _cache()
+    values = cache.get_many([SEATS_VERSION_KEY, SEATS_CHANGED_KEY])
+    if len(values) < 2:
+        now = time.time()
+        cache.add(SEATS_VERSION_KEY, int(now * 1000), timeout=None)
+        cache.add(SEATS_CHANGED_KEY, int(now), timeout=None)
+        values = cache.get_many([SEATS_VERSION_KEY, SEATS_CHANGED_KEY])
+    return values.get(SEATS_VERSION_KEY), values.get(SEATS_CHANGED_KEY)
+
+
+def stamp(*names):
+    """
+    (versions, last changed unix time) of the named stamps.
+    """
+    versions, changed = [], 0
+    for name in names:
+        if name == CATALOGUE:
+            version, when = refdata.version(), refdata.changed_at()
+        elif name == SEATS:
+            version, when = _seats_stamp()
+        else:
+            raise ValueError(f'unknown cache stamp {name!r}')
+        versions.append(f'{name}{version}')
+        changed = max(changed, when or 0)
+    return '.'.join(versions), changed
+
+
+def fragment(name, vary_on, render):
+    """
+    A rendered fragment for the current catalogue version and vary_on values, rendering
+    (and storing) it on a miss.
+    """
+    versions, _ = stamp(CATALOGUE)
+    vary = hashlib.sha1('|'.join(str(v) for v in vary_on).encode()).hexdigest()[:16]
+    key = f'httpcache:fragment:{name}:{versions}:{vary}'
+    cache = _cache()
+    value = cache.get(key)
+    if value is not None:
+        count('fragment', name, 'hits')
+        return value
+    count('fragment', name, 'misses')
+    value = render()
+    cache.set(key, value, timeout=_timeout())
+    return value
+
+
+def _variant(user):
+    # pages show the login state and staff-only controls
+    if not user.is_authenticated:
+        return 'anon'
+    return f"u{user.pk}{'s' if user.is_staff else ''}"
+
+
+def _lookup(request, name, stamps):
+    """
+    (etag, last_modified, response or None): a 304 or a cached page when one applies.
+    """
+    versions, changed = stamp(*stamps)
+    anonymous = not request.user.is_authenticated
+    key = f'{name}|{request.get_full_path()}|{versions}|{_variant(request.user)}'
+    etag = quote_etag(hashlib.sha1(key.encode()).hexdigest()[:24])
+    last_modified = changed or None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        count('page', name, 'not_modified')
+        return etag, last_modified, response
+    if not anonymous:
+        count('page', name, 'bypassed')
+        return etag, last_modified, None
+    cached = _cache().get(f'httpcache:page:{etag}')
+    if cached is None:
+        count('page', name, 'misses')
+        return etag, last_modified, None
+    count('page', name, 'hits')
+    content, content_type = cached
+    return etag, last_modified, HttpResponse(content, content_type=content_type)
+
+
+def _finish(request, response, etag, last_modified, from_cache):
+    if response.status_code == 200 and not from_cache and not request.user.is_authenticated \
+            and not response.streaming and not response.cookies:
+        _cache().set(f'httpcache:page:{etag}', (response.content, response['Content-Type']), timeout=_timeout())
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        # always revalidate; the answer is usually a cheap 304
+        patch_cache_control(response, no_cache=True, private=request.user.is_authenticated)
+        patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def cached_page(*stamps, name=None):
+    """
+    View decorator: conditional GET support for every visitor and a full-page cache for
+    anonymous ones, valid while the given stamps (CATALOGUE by default) are unchanged.
+    Only GET/HEAD are touched; other methods go straight to the view.
+    """
+    stamps = stamps or (CATALOGUE,)
+
+    def decorator(view):
+        view_name = name or view.__name__
+
+        if asyncio.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view(request, *args, **kwargs)
+                request.user = await request.auser()
+                # cache lookups only (locmem by default): cheap enough to run on the event loop
+                etag, last_modified, response = _lookup(request, view_name, stamps)
+                from_cache = response is not None
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return _finish(request, response, etag, last_modified, from_cache)
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            etag, last_modified, response = _lookup(request, view_name, stamps)
+            from_cache = response is not None
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return _finish(request, response, etag, last_modified, from_cache)
+        return wrapper
+    return decorator
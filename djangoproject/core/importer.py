@@ -0,0 +1,364 @@
+import csv
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .models import COURSE_STATUS, Course, Student, ImportCheckpoint
+from . import accounts, refdata, search, timetable
+
+STUDENTS = 'students'
+COURSES = 'courses'
+
+REQUIRED = {
+    STUDENTS: ('student_id', 'first_name', 'last_name', 'department'),
+    COURSES: ('code', 'name', 'department'),
+}
+STUDENT_FIELDS = ['first_name', 'last_name', 'department_id', 'address']
+COURSE_FIELDS = ['name', 'units', 'department_id', 'status', 'capacity', 'instructor', 'schedule']
+STATUS_CODES = {code for code, _ in COURSE_STATUS}
+
+
+class RowError(ValueError):
+    pass
+
+
+def _cell(value):
+    # Excel hands back numbers for numeric-looking ids (661320115.0); keep them as text
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _iter_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as fh:
+        reader = csv.reader(fh)
+        header = [h.strip().lower() for h in next(reader, [])]
+        for line_no, values in enumerate(reader, start=2):
+            if any(v.strip() for v in values):
+                yield line_no, {h: _cell(v) for h, v in zip(header, values)}
+
+
+def _iter_xlsx(path):
+    try:
+        import openpyxl
+    except ImportError:
+        raise RowError('reading .xlsx files needs the openpyxl package (pip install openpyxl)')
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [_cell(h).lower() for h in next(rows, ())]
+        for line_no, values in enumerate(rows, start=2):
+            row = {h: _cell(v) for h, v in zip(header, values)}
+            if any(row.values()):
+                yield line_no, row
+    finally:
+        wb.close()
+
+
+def read_rows(path):
+    """
+    Stream (line_number, {column: text}) from a CSV or XLSX file; headers are lower-cased.
+    """
+    if os.path.splitext(path)[1].lower() in ('.xlsx', '.xlsm'):
+        return _iter_xlsx(path)
+    return _iter_csv(path)
+
+
+def chunked(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class CodeMap:
+    """
+    In-memory faculty/department code lookup built from the reference-data snapshot.
+    Department codes are only unique within a faculty, so a bare code that exists in
+    several faculties is rejected unless the row also names the faculty.
+    """
+
+    def __init__(self):
+        self.by_code = {}
+        self.by_pair = {}
+        for d in refdata.departments():
+            code = (d.code or '').upper()
+            self.by_code.setdefault(code, []).append(d.id)
+            if d.faculty:
+                self.by_pair[((d.faculty.code or '').upper(), code)] = d.id
+
+    def department(self, code, faculty_code=''):
+        code, faculty_code = code.upper(), faculty_code.upper()
+        if faculty_code:
+            dept_id = self.by_pair.get((faculty_code, code))
+            if dept_id is None:
+                raise RowError(f'unknown department {code} in faculty {faculty_code}')
+            return dept_id
+        ids = self.by_code.get(code, [])
+        if not ids:
+            raise RowError(f'unknown department {code}')
+        if len(ids) > 1:
+            raise RowError(f'department code {code} exists in several faculties; add a faculty column')
+        return ids[0]
+
+
+def _positive_int(row, field, default):
+    raw = row.get(field, '')
+    if raw == '':
+        return default
+    try:
+        value = int(float(raw))
+    except ValueError:
+        raise RowError(f'{field} is not a number: {raw!r}')
+    if value <= 0:
+        raise RowError(f'{field} must be positive')
+    return value
+
+
+def clean_student(row, codes):
+    return {
+        'student_id': row['student_id'],
+        'first_name': row['first_name'],
+        'last_name': row['last_name'],
+        'department_id': codes.department(row['department'], row.get('faculty', '')),
+        'address': row.get('address', ''),
+        'username': row.get('username') or row['student_id'],
+        'email': row.get('email', ''),
+        'password': row.get('password', ''),
+    }
+
+
+def clean_course(row, codes):
+    status = (row.get('status') or 'R').upper()
+    if status not in STATUS_CODES:
+        raise RowError(f'unknown status {status}')
+    return {
+        'code': row['code'],
+        'name': row['name'],
+        'units': _positive_int(row, 'units', 3),
+        'department_id': codes.department(row['department'], row.get('faculty', '')),
+        'status': status,
+        'capacity': _positive_int(row, 'capacity', 40),
+        'instructor': row.get('instructor', ''),
+        'schedule': row.get('schedule', ''),
+    }
+
+
+CLEANERS = {STUDENTS: clean_student, COURSES: clean_course}
+KEYS = {STUDENTS: 'student_id', COURSES: 'code'}
+
+
+def _init_worker():
+    # spawned workers start without the app registry; forked ones already have it
+    django.setup()
+
+
+def _hash(password):
+    return make_password(password or None)
+
+
+class ImportReport:
+    def __init__(self):
+        self.chunks = 0
+        self.skipped_chunks = 0
+        self.imported = 0
+        self.created = 0
+        self.updated = 0
+        self.rejected = []  # (line_no, reason)
+        self.seconds = 0.0
+        self.already_done = False
+
+    @property
+    def rows_per_second(self):
+        return self.imported / self.seconds if self.seconds else 0.0
+
+
+class RegistryImporter:
+    """
+    Chunked, resumable import of students (with their User accounts) or courses from CSV/XLSX.
+
+    Every chunk is validated up front, then written with bulk_create/bulk_update inside its own
+    transaction together with the ImportCheckpoint row, so an interrupted run can be started
+    again and continues after the last committed chunk. The chunks it skips are still validated
+    (without writing) so duplicate keys across the resume point are rejected as in a single run.
+    Passwords are hashed before the transaction opens, in a process pool when workers > 1.
+    Existing users keep their password.
+    """
+
+    def __init__(self, kind, path, chunk_size=5000, batch_size=1000, workers=1, restart=False, on_chunk=None):
+        if kind not in CLEANERS:
+            raise ValueError(f'unknown import kind {kind!r}')
+        self.kind = kind
+        self.path = path
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.workers = workers
+        self.restart = restart
+        self.on_chunk = on_chunk
+        self.pool = None
+        self.seen = set()
+
+    def checkpoint(self):
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(
+            kind=self.kind, digest=file_digest(self.path),
+            defaults={'chunk_size': self.chunk_size, 'source': os.path.basename(self.path)},
+        )
+        if self.restart:
+            checkpoint.chunk_size = self.chunk_size
+            checkpoint.chunks_done = checkpoint.rows_imported = checkpoint.rows_rejected = 0
+            checkpoint.finished_at = None
+            checkpoint.save()
+        return checkpoint
+
+    def run(self):
+        report = ImportReport()
+        started = time.monotonic()
+        checkpoint = self.checkpoint()
+        if checkpoint.finished_at is not None:
+            report.already_done = True
+            return report
+        # a resumed run must cut the file exactly as the interrupted one did
+        self.chunk_size = checkpoint.chunk_size
+        self.codes = CodeMap()
+        self.seen = set()
+        if self.kind == STUDENTS and self.workers > 1:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        try:
+            for index, chunk in enumerate(chunked(read_rows(self.path), self.chunk_size)):
+                if index < checkpoint.chunks_done:
+                    # already committed; only rebuild the keys seen so far
+                    self.validate(chunk)
+                    report.skipped_chunks += 1
+                    continue
+                chunk_started = time.monotonic()
+                rows, rejected = self.validate(chunk)
+                created, updated = self.write_chunk(rows, rejected, checkpoint)
+                report.chunks += 1
+                report.imported += len(rows)
+                report.created += created
+                report.updated += updated
+                report.rejected.extend(rejected)
+                if self.on_chunk:
+                    self.on_chunk(index, len(rows), len(rejected), time.monotonic() - chunk_started)
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+        checkpoint.finished_at = timezone.now()
+        checkpoint.save(update_fields=['finished_at', 'updated_at'])
+        report.seconds = time.monotonic() - started
+        return report
+
+    def validate(self, chunk):
+        """
+        Clean a chunk of (line_no, row); returns (rows, rejected) where rejected holds (line_no, reason).
+        """
+        required = REQUIRED[self.kind]
+        clean = CLEANERS[self.kind]
+        key = KEYS[self.kind]
+        rows, rejected, seen = [], [], self.seen
+        for line_no, row in chunk:
+            missing = [f for f in required if not row.get(f)]
+            if missing:
+                rejected.append((line_no, f"missing {', '.join(missing)}"))
+                continue
+            if row[key] in seen:
+                rejected.append((line_no, f'duplicate {key} {row[key]} in file'))
+                continue
+            try:
+                rows.append(clean(row, self.codes))
+            except RowError as exc:
+                rejected.append((line_no, str(exc)))
+                continue
+            seen.add(row[key])
+        return rows, rejected
+
+    def hash_passwords(self, passwords):
+        if self.pool is not None:
+            return list(self.pool.map(_hash, passwords, chunksize=64))
+        return [_hash(p) for p in passwords]
+
+    def write_chunk(self, rows, rejected, checkpoint):
+        if self.kind == STUDENTS:
+            new_users = self.prepare_users(rows)
+        with transaction.atomic():
+            if self.kind == STUDENTS:
+                created, updated = self.write_students(rows)
+                User.objects.bulk_create(new_users, batch_size=self.batch_size, ignore_conflicts=True)
+                accounts.link_accounts({r['student_id']: r['username'] for r in rows})
+            else:
+                created, updated = self.write_courses(rows)
+                # each committed chunk is visible at once, even if a later chunk fails
+                transaction.on_commit(refdata.invalidate)
+            checkpoint.chunks_done += 1
+            checkpoint.rows_imported += len(rows)
+            checkpoint.rows_rejected += len(rejected)
+            checkpoint.save(update_fields=['chunks_done', 'rows_imported', 'rows_rejected', 'updated_at'])
+        return created, updated
+
+    def prepare_users(self, rows):
+        existing = set(User.objects.filter(username__in=[r['username'] for r in rows]).values_list('username', flat=True))
+        rows = [r for r in rows if r['username'] not in existing]
+        hashes = self.hash_passwords([r['password'] for r in rows])
+        return [
+            User(username=r['username'], password=h, first_name=r['first_name'][:150],
+                 last_name=r['last_name'][:150], email=r['email'])
+            for r, h in zip(rows, hashes)
+        ]
+
+    def write_students(self, rows):
+        existing = Student.objects.in_bulk([r['student_id'] for r in rows], field_name='student_id')
+        to_create, to_update = [], []
+        for r in rows:
+            student = existing.get(r['student_id'])
+            if student is None:
+                to_create.append(Student(student_id=r['student_id'], **{f: r[f] for f in STUDENT_FIELDS}))
+            else:
+                for f in STUDENT_FIELDS:
+                    setattr(student, f, r[f])
+                to_update.append(student)
+        Student.objects.bulk_create(to_create, batch_size=self.batch_size)
+        Student.objects.bulk_update(to_update, STUDENT_FIELDS, batch_size=self.batch_size)
+        # bulk writes send no signals: keep the search index in step here
+        search.index_objects(search.STUDENT, Student.objects.filter(student_id__in=[r['student_id'] for r in rows]))
+        return len(to_create), len(to_update)
+
+    def write_courses(self, rows):
+        existing = {}
+        for course in Course.objects.filter(code__in=[r['code'] for r in rows]).order_by('-id'):
+            existing[course.code] = course  # lowest id wins when a code is duplicated
+        to_create, to_update = [], []
+        for r in rows:
+            course = existing.get(r['code'])
+            if course is None:
+                to_create.append(Course(code=r['code'], **{f: r[f] for f in COURSE_FIELDS}))
+            else:
+                for f in COURSE_FIELDS:
+                    setattr(course, f, r[f])
+                to_update.append(course)
+        Course.objects.bulk_create(to_create, batch_size=self.batch_size)
+        Course.objects.bulk_update(to_update, COURSE_FIELDS, batch_size=self.batch_size)
+        # bulk writes send no signals: rebuild meetings and search rows for the chunk
+        courses = list(Course.objects.filter(code__in=[r['code'] for r in rows]))
+        timetable.sync_meetings_bulk(courses, batch_size=self.batch_size)
+        search.index_objects(search.COURSE, courses, batch_size=self.batch_size)
+        return len(to_create), len(to_update)
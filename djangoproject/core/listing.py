@@ -0,0 +1,127 @@
+from django.db import connection
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .catalogue import InvalidCursor, decode_cursor, encode_cursor, int_or_none
+from .models import Registration, Student
+from . import search
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# bounded COUNT: stop counting here and show "cap+" instead of scanning the whole table
+APPROX_COUNT_CAP = 10000
+# largest primary key (BigAutoField); a longer number in the course filter is read as a code
+MAX_ID = 2 ** 63 - 1
+
+
+def approximate_count(queryset, cap=APPROX_COUNT_CAP):
+    """
+    Return (count, exact). Counts at most cap + 1 rows, so the cost does not grow with the table.
+    For an unfiltered queryset on PostgreSQL the planner's row estimate is used once the cap is hit.
+    """
+    n = queryset.order_by().values('pk')[:cap + 1].count()
+    if n <= cap:
+        return n, True
+    if connection.vendor == 'postgresql' and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] > cap:
+            return int(row[0]), False
+    return cap, False
+
+
+def _page_size(params):
+    return min(max(int_or_none(params.get('limit')) or PAGE_SIZE, 1), MAX_PAGE_SIZE)
+
+
+class RegistrationListing:
+    """
+    Registrations newest first, keyset paginated on (created_at, id), filtered in the database.
+
+    Filters (optional): year, semester, status, course (id or code), department (course
+    department id), grade, student (Student pk); `after` is the cursor of the previous page.
+    """
+
+    def __init__(self, params, queryset=None):
+        self.queryset_base = queryset if queryset is not None else Registration.objects.all()
+        self.year = int_or_none(params.get('year'))
+        self.semester = (params.get('semester') or '').strip()
+        self.status = (params.get('status') or '').strip().upper()
+        self.course = (params.get('course') or '').strip()
+        self.department = int_or_none(params.get('department'))
+        self.grade = (params.get('grade') or '').strip().upper()
+        self.student = int_or_none(params.get('student'))
+        self.limit = _page_size(params)
+        self.after = params.get('after') or ''
+
+    def queryset(self):
+        qs = self.queryset_base.select_related('student', 'course')
+        if self.year:
+            qs = qs.filter(year=self.year)
+        if self.semester:
+            qs = qs.filter(semester=self.semester)
+        if self.status:
+            qs = qs.filter(status=self.status)
+        if self.course:
+            if self.course.isdecimal() and int(self.course) <= MAX_ID:
+                qs = qs.filter(course_id=int(self.course))
+            else:
+                qs = qs.filter(course__code=self.course)
+        if self.department:
+            qs = qs.filter(course__department_id=self.department)
+        if self.grade:
+            qs = qs.filter(grade='' if self.grade == '-' else self.grade)
+        if self.student:
+            qs = qs.filter(student_id=self.student)
+        return qs.order_by('-created_at', '-id')
+
+    def page(self):
+        """
+        Return (registrations, next_cursor); raises InvalidCursor for a malformed `after`.
+        """
+        qs = self.queryset()
+        if self.after:
+            created, pk = decode_cursor(self.after)
+            created = parse_datetime(created) if isinstance(created, str) else None
+            if created is None or not isinstance(pk, int):
+                raise InvalidCursor(self.after)
+            qs = qs.filter(Q(created_at__lt=created) | Q(created_at=created, id__lt=pk))
+        rows = list(qs[:self.limit + 1])
+        regs = rows[:self.limit]
+        next_cursor = None
+        if len(rows) > self.limit:
+            last = regs[-1]
+            next_cursor = encode_cursor(last.created_at.isoformat(), last.pk)
+        return regs, next_cursor
+
+
+class StudentListing:
+    """
+    Students ordered by student_id, keyset paginated on student_id (it is unique).
+    Filters: q (n-gram search), department.
+    """
+
+    def __init__(self, params):
+        self.q = (params.get('q') or '').strip()
+        self.department = int_or_none(params.get('department'))
+        self.limit = _page_size(params)
+        self.after = params.get('after') or ''
+
+    def queryset(self):
+        qs = Student.objects.select_related('department')
+        if self.q:
+            qs = search.filter_queryset(search.STUDENT, qs, self.q)
+        if self.department:
+            qs = qs.filter(department_id=self.department)
+        return qs.order_by('student_id')
+
+    def page(self):
+        qs = self.queryset()
+        if self.after:
+            (student_id,) = decode_cursor(self.after, arity=1)
+            qs = qs.filter(student_id__gt=str(student_id))
+        rows = list(qs[:self.limit + 1])
+        students = rows[:self.limit]
+        next_cursor = encode_cursor(students[-1].student_id) if len(rows) > self.limit else None
+        return students, next_cursor
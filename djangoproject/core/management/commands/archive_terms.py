@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from core import terms
+
+class Command(BaseCommand):
+    help = 'Move the graded registrations of closed terms to the archive table, in short batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('terms', nargs='*', metavar='YEAR/SEMESTER',
+                            help='Terms to archive (default: every closed term)')
+        parser.add_argument('--close', action='store_true', help='Close the given terms first')
+        parser.add_argument('--batch-size', type=int, default=terms.BATCH_SIZE, help='Rows moved per transaction')
+        parser.add_argument('--pause', type=float, default=terms.PAUSE, help='Seconds between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be moved')
+
+    def handle(self, *args, **options):
+        selected = [self._parse(value) for value in options['terms']]
+        if options['close']:
+            if not selected:
+                raise CommandError('--close needs the terms to close')
+            for year, semester in selected:
+                terms.close(year, semester)
+        for year, semester in selected or terms.closed_terms():
+            if terms.status(year, semester) == 'OPEN':
+                raise CommandError(f'term {year}/{semester} is open; close it first (--close)')
+            if options['dry_run']:
+                self.stdout.write(f"{year}/{semester}: {terms.archivable(year, semester).count()} row(s) to archive")
+                continue
+            progress = None
+            if options['verbosity'] > 1:
+                progress = lambda n: self.stdout.write(f"{year}/{semester}: {n} row(s) moved")  # noqa: E731
+            moved = terms.archive(year, semester, batch_size=options['batch_size'], pause=options['pause'],
+                                  progress=progress)
+            self.stdout.write(self.style.SUCCESS(f"{year}/{semester}: archived {moved} registration(s)"))
+
+    @staticmethod
+    def _parse(value):
+        year, sep, semester = value.partition('/')
+        if not sep or not year.isdigit() or not semester:
+            raise CommandError(f'expected YEAR/SEMESTER, not {value!r}')
+        return int(year), semester
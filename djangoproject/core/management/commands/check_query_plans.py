@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from core import queryplans
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot queries (core.queryplans) and fail when any of them scans a whole table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Only these queries (default: all)')
+        parser.add_argument('--plans', action='store_true', help='Print every plan, not only the failing ones')
+
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - queryplans.HOT_QUERIES.keys()
+        if unknown:
+            raise CommandError(f"unknown query: {', '.join(sorted(unknown))} (known: {', '.join(queryplans.HOT_QUERIES)})")
+        failing = 0
+        for name, plan, scans in queryplans.check(options['names']):
+            if scans:
+                failing += 1
+                self.stdout.write(self.style.ERROR(f"{name}: full scan of {', '.join(scans)}"))
+            elif options['plans'] or options['verbosity'] > 1:
+                self.stdout.write(self.style.SUCCESS(f"{name}: ok"))
+            if scans or options['plans']:
+                for line in plan.splitlines():
+                    self.stdout.write(f"    {line}")
+        if failing:
+            raise CommandError(f"{failing} hot query(ies) without a usable index")
+        self.stdout.write(self.style.SUCCESS(f"{len(options['names']) or len(queryplans.HOT_QUERIES)} hot query(ies) use indexes"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from core.timetable import term_clash_report
+
+class Command(BaseCommand):
+    help = 'List every student whose confirmed courses clash in one term'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, required=True)
+        parser.add_argument('--semester', required=True)
+
+    def handle(self, *args, **options):
+        report = term_clash_report(options['year'], options['semester'])
+        for student_id in sorted(report):
+            pairs = ', '.join(f"{a} x {b}" for a, b in report[student_id])
+            self.stdout.write(self.style.WARNING(f"{student_id}: {pairs}"))
+        self.stdout.write(self.style.SUCCESS(f"{len(report)} student(s) with clashes"))
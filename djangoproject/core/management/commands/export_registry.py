@@ -0,0 +1,48 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from core import exports
+from core.models import Course, Student
+
+class Command(BaseCommand):
+    help = 'Stream registrations, a course class list or a student transcript to CSV/NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('export', choices=sorted(exports.COLUMNS))
+        parser.add_argument('--year', type=int)
+        parser.add_argument('--semester')
+        parser.add_argument('--department', help='Department code or id (course department)')
+        parser.add_argument('--course', help='Course code or id (required for classlist)')
+        parser.add_argument('--student', help='Student id (required for transcript)')
+        parser.add_argument('--format', choices=exports.FORMATS, default='csv')
+        parser.add_argument('--output', '-o', help='Output file (default: stdout)')
+        parser.add_argument('--chunk-size', type=int, default=exports.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        filters = {'year': options['year'], 'semester': options['semester'], 'department': options['department']}
+        if options['export'] == 'classlist':
+            if not options['course']:
+                raise CommandError('classlist needs --course')
+            lookup = {'pk': int(options['course'])} if options['course'].isdigit() else {'code': options['course']}
+            course = Course.objects.filter(**lookup).first()
+            if course is None:
+                raise CommandError(f"Course not found: {options['course']}")
+            filters['course'] = course.pk
+        if options['export'] == 'transcript':
+            student = Student.objects.filter(student_id=options['student'] or '').first()
+            if student is None:
+                raise CommandError(f"Student not found: {options['student']}")
+            filters['student'] = student.pk
+
+        lines = exports.stream(options['export'], options['format'], chunk_size=options['chunk_size'], **filters)
+        out = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else sys.stdout
+        count = -1 if options['format'] == 'csv' else 0  # do not count the CSV header
+        try:
+            for line in lines:
+                out.write(line)
+                count += 1
+        finally:
+            if options['output']:
+                out.close()
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f"Exported {count} row(s) to {options['output']}"))
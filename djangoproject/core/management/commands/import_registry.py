@@ -0,0 +1,53 @@
+import csv
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from core.importer import RegistryImporter, RowError, STUDENTS, COURSES
+
+class Command(BaseCommand):
+    help = 'Import students (with user accounts) or courses from a CSV/XLSX file in resumable chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=[STUDENTS, COURSES])
+        parser.add_argument('path', help='CSV or XLSX file with a header row')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per transaction / checkpoint')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk INSERT/UPDATE statement')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Processes used to hash passwords')
+        parser.add_argument('--rejects', help='Write rejected rows (line, reason) to this CSV file')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and import the whole file again')
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['path']):
+            raise CommandError(f"File not found: {options['path']}")
+
+        def progress(index, imported, rejected, seconds):
+            rate = imported / seconds if seconds else 0
+            self.stdout.write(f"chunk {index + 1}: {imported} imported, {rejected} rejected ({rate:.0f} rows/s)")
+
+        importer = RegistryImporter(
+            options['kind'], options['path'], chunk_size=options['chunk_size'], batch_size=options['batch_size'],
+            workers=options['workers'], restart=options['restart'], on_chunk=progress,
+        )
+        try:
+            report = importer.run()
+        except RowError as exc:
+            raise CommandError(str(exc))
+
+        if report.already_done:
+            self.stdout.write(self.style.WARNING('This file was already imported; use --restart to import it again'))
+            return
+        if report.skipped_chunks:
+            self.stdout.write(f"Resumed after {report.skipped_chunks} committed chunk(s)")
+        for line_no, reason in report.rejected[:20]:
+            self.stdout.write(self.style.WARNING(f"line {line_no}: {reason}"))
+        if len(report.rejected) > 20:
+            self.stdout.write(self.style.WARNING(f"... and {len(report.rejected) - 20} more rejected row(s)"))
+        if options['rejects'] and report.rejected:
+            with open(options['rejects'], 'w', newline='', encoding='utf-8') as fh:
+                writer = csv.writer(fh)
+                writer.writerow(['line', 'reason'])
+                writer.writerows(report.rejected)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report.imported} {options['kind']} ({report.created} new, {report.updated} updated), "
+            f"rejected {len(report.rejected)} in {report.seconds:.1f}s ({report.rows_per_second:.0f} rows/s)"
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from core import precompile
+
+class Command(BaseCommand):
+    help = 'Compile every project template (core.precompile) and fail on syntax errors or missing parents/includes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Only these templates (default: all under BASE_DIR)')
+
+    def handle(self, *args, **options):
+        timings, errors = precompile.precompile(options['names'])
+        if options['verbosity'] > 1:
+            for name, ms in sorted(timings.items(), key=lambda item: -item[1]):
+                self.stdout.write(f"{name:<40} {ms:>8.2f} ms")
+        for name, message in errors:
+            self.stdout.write(self.style.ERROR(f"{name}: {message}"))
+        if errors:
+            raise CommandError(f"{len(errors)} template(s) do not compile")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(timings)} template(s) compiled in {sum(timings.values()):.0f} ms"
+        ))
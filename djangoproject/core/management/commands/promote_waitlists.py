@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from core import waitlist
+
+class Command(BaseCommand):
+    help = 'Give free seats to waitlisted students, for every section that has both (first come, first served)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int)
+        parser.add_argument('--semester')
+        parser.add_argument('--dry-run', action='store_true', help='Only list the sections that would be processed')
+
+    def handle(self, *args, **options):
+        sections = waitlist.sections_to_promote(options['year'], options['semester'])
+        total = 0
+        for course_id, year, semester in sections:
+            if options['dry_run']:
+                self.stdout.write(f"course={course_id} {year}/{semester}")
+                continue
+            promoted = waitlist.promote(course_id, year, semester)
+            total += len(promoted)
+            for entry in promoted:
+                self.stdout.write(f"{entry.student.student_id} -> course={course_id} {year}/{semester}")
+        self.stdout.write(self.style.SUCCESS(f"{len(sections)} section(s) checked, {total} student(s) promoted"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.models import Course, Meeting
+from core.timetable import parse_schedule
+
+class Command(BaseCommand):
+    help = 'Re-parse every Course.schedule into Meeting rows'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            Meeting.objects.all().delete()
+            batch = []
+            for course_id, schedule in Course.objects.exclude(schedule='').values_list('id', 'schedule').iterator():
+                batch.extend(Meeting(course_id=course_id, day=d, start_minute=s, end_minute=e) for d, s, e in parse_schedule(schedule))
+            Meeting.objects.bulk_create(batch, batch_size=1000)
+        self.stdout.write(self.style.SUCCESS(f"Created {len(batch)} meeting(s)"))
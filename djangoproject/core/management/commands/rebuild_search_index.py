@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from core import search
+
+class Command(BaseCommand):
+    help = 'Rebuild the n-gram search index for courses and students from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', choices=['courses', 'students'], help='Rebuild just one kind')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        kinds = None
+        if options['only'] == 'courses':
+            kinds = [search.COURSE]
+        elif options['only'] == 'students':
+            kinds = [search.STUDENT]
+        written = search.rebuild(kinds, batch_size=options['batch_size'])
+        for kind, count in written.items():
+            model, _ = search.INDEXED[kind]
+            self.stdout.write(self.style.SUCCESS(f"{model.__name__}: {count} index rows"))
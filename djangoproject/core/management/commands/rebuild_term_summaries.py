@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from core import summaries
+
+class Command(BaseCommand):
+    help = 'Rebuild per-student term summaries (credits/GPA) from registrations, or check them with --check'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only compare stored summaries with registrations')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['check']:
+            problems = summaries.check()
+            for student_id, year, semester, field, stored, expected in problems:
+                self.stdout.write(self.style.WARNING(
+                    f"student={student_id} {year}/{semester} {field}: stored={stored} expected={expected}"
+                ))
+            if problems:
+                raise CommandError(f"{len(problems)} inconsistent summary value(s); run without --check to rebuild")
+            self.stdout.write(self.style.SUCCESS('Term summaries are consistent'))
+            return
+        written = summaries.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} term summary row(s)"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from core.seats import reconcile_seats
+
+class Command(BaseCommand):
+    help = 'Recompute course seat counters from CONFIRMED registrations and report any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Only reconcile this academic year')
+        parser.add_argument('--semester', help='Only reconcile this semester')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        drift = reconcile_seats(year=options['year'], semester=options['semester'], dry_run=options['dry_run'])
+        for course_id, year, semester, old, new in drift:
+            self.stdout.write(self.style.WARNING(f"course={course_id} {year}/{semester}: {old} -> {new}"))
+        verb = 'found' if options['dry_run'] else 'fixed'
+        self.stdout.write(self.style.SUCCESS(f"Reconciliation done, {verb} {len(drift)} drifted counter(s)"))
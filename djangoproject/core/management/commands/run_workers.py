@@ -0,0 +1,63 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+
+
+def _child(threads, poll):
+    # spawned process: set Django up again before touching models
+    import django
+    django.setup()
+    from core.tasks import Worker
+    worker = Worker(threads=threads, poll=poll)
+    signal.signal(signal.SIGTERM, lambda *args: worker.stop())
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent stops us with SIGTERM
+    worker.run()
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs (core.tasks) from the Job table with a pool of threads or processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help='Worker threads per process')
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Worker processes; more than 1 spawns that many children with --threads each')
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds between polls when no job is due')
+        parser.add_argument('--once', action='store_true', help='Run the jobs that are due now, then exit')
+
+    def handle(self, *args, **options):
+        from core.tasks import Worker
+
+        if options['processes'] > 1 and not options['once']:
+            self._run_processes(options)
+            return
+        worker = Worker(threads=options['threads'], poll=options['poll'])
+        if not options['once']:
+            self.stdout.write(f"{worker.name}: {worker.threads} thread(s), polling every {options['poll']}s")
+        try:
+            processed = worker.run(once=options['once'])
+        except KeyboardInterrupt:
+            worker.stop()
+            processed = worker.processed
+        self.stdout.write(self.style.SUCCESS(f"{processed} job(s) processed"))
+
+    def _run_processes(self, options):
+        context = multiprocessing.get_context('spawn')
+        children = [context.Process(target=_child, args=(options['threads'], options['poll']), daemon=False)
+                    for _ in range(options['processes'])]
+        for child in children:
+            child.start()
+        self.stdout.write(f"{len(children)} worker process(es) x {options['threads']} thread(s)")
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        try:
+            for child in children:
+                child.join()
+        except KeyboardInterrupt:
+            # let running jobs finish: the children stop after their current job
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, signal.SIG_IGN)
+            for child in children:
+                child.terminate()
+            for child in children:
+                child.join()
+        self.stdout.write(self.style.SUCCESS('Workers stopped'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from core import refdata
+
+class Command(BaseCommand):
+    help = 'Load faculty/department/course snapshots into the reference-data cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--invalidate', action='store_true', help='Start a new version before warming')
+
+    def handle(self, *args, **options):
+        if options['invalidate']:
+            refdata.invalidate()
+        refdata.warm()
+        self.stdout.write(self.style.SUCCESS(
+            f"Reference data warmed at version {refdata.version()}: "
+            f"{len(refdata.faculties())} faculties, {len(refdata.departments())} departments, {len(refdata.courses())} courses"
+        ))
@@ -0,0 +1,162 @@
+import bisect
+import threading
+import time
+from collections import deque
+
+# Upper bounds of the latency histogram buckets (seconds) and query-count buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+# Rolling window for the quantile summaries: at most this many recent samples, none older than WINDOW
+WINDOW = 300
+WINDOW_SAMPLES = 1024
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class Histogram:
+    """
+    Cumulative Prometheus-style histogram plus a rolling window of recent samples for quantiles.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.n = 0
+        self.recent = deque(maxlen=WINDOW_SAMPLES)  # (timestamp, value)
+
+    def observe(self, value, now):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.n += 1
+        self.recent.append((now, value))
+
+    def quantiles(self, now):
+        values = sorted(v for t, v in self.recent if now - t <= WINDOW)
+        if not values:
+            return {}
+        return {q: values[min(int(q * len(values)), len(values) - 1)] for q in QUANTILES}
+
+
+class RequestStats:
+    """
+    Per (view, action) aggregates for one process.
+    """
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.duplicate_queries = 0
+        self.status = {}
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.started = time.time()
+
+    def observe(self, view, action, status, seconds, queries, db_seconds, template_seconds, duplicates):
+        now = time.time()
+        with self.lock:
+            s = self.stats.get((view, action))
+            if s is None:
+                s = self.stats[(view, action)] = RequestStats()
+            s.latency.observe(seconds, now)
+            s.queries.observe(queries, now)
+            s.db_seconds += db_seconds
+            s.template_seconds += template_seconds
+            s.duplicate_queries += duplicates
+            klass = f'{status // 100}xx'
+            s.status[klass] = s.status.get(klass, 0) + 1
+
+    def reset(self):
+        with self.lock:
+            self.stats.clear()
+
+    def snapshot(self):
+        """
+        {(view, action): {...}} plain-data copy, e.g. for tests or JSON.
+        """
+        now = time.time()
+        with self.lock:
+            return {
+                key: {
+                    'requests': s.latency.n,
+                    'seconds': s.latency.total,
+                    'queries': s.queries.total,
+                    'db_seconds': s.db_seconds,
+                    'template_seconds': s.template_seconds,
+                    'duplicate_queries': s.duplicate_queries,
+                    'latency_quantiles': s.latency.quantiles(now),
+                    'status': dict(s.status),
+                }
+                for key, s in self.stats.items()
+            }
+
+    def render(self, extra_counters=()):
+        """
+        Prometheus text exposition format (version 0.0.4).
+        extra_counters: iterable of (name, help, [(labels dict, value)]).
+        """
+        now = time.time()
+        out = []
+
+        def labels(view, action, **more):
+            pairs = {'view': view, 'action': action, **more}
+            return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs.items()) + '}'
+
+        def histogram(name, help_text, attr):
+            out.append(f'# HELP {name} {help_text}')
+            out.append(f'# TYPE {name} histogram')
+            for (view, action), s in items:
+                h = getattr(s, attr)
+                running = 0
+                for bound, count in zip(h.buckets + ('+Inf',), h.counts):
+                    running += count
+                    out.append(f'{name}_bucket{labels(view, action, le=bound)} {running}')
+                out.append(f'{name}_sum{labels(view, action)} {h.total:.6f}')
+                out.append(f'{name}_count{labels(view, action)} {h.n}')
+
+        def counter(name, help_text, value_of):
+            out.append(f'# HELP {name} {help_text}')
+            out.append(f'# TYPE {name} counter')
+            for (view, action), s in items:
+                out.append(f'{name}{labels(view, action)} {value_of(s)}')
+
+        with self.lock:
+            items = sorted(self.stats.items())
+            histogram('kanitha_request_duration_seconds', 'Wall time per request.', 'latency')
+            histogram('kanitha_request_queries', 'Database queries per request.', 'queries')
+            out.append('# HELP kanitha_request_duration_recent_seconds Latency quantiles over the last five minutes.')
+            out.append('# TYPE kanitha_request_duration_recent_seconds summary')
+            for (view, action), s in items:
+                for q, value in s.latency.quantiles(now).items():
+                    out.append(f'kanitha_request_duration_recent_seconds{labels(view, action, quantile=q)} {value:.6f}')
+            counter('kanitha_request_db_seconds_total', 'Time spent in database queries.', lambda s: f'{s.db_seconds:.6f}')
+            counter('kanitha_request_template_seconds_total', 'Time spent rendering templates.', lambda s: f'{s.template_seconds:.6f}')
+            counter('kanitha_request_duplicate_queries_total', 'Repeated identical query shapes (N+1 candidates).', lambda s: s.duplicate_queries)
+            out.append('# HELP kanitha_responses_total Responses by status class.')
+            out.append('# TYPE kanitha_responses_total counter')
+            for (view, action), s in items:
+                for klass, n in sorted(s.status.items()):
+                    out.append(f'kanitha_responses_total{labels(view, action, status=klass)} {n}')
+
+        for name, help_text, samples in extra_counters:
+            out.append(f'# HELP {name} {help_text}')
+            out.append(f'# TYPE {name} counter')
+            for label_map, value in samples:
+                rendered = ','.join(f'{k}="{_escape(v)}"' for k, v in label_map.items())
+                out.append(f'{name}{{{rendered}}} {value}')
+        out.append('# HELP kanitha_process_start_time_seconds Start time of the process.')
+        out.append('# TYPE kanitha_process_start_time_seconds gauge')
+        out.append(f'kanitha_process_start_time_seconds {self.started:.0f}')
+        return '\n'.join(out) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = Registry()
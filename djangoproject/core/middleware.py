@@ -0,0 +1,237 @@
+import contextvars
+import logging
+import os
+import re
+import time
+from collections import Counter
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template as DjangoBackendTemplate, reraise
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+
+from .accounts import aget_student, get_student
+from .metrics import registry
+from .staticfiles import StaticFileServer
+
+logger = logging.getLogger('core.perf')
+
+# a query shape repeated this many times in one request is reported as an N+1 candidate
+DUPLICATE_THRESHOLD = 3
+_ACTION_RE = re.compile(r'^[a-z_]{1,32}$')
+_IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+_SPACE_RE = re.compile(r'\s+')
+
+_current = contextvars.ContextVar('core_perf_current', default=None)
+
+
+def fingerprint(sql):
+    """
+    Shape of a query: parameters are already placeholders, IN lists of any length collapse to one.
+    """
+    return _SPACE_RE.sub(' ', _IN_LIST_RE.sub('IN (...)', sql)).strip()
+
+
+class _Sample:
+    __slots__ = ('queries', 'db_seconds', 'template_seconds', 'shapes')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.shapes = Counter()
+
+    def add_query(self, sql, seconds):
+        self.db_seconds += seconds
+        self.queries += 1
+        self.shapes[sql] += 1
+
+    def duplicates(self):
+        """
+        [(fingerprint, count)] of query shapes run at least DUPLICATE_THRESHOLD times, worst first.
+        """
+        merged = Counter()
+        for sql, n in self.shapes.items():
+            merged[fingerprint(sql)] += n
+        return [(fp, n) for fp, n in merged.most_common() if n >= DUPLICATE_THRESHOLD]
+
+
+def _record_query(execute, sql, params, many, context):
+    # execute_wrapper installed once on every connection; counts toward the request running in
+    # this context. Async views run their ORM calls in worker threads with a copy of the
+    # request's context, so their queries land on the same sample.
+    sample = _current.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    t0 = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.add_query(sql, time.perf_counter() - t0)
+
+
+def _install(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+class _TimedTemplate(DjangoBackendTemplate):
+    def render(self, context=None, request=None):
+        sample = _current.get()
+        if sample is None:
+            return super().render(context, request)
+        t0 = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            sample.template_seconds += time.perf_counter() - t0
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    The Django template backend, adding the time of top-level renders ({% include %} runs
+    inside them) to the sample of the request PerfMiddleware is handling. Renders outside a
+    request are not timed. Used as the TEMPLATES backend while PERF_METRICS_ENABLED.
+    """
+
+    def from_string(self, template_code):
+        return _TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return _TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class PerfMiddleware:
+    """
+    Per-request wall time, query count, DB time, template time and repeated-query detection,
+    aggregated per (view name, POST action) into core.metrics.registry and served at /metrics/.
+
+    Works in front of both sync (WSGI) and async (ASGI) views.
+
+    Settings:
+      PERF_METRICS_ENABLED   turn the middleware into a pass-through (default True); template
+                             time needs the core.middleware.TimedDjangoTemplates backend
+      PERF_SLOW_REQUEST_MS   log requests slower than this with their repeated query shapes (default off)
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'PERF_METRICS_ENABLED', True)
+        self.slow_ms = getattr(settings, 'PERF_SLOW_REQUEST_MS', None)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        if self.enabled:
+            connection_created.connect(_install, dispatch_uid='core_perf_install')
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        for alias in connections:
+            # connections opened before this middleware loaded never sent connection_created
+            _install(connections[alias])
+        sample = _Sample()
+        token = _current.set(sample)
+        t0 = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, sample, time.perf_counter() - t0)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        sample = _Sample()
+        token = _current.set(sample)
+        t0 = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, sample, time.perf_counter() - t0)
+        return response
+
+    def record(self, request, response, sample, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name if match else None) or 'unresolved'
+        action = '-'
+        if request.method == 'POST':
+            posted = request.POST.get('action', '')
+            action = posted if _ACTION_RE.match(posted) else ('other' if posted else '-')
+        duplicates = sample.duplicates()
+        registry.observe(view, action, response.status_code, elapsed, sample.queries, sample.db_seconds,
+                         sample.template_seconds, sum(n - 1 for _, n in duplicates))
+        if self.slow_ms is not None and elapsed * 1000 >= self.slow_ms:
+            logger.warning(
+                'slow request %s %s view=%s action=%s %.1fms queries=%d db=%.1fms templates=%.1fms repeated=%s',
+                request.method, request.path, view, action, elapsed * 1000, sample.queries,
+                sample.db_seconds * 1000, sample.template_seconds * 1000,
+                '; '.join(f'{n}x {fp[:200]}' for fp, n in duplicates[:5]) or '-',
+            )
+
+
+class StudentMiddleware(MiddlewareMixin):
+    """
+    request.student: the logged-in user's Student (department and faculty joined), loaded on
+    first access and at most once per request; async views await request.astudent().
+
+    Like request.user it is a lazy proxy: test it for truth (falsy without a linked student)
+    and use `request.student or None` where a real None is needed. Needs AuthenticationMiddleware.
+    """
+
+    def process_request(self, request):
+        request.student = SimpleLazyObject(lambda: get_student(request))
+        request.astudent = partial(aget_student, request)
+
+
+class StaticFilesMiddleware(MiddlewareMixin):
+    """
+    Serves STATIC_URL from the collected STATIC_ROOT in-process when STATIC_SERVE is on
+    (core.staticfiles): immutable caching for hashed names, precompressed variants, 304s.
+    First in MIDDLEWARE, so asset requests skip sessions, auth and the metrics.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'STATIC_SERVE', False):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.server = StaticFileServer(settings.STATIC_ROOT, settings.STATIC_URL)
+
+    def process_request(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        static_file = self.server.find(request.path_info)
+        if static_file is None:
+            return None
+        path, size, encoding = self.server.choose(static_file, request.headers.get('Accept-Encoding', ''))
+        headers = self.server.headers(static_file, encoding)
+        response = get_conditional_response(request, etag=headers['ETag'], last_modified=static_file.mtime)
+        if response is None:
+            if request.method == 'GET':
+                # streamed; the WSGI server's file_wrapper (sendfile) can take it from here
+                response = FileResponse(open(path, 'rb'), content_type=static_file.content_type,
+                                        filename=os.path.basename(static_file.path))
+            else:
+                response = HttpResponse(b'', content_type=static_file.content_type)
+            response['Content-Length'] = size
+        for name, value in headers.items():
+            response[name] = value
+        return response
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_course_capacity_course_instructor_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('semester', models.CharField(max_length=20)),
+                ('taken', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_counters', to='core.course')),
+            ],
+            options={
+                'unique_together': {('course', 'year', 'semester')},
+            },
+        ),
+    ]
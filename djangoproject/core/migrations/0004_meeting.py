@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:45
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# A frozen copy of core.timetable.parse_schedule as it was when this migration was written,
+# so later changes to the parser do not change what this migration did.
+DAY_NAMES = {
+    'mon': 0, 'monday': 0, 'จ': 0, 'จันทร์': 0,
+    'tue': 1, 'tuesday': 1, 'อ': 1, 'อังคาร': 1,
+    'wed': 2, 'wednesday': 2, 'พ': 2, 'พุธ': 2,
+    'thu': 3, 'thursday': 3, 'พฤ': 3, 'พฤหัส': 3, 'พฤหัสบดี': 3,
+    'fri': 4, 'friday': 4, 'ศ': 4, 'ศุกร์': 4,
+    'sat': 5, 'saturday': 5, 'ส': 5, 'เสาร์': 5,
+    'sun': 6, 'sunday': 6, 'อา': 6, 'อาทิตย์': 6,
+}
+
+_TOKEN_RE = re.compile(r'^\s*(\S+)\s+(\d{1,2})[:.](\d{2})\s*[-–]\s*(\d{1,2})[:.](\d{2})\s*$')
+
+
+def parse_schedule(schedule_str):
+    slots = []
+    if not schedule_str:
+        return slots
+    for token in schedule_str.split(','):
+        m = _TOKEN_RE.match(token)
+        if not m:
+            continue
+        day = DAY_NAMES.get(m.group(1).lower().rstrip('.'))
+        if day is None:
+            continue
+        start = int(m.group(2)) * 60 + int(m.group(3))
+        end = int(m.group(4)) * 60 + int(m.group(5))
+        if end <= start:
+            continue
+        slots.append((day, start, end))
+    return slots
+
+
+def backfill_meetings(apps, schema_editor):
+    Course = apps.get_model('core', 'Course')
+    Meeting = apps.get_model('core', 'Meeting')
+    batch = []
+    for course_id, schedule in Course.objects.exclude(schedule='').values_list('id', 'schedule').iterator():
+        for day, start, end in parse_schedule(schedule):
+            batch.append(Meeting(course_id=course_id, day=day, start_minute=start, end_minute=end))
+        if len(batch) >= 1000:
+            Meeting.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Meeting.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_seatcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Meeting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.PositiveSmallIntegerField(choices=[(0, 'Mon'), (1, 'Tue'), (2, 'Wed'), (3, 'Thu'), (4, 'Fri'), (5, 'Sat'), (6, 'Sun')])),
+                ('start_minute', models.PositiveSmallIntegerField()),
+                ('end_minute', models.PositiveSmallIntegerField()),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='meetings', to='core.course')),
+            ],
+            options={
+                'ordering': ['course', 'day', 'start_minute'],
+            },
+        ),
+        migrations.RunPython(backfill_meetings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:49
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+# A frozen copy of the core.search gram scheme (NFC + casefold, character bigrams) as it was
+# when this migration was written; the backfill must not follow later changes to it.
+def grams(text, n=2):
+    out = set()
+    for word in unicodedata.normalize('NFC', text or '').casefold().split():
+        if len(word) <= n:
+            out.add(word)
+        else:
+            out.update(word[i:i + n] for i in range(len(word) - n + 1))
+    return out
+
+
+def build_index(apps, schema_editor):
+    SearchGram = apps.get_model('core', 'SearchGram')
+    sources = [
+        ('C', apps.get_model('core', 'Course'), ('code', 'name', 'instructor')),
+        ('S', apps.get_model('core', 'Student'), ('student_id', 'first_name', 'last_name')),
+    ]
+    for kind, model, fields in sources:
+        batch = []
+        for row in model.objects.values_list('pk', *fields).iterator():
+            doc = set()
+            for value in row[1:]:
+                doc |= grams(value)
+            batch.extend(SearchGram(kind=kind, object_id=row[0], gram=g) for g in doc)
+            if len(batch) >= 2000:
+                SearchGram.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        SearchGram.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_course_catalogue_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchGram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('C', 'Course'), ('S', 'Student')], max_length=1)),
+                ('object_id', models.BigIntegerField()),
+                ('gram', models.CharField(max_length=8)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'object_id'], name='searchgram_object_idx')],
+                'unique_together': {('kind', 'gram', 'object_id')},
+            },
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
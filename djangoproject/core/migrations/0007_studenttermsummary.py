@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Case, F, FloatField, IntegerField, Sum, Value, When
+
+# The aggregation of core.summaries as it was when this migration was written; the backfill
+# must not follow later changes to the live code.
+GRADE_POINTS = {'A': 4.0, 'B': 3.0, 'C': 2.0, 'D': 1.0, 'F': 0.0}
+FIELDS = ('confirmed_units', 'draft_units', 'graded_units', 'grade_points')
+
+
+def totals_annotations():
+    return {
+        'confirmed_units': Sum(Case(When(status='CONFIRMED', then=F('units')), default=Value(0), output_field=IntegerField())),
+        'draft_units': Sum(Case(When(status='DRAFT', then=F('units')), default=Value(0), output_field=IntegerField())),
+        'graded_units': Sum(Case(When(grade__in=GRADE_POINTS, then=F('units')), default=Value(0), output_field=IntegerField())),
+        'grade_points': Sum(Case(
+            *[When(grade=g, then=F('units') * Value(p)) for g, p in GRADE_POINTS.items()],
+            default=Value(0.0), output_field=FloatField(),
+        )),
+    }
+
+
+def gpa_of(graded_units, grade_points):
+    return round(grade_points / graded_units, 2) if graded_units else None
+
+
+def backfill_summaries(apps, schema_editor):
+    Registration = apps.get_model('core', 'Registration')
+    StudentTermSummary = apps.get_model('core', 'StudentTermSummary')
+    rows = Registration.objects.values('student_id', 'year', 'semester').annotate(**totals_annotations())
+    StudentTermSummary.objects.bulk_create([
+        StudentTermSummary(
+            student_id=r['student_id'], year=r['year'], semester=r['semester'],
+            gpa=gpa_of(r['graded_units'] or 0, r['grade_points'] or 0.0),
+            **{f: r[f] or 0 for f in FIELDS}
+        )
+        for r in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_searchgram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentTermSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('semester', models.CharField(max_length=20)),
+                ('confirmed_units', models.PositiveIntegerField(default=0)),
+                ('draft_units', models.PositiveIntegerField(default=0)),
+                ('graded_units', models.PositiveIntegerField(default=0)),
+                ('grade_points', models.FloatField(default=0)),
+                ('gpa', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_summaries', to='core.student')),
+            ],
+            options={
+                'unique_together': {('student', 'year', 'semester')},
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def link_students(apps, schema_editor):
+    # the lookups the views used to run per request: student_id == username, else the first
+    # student (by id) whose first_name == username; each account and student is linked once
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Student = apps.get_model('core', 'Student')
+    users = dict(User.objects.values_list('username', 'pk'))
+    linked = set()
+    batch = []
+    for field in ('student_id', 'first_name'):
+        for student in Student.objects.filter(user__isnull=True).order_by('pk').only('pk', field).iterator():
+            user_id = users.get(getattr(student, field))
+            if user_id is None or user_id in linked:
+                continue
+            linked.add(user_id)
+            student.user_id = user_id
+            batch.append(student)
+        Student.objects.bulk_update(batch, ['user'], batch_size=1000)
+        batch = []
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_hot_filter_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='user',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='student', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(link_students, migrations.RunPython.noop),
+        # only the first_name fallback above needed it
+        migrations.RemoveIndex(
+            model_name='student',
+            name='student_first_name_idx',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:07
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_term_archive'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(django.db.models.functions.text.Upper('code'), name='course_code_upper_idx'),
+        ),
+    ]
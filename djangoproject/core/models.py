@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.db import models
+from django.db.models.functions import Upper
 
 GRADE_CHOICES = [
     ('A', 'A'),
@@ -8,6 +10,8 @@ GRADE_CHOICES = [
     ('F', 'F'),
     ('I', 'Incomplete'),
 ]
+# grades that satisfy a prerequisite
+PASSING_GRADES = ('A', 'B', 'C', 'D')
 
 COURSE_STATUS = [
     ('R', 'Required'),
@@ -15,6 +19,16 @@ COURSE_STATUS = [
     ('M', 'Major-only'),
 ]
 
+DAY_CHOICES = [
+    (0, 'Mon'),
+    (1, 'Tue'),
+    (2, 'Wed'),
+    (3, 'Thu'),
+    (4, 'Fri'),
+    (5, 'Sat'),
+    (6, 'Sun'),
+]
+
 REG_STATUS = [
     ('DRAFT', 'Draft'),
     ('CONFIRMED', 'Confirmed'),
@@ -49,15 +63,44 @@ class Course(models.Model):
     schedule = models.CharField(max_length=300, blank=True)
     prerequisites = models.ManyToManyField('self', symmetrical=False, blank=True, related_name='required_for')
 
+    class Meta:
+        indexes = [
+            # keyset pagination in core.catalogue
+            models.Index(fields=['code', 'id'], name='course_code_id_idx'),
+            # case-insensitive code-prefix search in core.catalogue
+            models.Index(Upper('code'), name='course_code_upper_idx'),
+            models.Index(fields=['department', 'code'], name='course_dept_code_idx'),
+            models.Index(fields=['name'], name='course_name_idx'),
+        ]
+
     def __str__(self):
         return f"{self.code} - {self.name}"
 
+class Meeting(models.Model):
+    """
+    One weekly time slot of a course, parsed from Course.schedule (see core.timetable).
+    Times are minutes after midnight; the slot is [start_minute, end_minute).
+    """
+    course = models.ForeignKey(Course, related_name='meetings', on_delete=models.CASCADE)
+    day = models.PositiveSmallIntegerField(choices=DAY_CHOICES)
+    start_minute = models.PositiveSmallIntegerField()
+    end_minute = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['course', 'day', 'start_minute']
+
+    def __str__(self):
+        return f"{self.course.code} {self.get_day_display()} {self.start_minute // 60:02d}:{self.start_minute % 60:02d}-{self.end_minute // 60:02d}:{self.end_minute % 60:02d}"
+
 class Student(models.Model):
     student_id = models.CharField(max_length=50, unique=True)
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
     department = models.ForeignKey(Department, related_name='students', on_delete=models.SET_NULL, null=True, blank=True)
     address = models.TextField(blank=True)
+    # the login account; resolved once per request as request.student (core.middleware.StudentMiddleware)
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, related_name='student', on_delete=models.SET_NULL,
+                                null=True, blank=True)
 
     def __str__(self):
         return f"{self.student_id} - {self.first_name} {self.last_name}"
@@ -76,6 +119,228 @@ class Registration(models.Model):
 
     class Meta:
         unique_together = ('student', 'course', 'year', 'semester')
+        indexes = [
+            # per-student term lookups (validator, summaries) and per-section counts (seats, class lists)
+            models.Index(fields=['student', 'year', 'semester', 'status'], name='reg_student_term_idx'),
+            models.Index(fields=['course', 'year', 'semester', 'status'], name='reg_course_term_idx'),
+            # keyset pagination of the staff registration list (core.listing)
+            models.Index(fields=['created_at', 'id'], name='reg_created_id_idx'),
+            # passed courses per student (prerequisite checks), covering course_id. Not a partial
+            # index: SQLite cannot match `grade IN (?, ...)` against an IN-list condition
+            models.Index(fields=['student', 'grade', 'course'], name='reg_student_grade_idx'),
+            # term-wide scans of confirmed rows (clash report, seat reconciliation); partial
+            models.Index(fields=['year', 'semester', 'course', 'student'], condition=models.Q(status='CONFIRMED'),
+                         name='reg_confirmed_term_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student} - {self.course} ({self.year}/{self.semester})"
+
+class Term(models.Model):
+    """
+    Lifecycle of one term (year, semester); see core.terms. A term without a row is open.
+    Only CLOSED terms are archived: their graded registrations move to ArchivedRegistration.
+    """
+    STATUS_CHOICES = [
+        ('OPEN', 'Open'),
+        ('CLOSED', 'Closed'),
+        ('ARCHIVED', 'Archived'),
+    ]
+    year = models.PositiveIntegerField()
+    semester = models.CharField(max_length=20)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='OPEN')
+    closed_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('year', 'semester')
+        ordering = ['-year', '-semester']
+
+    def __str__(self):
+        return f"{self.year}/{self.semester} ({self.status})"
+
+class ArchivedRegistration(models.Model):
+    """
+    A graded Registration of an archived term, moved here by `manage.py archive_terms` so the
+    live table (and its indexes) holds the working set only. Keeps the original id.
+    Transcripts, GPA and prerequisite checks read both tables (core.terms).
+    """
+    id = models.BigIntegerField(primary_key=True)
+    student = models.ForeignKey(Student, related_name='archived_registrations', on_delete=models.CASCADE)
+    course = models.ForeignKey(Course, related_name='archived_registrations', on_delete=models.CASCADE)
+    year = models.PositiveIntegerField()
+    semester = models.CharField(max_length=20)
+    units = models.PositiveIntegerField()
+    grade = models.CharField(max_length=2, choices=GRADE_CHOICES, blank=True)
+    status = models.CharField(max_length=10, choices=REG_STATUS, default='CONFIRMED')
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # transcripts and summaries (per student/term), passed courses (prerequisite checks)
+            models.Index(fields=['student', 'year', 'semester'], name='archreg_student_term_idx'),
+            models.Index(fields=['student', 'grade', 'course'], name='archreg_student_grade_idx'),
+            # seat reconciliation of an archived term
+            models.Index(fields=['year', 'semester', 'course'], name='archreg_term_course_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student} - {self.course} ({self.year}/{self.semester}, archived)"
+
+class SeatCounter(models.Model):
+    """
+    Seats taken in one course section for a term (course, year, semester).
+    Updated only through guarded UPDATEs in core.seats so concurrent confirms
+    can never push `taken` past Course.capacity.
+    """
+    course = models.ForeignKey(Course, related_name='seat_counters', on_delete=models.CASCADE)
+    year = models.PositiveIntegerField()
+    semester = models.CharField(max_length=20)
+    taken = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('course', 'year', 'semester')
+
+    def __str__(self):
+        return f"{self.course.code} ({self.year}/{self.semester}): {self.taken}"
+
+class SearchGram(models.Model):
+    """
+    Inverted index row: one character n-gram of a searchable Course/Student (see core.search).
+    Character n-grams work for Thai, which has no spaces between words.
+    """
+    KIND_CHOICES = [
+        ('C', 'Course'),
+        ('S', 'Student'),
+    ]
+    kind = models.CharField(max_length=1, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    gram = models.CharField(max_length=8)
+
+    class Meta:
+        # the unique index doubles as the posting-list lookup (kind, gram) -> object ids
+        unique_together = ('kind', 'gram', 'object_id')
+        indexes = [
+            models.Index(fields=['kind', 'object_id'], name='searchgram_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} {self.gram!r}"
+
+class StudentTermSummary(models.Model):
+    """
+    Denormalized per-student, per-term totals of Registration rows (see core.summaries).
+    Kept up to date from Registration signals; rebuild with `manage.py rebuild_term_summaries`.
+    """
+    student = models.ForeignKey(Student, related_name='term_summaries', on_delete=models.CASCADE)
+    year = models.PositiveIntegerField()
+    semester = models.CharField(max_length=20)
+    confirmed_units = models.PositiveIntegerField(default=0)
+    draft_units = models.PositiveIntegerField(default=0)
+    # units and unit-weighted grade points of registrations graded A-F
+    graded_units = models.PositiveIntegerField(default=0)
+    grade_points = models.FloatField(default=0)
+    gpa = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('student', 'year', 'semester')
+
+    def __str__(self):
+        return f"{self.student} ({self.year}/{self.semester}): {self.confirmed_units} units"
+
+class ImportCheckpoint(models.Model):
+    """
+    Progress of one `import_registry` run over one source file (identified by content digest).
+    Updated in the same transaction as each chunk, so a rerun resumes after the last committed chunk.
+    """
+    KIND_CHOICES = [
+        ('students', 'Students'),
+        ('courses', 'Courses'),
+    ]
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    digest = models.CharField(max_length=64)
+    source = models.CharField(max_length=500, blank=True)
+    chunk_size = models.PositiveIntegerField()
+    chunks_done = models.PositiveIntegerField(default=0)
+    rows_imported = models.PositiveIntegerField(default=0)
+    rows_rejected = models.PositiveIntegerField(default=0)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('kind', 'digest')
+
+    def __str__(self):
+        return f"{self.kind} {self.source} ({self.chunks_done} chunks)"
+
+class Waitlist(models.Model):
+    """
+    One student queued for a full course section. Served first come, first served (by id)
+    per (course, year, semester) when a seat frees up; see core.waitlist.
+    """
+    STATUS_CHOICES = [
+        ('WAITING', 'Waiting'),
+        ('PROMOTED', 'Promoted'),
+        ('SKIPPED', 'Skipped'),  # no longer eligible when its turn came (credits, clash, prerequisite)
+        ('CANCELLED', 'Cancelled'),
+    ]
+    student = models.ForeignKey(Student, related_name='waitlist_entries', on_delete=models.CASCADE)
+    course = models.ForeignKey(Course, related_name='waitlist_entries', on_delete=models.CASCADE)
+    year = models.PositiveIntegerField()
+    semester = models.CharField(max_length=20)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='WAITING')
+    note = models.CharField(max_length=300, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # at most one live place per student and section
+            models.UniqueConstraint(fields=['student', 'course', 'year', 'semester'],
+                                    condition=models.Q(status='WAITING'), name='waitlist_one_waiting'),
+        ]
+        indexes = [
+            # head of the queue: WHERE course/year/semester/status ORDER BY id
+            models.Index(fields=['course', 'year', 'semester', 'status', 'id'], name='waitlist_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student} -> {self.course} ({self.year}/{self.semester}) {self.status}"
+
+class Job(models.Model):
+    """
+    A unit of background work for `manage.py run_workers` (see core.tasks).
+    `key` makes enqueueing idempotent: a second enqueue with the same key returns the first job.
+    """
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+    name = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict, blank=True)
+    key = models.CharField(max_length=200, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='QUEUED')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField()
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # the claim query: WHERE status = 'QUEUED' AND run_after <= now ORDER BY run_after, id
+            models.Index(fields=['status', 'run_after', 'id'], name='job_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name}#{self.pk} {self.status}"
@@ -0,0 +1,186 @@
+from collections import defaultdict
+
+from . import terms
+from .models import Course
+
+
+def _bit_indexes(bits):
+    # positions of the set bits, lowest first; cost grows with the number of set bits only
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class PrerequisiteGraph:
+    """
+    The Course.prerequisites graph with its transitive closure, as bitsets over a dense course index.
+
+    Built from the M2M through table in one query and cached through core.refdata (the version
+    is bumped whenever prerequisites change), so checks against it cost no queries.
+
+    direct[i] / closure[i]   bitmask of the direct / transitive prerequisites of course index i
+    order                    course ids, every course after all of its prerequisites (cycles excepted)
+    cycles                   lists of course ids that (indirectly) require themselves
+    """
+
+    def __init__(self, course_ids, edges):
+        self.ids = sorted(set(course_ids) | {a for a, _ in edges} | {b for _, b in edges})
+        self.index = {cid: i for i, cid in enumerate(self.ids)}
+        self.direct = [0] * len(self.ids)
+        for course_id, pre_id in edges:
+            self.direct[self.index[course_id]] |= 1 << self.index[pre_id]
+        self.order, self.cycles = self._topological_order()
+        self.closure = self._closure()
+        cyclic = set()
+        for cycle in self.cycles:
+            cyclic.update(self.index[c] for c in cycle)
+        self.cyclic_mask = self.mask(self.ids[i] for i in cyclic)
+
+    @classmethod
+    def load(cls):
+        through = Course.prerequisites.through
+        edges = list(through.objects.values_list('from_course_id', 'to_course_id'))
+        return cls(Course.objects.values_list('pk', flat=True), edges)
+
+    def _prereq_indexes(self, i):
+        return _bit_indexes(self.direct[i])
+
+    def _topological_order(self):
+        """
+        Kahn's algorithm over prerequisite -> course edges; what is left over sits on or behind a cycle.
+        """
+        n = len(self.ids)
+        dependants = defaultdict(list)
+        pending = [0] * n
+        for i in range(n):
+            for j in self._prereq_indexes(i):
+                dependants[j].append(i)
+                pending[i] += 1
+        ready = [i for i in range(n) if not pending[i]]
+        order = []
+        while ready:
+            j = ready.pop()
+            order.append(j)
+            for i in dependants[j]:
+                pending[i] -= 1
+                if not pending[i]:
+                    ready.append(i)
+        leftover = {i for i in range(n) if pending[i]}
+        return [self.ids[i] for i in order], self._find_cycles(leftover)
+
+    def _find_cycles(self, nodes):
+        """
+        Strongly connected components (Tarjan, iterative) among the leftover nodes that really loop.
+        """
+        index_of, low, stack, on_stack, cycles = {}, {}, [], set(), []
+        counter = 0
+        for root in sorted(nodes):
+            if root in index_of:
+                continue
+            work = [(root, iter([j for j in self._prereq_indexes(root) if j in nodes]))]
+            index_of[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, children = work[-1]
+                advanced = False
+                for child in children:
+                    if child not in index_of:
+                        index_of[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter([j for j in self._prereq_indexes(child) if j in nodes])))
+                        advanced = True
+                        break
+                    if child in on_stack:
+                        low[node] = min(low[node], index_of[child])
+                if advanced:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index_of[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or self.direct[node] >> node & 1:
+                        cycles.append(sorted(self.ids[i] for i in component))
+        return cycles
+
+    def _closure(self):
+        closure = list(self.direct)
+        ordered = [self.index[c] for c in self.order]
+        for i in ordered:
+            for j in self._prereq_indexes(i):
+                closure[i] |= closure[j]
+        # nodes on or behind a cycle: iterate to a fixed point (rare, small)
+        done = set(ordered)
+        rest = [i for i in range(len(self.ids)) if i not in done]
+        changed = True
+        while changed:
+            changed = False
+            for i in rest:
+                merged = closure[i]
+                for j in self._prereq_indexes(i):
+                    merged |= closure[j]
+                if merged != closure[i]:
+                    closure[i] = merged
+                    changed = True
+        return closure
+
+    def mask(self, course_ids):
+        bits = 0
+        for cid in course_ids:
+            i = self.index.get(cid)
+            if i is not None:
+                bits |= 1 << i
+        return bits
+
+    def ids_of(self, bits):
+        return [self.ids[i] for i in _bit_indexes(bits)]
+
+    def prerequisites(self, course_id, transitive=False):
+        i = self.index.get(course_id)
+        if i is None:
+            return []
+        return self.ids_of((self.closure if transitive else self.direct)[i])
+
+    def eligibility(self, passed_mask, course_ids=None):
+        """
+        {course_id: (eligible, missing_direct_ids, missing_chain_ids)} in one pass over the catalogue.
+        A course is eligible when every direct prerequisite is passed; missing_chain lists everything
+        still to pass along the whole chain. Courses on a prerequisite cycle are never eligible.
+        """
+        out = {}
+        for cid in (self.ids if course_ids is None else course_ids):
+            i = self.index.get(cid)
+            if i is None:
+                out[cid] = (True, [], [])
+                continue
+            missing = self.direct[i] & ~passed_mask
+            chain = self.closure[i] & ~passed_mask
+            on_cycle = bool(self.cyclic_mask >> i & 1)
+            out[cid] = (not missing and not on_cycle, self.ids_of(missing), self.ids_of(chain))
+        return out
+
+
+def passed_mask(graph, student):
+    """
+    Bitset of the courses the student has passed (one query).
+    """
+    return graph.mask(terms.passed_course_ids(student))
+
+
+def eligibility_for(student, graph, course_ids=None):
+    """
+    graph.eligibility() for a student (None = nothing passed); pass refdata.prerequisite_graph().
+    """
+    return graph.eligibility(passed_mask(graph, student) if student else 0, course_ids)
@@ -0,0 +1,215 @@
+"""
+Publish/subscribe fan-out for live updates (see core.seatfeed).
+
+One publish reaches every subscriber of the channel, so a database change is pushed once
+instead of each client polling for it. The broker is chosen by settings.PUBSUB_BROKER:
+
+  core.pubsub.InProcessBroker   (default) subscribers in this process only; right for a
+                                single server process, and the stand-in used in development
+  core.pubsub.RedisBroker       Redis PUBLISH/SUBSCRIBE, for several processes or hosts;
+                                needs the optional `redis` package and PUBSUB_OPTIONS={'url': ...}
+
+Messages are JSON-serialisable dicts. Subscriptions work from sync code (start/get/close)
+and from async code (astart/aget/aclose); messages published before start() may be missed.
+An in-process subscriber that falls behind loses its oldest pending messages.
+"""
+import asyncio
+import json
+import queue
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# messages kept per subscriber before the oldest are dropped
+MAX_PENDING = 256
+
+
+class Subscription:
+    """
+    One subscriber's queue. Created inside a running event loop it is fed through that loop
+    (use aget); otherwise through a thread-safe queue (use get).
+    """
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.dropped = 0
+        try:
+            self.loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.loop = None
+        self.queue = asyncio.Queue(MAX_PENDING) if self.loop else queue.Queue(MAX_PENDING)
+
+    def start(self):
+        # already receiving since subscribe(); here for the Redis subscription's sake
+        return self
+
+    async def astart(self):
+        return self
+
+    def deliver(self, message):
+        # called from the publishing thread
+        if self.loop is None:
+            self._put(message)
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # the subscriber's loop is gone
+            self.close()
+
+    def _put(self, message):
+        while True:
+            try:
+                self.queue.put_nowait(message)
+                return
+            except (asyncio.QueueFull, queue.Full):
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except (asyncio.QueueEmpty, queue.Empty):
+                    pass
+
+    def get(self, timeout=None):
+        """
+        Next message, or None after `timeout` seconds without one.
+        """
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    async def aget(self, timeout=None):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    async def aclose(self):
+        self.close()
+
+
+class InProcessBroker:
+    def __init__(self, **options):
+        self.lock = threading.Lock()
+        self.channels = defaultdict(set)
+
+    def publish(self, channel, message):
+        """
+        Deliver message to every current subscriber of channel; returns how many there were.
+        """
+        with self.lock:
+            subscribers = list(self.channels.get(channel, ()))
+        for sub in subscribers:
+            sub.deliver(message)
+        return len(subscribers)
+
+    def subscribe(self, channel):
+        sub = Subscription(self, channel)
+        with self.lock:
+            self.channels[channel].add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self.lock:
+            subscribers = self.channels.get(sub.channel)
+            if subscribers is not None:
+                subscribers.discard(sub)
+                if not subscribers:
+                    del self.channels[sub.channel]
+
+    def subscriber_count(self, channel):
+        with self.lock:
+            return len(self.channels.get(channel, ()))
+
+
+class RedisSubscription:
+    """
+    A Redis pubsub connection; call start() (sync) or astart() (async) before reading.
+    """
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.pubsub = None
+
+    def start(self):
+        if self.pubsub is None:
+            self.pubsub = self.broker.client.pubsub(ignore_subscribe_messages=True)
+            self.pubsub.subscribe(self.channel)
+        return self
+
+    async def astart(self):
+        if self.pubsub is None:
+            self.pubsub = self.broker.async_client().pubsub(ignore_subscribe_messages=True)
+            await self.pubsub.subscribe(self.channel)
+        return self
+
+    def get(self, timeout=None):
+        return self._decode(self.start().pubsub.get_message(timeout=timeout or 0))
+
+    async def aget(self, timeout=None):
+        await self.astart()
+        return self._decode(await self.pubsub.get_message(timeout=timeout or 0))
+
+    @staticmethod
+    def _decode(raw):
+        if not raw or raw.get('type') != 'message':
+            return None
+        return json.loads(raw['data'])
+
+    def close(self):
+        if self.pubsub is not None:
+            self.pubsub.close()
+
+    async def aclose(self):
+        if self.pubsub is not None:
+            await self.pubsub.aclose()
+
+
+class RedisBroker:
+    def __init__(self, url='redis://localhost:6379/0', **options):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError('RedisBroker needs the redis package: pip install redis')
+        self.url = url
+        self.client = redis.Redis.from_url(url)
+        self._async_clients = {}
+
+    def async_client(self):
+        # redis.asyncio clients are bound to the event loop that created them
+        import redis.asyncio
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = redis.asyncio.Redis.from_url(self.url)
+        return client
+
+    def publish(self, channel, message):
+        return self.client.publish(channel, json.dumps(message))
+
+    def subscribe(self, channel):
+        return RedisSubscription(self, channel)
+
+    def unsubscribe(self, sub):
+        sub.close()
+
+
+_broker = None
+
+
+def broker():
+    """
+    The process-wide broker configured by PUBSUB_BROKER / PUBSUB_OPTIONS.
+    """
+    global _broker
+    if _broker is None:
+        path = getattr(settings, 'PUBSUB_BROKER', 'core.pubsub.InProcessBroker')
+        _broker = import_string(path)(**getattr(settings, 'PUBSUB_OPTIONS', {}))
+    return _broker
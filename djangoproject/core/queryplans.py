@@ -0,0 +1,86 @@
+"""
+EXPLAIN the hot queries and flag full table scans, so a dropped or mis-declared index shows
+up as a failing check (`manage.py check_query_plans`, and CoreQueryPlanTests) instead of as a
+slow page under load.
+
+Each hot query is built with placeholder values: the plan, not the data, is what is checked.
+SQLite plans are read from EXPLAIN QUERY PLAN ("SCAN core_x" without an index is a full scan).
+On PostgreSQL sequential scans are disabled for the EXPLAIN, so "Seq Scan" means no usable
+index exists (a small table would otherwise always be scanned).
+"""
+import re
+
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from . import terms
+from .catalogue import CourseSearch
+from .models import (ArchivedRegistration, Course, Job, Registration, SeatCounter, Student, StudentTermSummary,
+                     Waitlist)
+
+YEAR, SEMESTER = 2025, '1'
+
+# name -> callable returning the queryset; mirrors the filters the code actually runs
+HOT_QUERIES = {
+    'registration_student_term': lambda: Registration.objects.filter(
+        student_id=1, year=YEAR, semester=SEMESTER, status='CONFIRMED').select_related('course'),
+    'registration_section_confirmed': lambda: Registration.objects.filter(
+        course_id=1, year=YEAR, semester=SEMESTER, status='CONFIRMED'),
+    'registration_section_counts': lambda: Registration.objects.filter(
+        course_id__in=[1, 2, 3], year=YEAR, semester=SEMESTER, status='CONFIRMED')
+        .values('course_id').annotate(n=Count('id')),
+    'registration_passed': lambda: terms.passed_course_ids(1),
+    'registration_student_course': lambda: Registration.objects.filter(
+        student_id=1, course_id=1, year=YEAR, semester=SEMESTER),
+    'registration_term_confirmed': lambda: Registration.objects.filter(
+        year=YEAR, semester=SEMESTER, status='CONFIRMED').values_list('course_id', 'student_id'),
+    'registration_archivable': lambda: terms.archivable(YEAR, SEMESTER).order_by('id')[:500],
+    'archived_student_history': lambda: ArchivedRegistration.objects.filter(student_id=1).select_related('course'),
+    'student_by_student_id': lambda: Student.objects.filter(student_id='6613200000'),
+    'student_by_user': lambda: Student.objects.filter(user_id=1).select_related('department__faculty'),
+    'course_by_code': lambda: Course.objects.filter(code='CS101'),
+    'course_code_prefix': lambda: CourseSearch({'code': 'cs1'}).queryset(),
+    'seat_counter': lambda: SeatCounter.objects.filter(course_id=1, year=YEAR, semester=SEMESTER),
+    'term_summary': lambda: StudentTermSummary.objects.filter(student_id=1, year=YEAR, semester=SEMESTER),
+    'waitlist_head': lambda: Waitlist.objects.filter(
+        course_id=1, year=YEAR, semester=SEMESTER, status='WAITING').order_by('id')[:1],
+    'job_claim': lambda: Job.objects.filter(
+        status='QUEUED', run_after__lte=timezone.now()).order_by('run_after', 'id')[:5],
+}
+
+_SQLITE_SCAN = re.compile(r'\bSCAN (\w+)\b')
+_POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+def explain(queryset):
+    """
+    The plan of a queryset as text.
+    """
+    if connection.vendor == 'postgresql':
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+    return queryset.explain()
+
+
+def full_scans(plan):
+    """
+    Tables a plan reads in full.
+    """
+    pattern = _POSTGRES_SCAN if connection.vendor == 'postgresql' else _SQLITE_SCAN
+    return sorted(set(pattern.findall(plan)))
+
+
+def check(names=None):
+    """
+    [(name, plan, scanned_tables)] for every hot query (or those named).
+    """
+    results = []
+    for name, build in HOT_QUERIES.items():
+        if names and name not in names:
+            continue
+        plan = explain(build())
+        results.append((name, plan, full_scans(plan)))
+    return results
@@ -0,0 +1,190 @@
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Faculty, Department, Course
+from .prereqs import PrerequisiteGraph
+
+# Read-only snapshot records handed to views/templates (attribute access like model instances)
+FacultyRef = namedtuple('FacultyRef', 'id pk code name')
+DepartmentRef = namedtuple('DepartmentRef', 'id pk code name faculty_id faculty')
+CourseRef = namedtuple('CourseRef', 'id pk code name units status capacity instructor schedule department_id department')
+
+VERSION_KEY = 'refdata:version'
+# wall-clock time of the last invalidate(), for Last-Modified headers (core.httpcache)
+CHANGED_KEY = 'refdata:changed'
+
+_stats_lock = threading.Lock()
+_stats = {}
+# name -> (version, value): skips unpickling from the cache backend when nothing changed
+_memo = {}
+
+
+def _cache():
+    return caches[getattr(settings, 'REFDATA_CACHE', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'REFDATA_TIMEOUT', 60 * 60 * 24)
+
+
+def _count(name, outcome):
+    with _stats_lock:
+        bucket = _stats.setdefault(name, {'hits': 0, 'misses': 0})
+        bucket[outcome] += 1
+
+
+def stats():
+    """
+    Per-snapshot hit/miss counters of this process, e.g. {'faculties': {'hits': 10, 'misses': 1}}.
+    """
+    with _stats_lock:
+        return {name: dict(bucket) for name, bucket in _stats.items()}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+    _memo.clear()
+
+
+def version():
+    """
+    Current reference-data version. Starts at a millisecond timestamp so a cache that lost
+    only the version key can never serve snapshots from an older generation.
+    """
+    cache = _cache()
+    current = cache.get(VERSION_KEY)
+    if current is None:
+        cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        current = cache.get(VERSION_KEY)
+    return current
+
+
+def changed_at():
+    """
+    Unix time of the last change to the reference data (as far as this cache knows).
+    """
+    cache = _cache()
+    current = cache.get(CHANGED_KEY)
+    if current is None:
+        cache.add(CHANGED_KEY, int(time.time()), timeout=None)
+        current = cache.get(CHANGED_KEY)
+    return current
+
+
+def invalidate():
+    """
+    Move to a new version; old snapshots are never read again and simply expire.
+    """
+    cache = _cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, int(time.time() * 1000), timeout=None)
+    cache.set(CHANGED_KEY, int(time.time()), timeout=None)
+
+
+def _load_faculties():
+    return tuple(FacultyRef(f.id, f.id, f.code, f.name) for f in Faculty.objects.order_by('id'))
+
+
+def _faculty_map():
+    return {f.id: f for f in faculties()}
+
+
+def _load_departments():
+    fac = _faculty_map()
+    return tuple(
+        DepartmentRef(d.id, d.id, d.code, d.name, d.faculty_id, fac.get(d.faculty_id))
+        for d in Department.objects.order_by('id')
+    )
+
+
+def _load_courses():
+    depts = {d.id: d for d in departments()}
+    rows = Course.objects.order_by('code', 'id').values_list(
+        'id', 'code', 'name', 'units', 'status', 'capacity', 'instructor', 'schedule', 'department_id'
+    )
+    return tuple(
+        CourseRef(cid, cid, code, name, units, status, capacity, instructor, schedule, dept_id, depts.get(dept_id))
+        for cid, code, name, units, status, capacity, instructor, schedule, dept_id in rows
+    )
+
+
+def _load_department_choices():
+    return tuple(
+        {'id': d.id, 'code': d.code, 'name': d.name, 'faculty_id': d.faculty_id,
+         'faculty_name': d.faculty.name if d.faculty else None}
+        for d in departments()
+    )
+
+
+LOADERS = {
+    'faculties': _load_faculties,
+    'departments': _load_departments,
+    'courses': _load_courses,
+    'department_choices': _load_department_choices,
+    'prerequisite_graph': PrerequisiteGraph.load,
+}
+
+
+def snapshot(name):
+    """
+    Return the cached snapshot `name` for the current version, loading it on a miss.
+    """
+    current = version()
+    memo = _memo.get(name)
+    if memo is not None and memo[0] == current:
+        _count(name, 'hits')
+        return memo[1]
+
+    cache = _cache()
+    key = f'refdata:{name}:v{current}'
+    value = cache.get(key)
+    if value is not None:
+        _count(name, 'hits')
+    else:
+        _count(name, 'misses')
+        value = LOADERS[name]()
+        cache.set(key, value, timeout=_timeout())
+    _memo[name] = (current, value)
+    return value
+
+
+def faculties():
+    return snapshot('faculties')
+
+
+def departments():
+    return snapshot('departments')
+
+
+def courses():
+    return snapshot('courses')
+
+
+def department_choices():
+    """
+    Departments as plain dicts (id, code, name, faculty_id, faculty_name) for JS filtering in forms.
+    """
+    return snapshot('department_choices')
+
+
+def prerequisite_graph():
+    """
+    core.prereqs.PrerequisiteGraph of the whole catalogue (closure, topological order, cycles).
+    """
+    return snapshot('prerequisite_graph')
+
+
+def warm():
+    """
+    Load every snapshot into the cache (run at startup so the first requests do not pay for it).
+    """
+    _memo.clear()
+    for name in LOADERS:
+        snapshot(name)
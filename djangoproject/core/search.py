@@ -0,0 +1,190 @@
+import unicodedata
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Course, Student, SearchGram
+
+# Bigrams: short enough for two-character Thai queries, selective enough once intersected
+GRAM_SIZE = 2
+# Upper bound on posting lists probed per query, and on those used as filters
+MAX_QUERY_GRAMS = 6
+MAX_FILTER_GRAMS = 3
+# A posting list this long is "dense": filtering on it costs more than scanning
+DENSE_POSTINGS = 2000
+
+COURSE = 'C'
+STUDENT = 'S'
+
+# kind -> (model, indexed fields)
+INDEXED = {
+    COURSE: (Course, ('code', 'name', 'instructor')),
+    STUDENT: (Student, ('student_id', 'first_name', 'last_name')),
+}
+
+
+def normalize(text):
+    """
+    Casefold + NFC so that the same Thai text typed with different combining order matches.
+    """
+    return unicodedata.normalize('NFC', text or '').casefold()
+
+
+def grams(text, n=GRAM_SIZE):
+    """
+    Set of character n-grams of every whitespace-separated word in text.
+    Words shorter than n are indexed whole.
+    """
+    out = set()
+    for word in normalize(text).split():
+        if len(word) <= n:
+            out.add(word)
+        else:
+            out.update(word[i:i + n] for i in range(len(word) - n + 1))
+    return out
+
+
+def document_grams(kind, obj):
+    _, fields = INDEXED[kind]
+    out = set()
+    for field in fields:
+        out |= grams(getattr(obj, field, ''))
+    return out
+
+
+def index_object(kind, obj):
+    """
+    Replace the index rows of one object (called from post_save signals).
+    """
+    with transaction.atomic():
+        SearchGram.objects.filter(kind=kind, object_id=obj.pk).delete()
+        SearchGram.objects.bulk_create(
+            [SearchGram(kind=kind, object_id=obj.pk, gram=g) for g in document_grams(kind, obj)],
+            ignore_conflicts=True,
+        )
+
+
+def index_objects(kind, objs, batch_size=2000):
+    """
+    Replace the index rows of many objects at once (for bulk_create/bulk_update, which send no signals).
+    """
+    objs = list(objs)
+    if not objs:
+        return
+    with transaction.atomic():
+        SearchGram.objects.filter(kind=kind, object_id__in=[o.pk for o in objs]).delete()
+        SearchGram.objects.bulk_create(
+            [SearchGram(kind=kind, object_id=o.pk, gram=g) for o in objs for g in document_grams(kind, o)],
+            batch_size=batch_size, ignore_conflicts=True,
+        )
+
+
+def remove_object(kind, pk):
+    SearchGram.objects.filter(kind=kind, object_id=pk).delete()
+
+
+def rebuild(kinds=None, batch_size=2000):
+    """
+    Rebuild the index from scratch in batches. Returns {kind: rows written}.
+    """
+    written = {}
+    for kind in kinds or INDEXED:
+        model, fields = INDEXED[kind]
+        count = 0
+        with transaction.atomic():
+            SearchGram.objects.filter(kind=kind).delete()
+            batch = []
+            for row in model.objects.values_list('pk', *fields).iterator(chunk_size=batch_size):
+                pk, values = row[0], row[1:]
+                doc = set()
+                for v in values:
+                    doc |= grams(v)
+                batch.extend(SearchGram(kind=kind, object_id=pk, gram=g) for g in doc)
+                if len(batch) >= batch_size:
+                    SearchGram.objects.bulk_create(batch, ignore_conflicts=True)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                SearchGram.objects.bulk_create(batch, ignore_conflicts=True)
+                count += len(batch)
+        written[kind] = count
+    return written
+
+
+def query_grams(query, limit=MAX_QUERY_GRAMS):
+    """
+    Grams used to probe the index for a query: at most `limit` of them, spread evenly over
+    each word so long queries do not read more posting lists than needed. Words shorter than
+    a gram have no postings of their own (they only occur inside longer grams) and are left
+    to the substring check.
+    """
+    picked = []
+    for word in normalize(query).split():
+        if len(word) < GRAM_SIZE:
+            continue
+        word_grams = sorted(grams(word), key=word.find)
+        picked.append(word_grams)
+    per_word = max(limit // max(len(picked), 1), 1)
+    out = []
+    for word_grams in picked:
+        if len(word_grams) <= per_word:
+            out.extend(word_grams)
+        else:
+            step = (len(word_grams) - 1) / (per_word - 1) if per_word > 1 else 0
+            out.extend(word_grams[round(i * step)] for i in range(per_word))
+    return list(dict.fromkeys(out))
+
+
+def _bounded_count(kind, gram, cap):
+    return SearchGram.objects.filter(kind=kind, gram=gram).values('id')[:cap].count()
+
+
+def narrow_to_candidates(kind, queryset, query):
+    """
+    Restrict queryset to objects whose index holds the query's most selective grams.
+
+    Each probe gram's posting list is sized with a bounded COUNT (at most DENSE_POSTINGS
+    index entries read). A gram with no postings means no match at all. Only the rarest
+    sparse grams are used as `pk IN (posting list)` filters; if every gram is dense the
+    query matches much of the table anyway and the caller's ordered scan with LIMIT stops
+    early, so no index filter is added. The result is a superset of the real matches.
+    A query with no word as long as a gram (a single Thai character) is not narrowed.
+    """
+    sizes = {g: _bounded_count(kind, g, DENSE_POSTINGS) for g in query_grams(query)}
+    if any(n == 0 for n in sizes.values()):
+        return queryset.none()
+    sparse = sorted((g for g, n in sizes.items() if n < DENSE_POSTINGS), key=sizes.get)[:MAX_FILTER_GRAMS]
+    for g in sparse:
+        queryset = queryset.filter(pk__in=SearchGram.objects.filter(kind=kind, gram=g).values('object_id'))
+    return queryset
+
+
+def _verify_q(kind, query):
+    """
+    Exact substring check for each query word, applied only to the (small) candidate set.
+    """
+    _, fields = INDEXED[kind]
+    cond = Q()
+    for word in query.split():
+        word_q = Q()
+        for field in fields:
+            word_q |= Q(**{f'{field}__icontains': word})
+        cond &= word_q
+    return cond
+
+
+def filter_queryset(kind, queryset, query):
+    """
+    Narrow a Course/Student queryset to objects matching query via the n-gram index.
+    """
+    if not grams(query):
+        return queryset
+    return narrow_to_candidates(kind, queryset, query).filter(_verify_q(kind, query))
+
+
+def search_courses(query, limit=20):
+    return list(filter_queryset(COURSE, Course.objects.select_related('department'), query).order_by('code', 'id')[:limit])
+
+
+def search_students(query, limit=20):
+    return list(filter_queryset(STUDENT, Student.objects.select_related('department'), query).order_by('student_id')[:limit])
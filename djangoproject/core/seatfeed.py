@@ -0,0 +1,91 @@
+"""
+Live seat availability: Registration changes are published (after commit) on a per-term
+channel of core.pubsub, and the server-sent-events views stream them to the registration
+page, filtered to the course ids each page shows.
+
+Settings:
+  SEAT_FEED_HEARTBEAT     seconds between keep-alive comments (default 15)
+  SEAT_FEED_MAX_SECONDS   a stream ends after this long; EventSource reconnects and gets a
+                          fresh snapshot (default 300)
+"""
+import json
+import time
+
+from django.conf import settings
+
+from . import pubsub
+from .seats import aavailability, availability
+
+# EventSource reconnect delay sent to the browser (ms)
+RETRY_MS = 3000
+# sections one stream may follow (the registration page opens a single stream)
+MAX_IDS = 500
+
+
+def channel(year, semester):
+    return f'seats:{year}:{semester}'
+
+
+def publish_change(course_id, year, semester):
+    """
+    Push the section's current availability to the term's subscribers (one query).
+    Registration signals call this through transaction.on_commit.
+    """
+    rows = availability([course_id], year, semester)
+    if course_id in rows:
+        pubsub.broker().publish(channel(year, str(semester)), {'course': course_id, **rows[course_id]})
+
+
+def sse(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+def _snapshot(rows):
+    return {str(pk): row for pk, row in rows.items()}
+
+
+def _limits():
+    return (getattr(settings, 'SEAT_FEED_HEARTBEAT', 15), getattr(settings, 'SEAT_FEED_MAX_SECONDS', 300))
+
+
+def stream(course_ids, year, semester):
+    """
+    Server-sent events for a sync (WSGI) view: a snapshot of the requested sections, then one
+    `seats` event per change to any of them. Holds a worker thread for the stream's lifetime.
+    """
+    heartbeat, max_seconds = _limits()
+    wanted = set(course_ids)
+    sub = pubsub.broker().subscribe(channel(year, semester)).start()
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        yield sse('snapshot', _snapshot(availability(course_ids, year, semester)))
+        deadline = time.monotonic() + max_seconds
+        while time.monotonic() < deadline:
+            message = sub.get(timeout=min(heartbeat, max(deadline - time.monotonic(), 0)))
+            if message is None:
+                yield ': keep-alive\n\n'
+            elif message.get('course') in wanted:
+                yield sse('seats', message)
+    finally:
+        sub.close()
+
+
+async def astream(course_ids, year, semester):
+    """
+    stream() for async (ASGI) views: waiting clients cost no thread.
+    """
+    heartbeat, max_seconds = _limits()
+    wanted = set(course_ids)
+    sub = await pubsub.broker().subscribe(channel(year, semester)).astart()
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        yield sse('snapshot', _snapshot(await aavailability(course_ids, year, semester)))
+        deadline = time.monotonic() + max_seconds
+        while time.monotonic() < deadline:
+            message = await sub.aget(timeout=min(heartbeat, max(deadline - time.monotonic(), 0)))
+            if message is None:
+                yield ': keep-alive\n\n'
+            elif message.get('course') in wanted:
+                yield sse('seats', message)
+    finally:
+        await sub.aclose()
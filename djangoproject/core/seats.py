@@ -0,0 +1,191 @@
+import random
+import time
+
+from django.db import transaction, connection
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.utils import OperationalError
+from django.utils import timezone
+
+from .models import ArchivedRegistration, Course, Registration, SeatCounter
+
+# How often a reservation is retried when SQLite reports "database is locked"
+LOCK_RETRIES = 8
+LOCK_BACKOFF = 0.01  # seconds, doubled on every retry (plus jitter)
+
+
+def _is_lock_error(exc):
+    msg = str(exc).lower()
+    return 'locked' in msg or 'deadlock' in msg or 'could not serialize' in msg
+
+
+def _retry_on_lock(func):
+    """
+    Run func(), retrying with exponential backoff when the database reports lock
+    contention. Only retries when we own the transaction (not nested in an outer atomic()).
+    """
+    if connection.in_atomic_block:
+        return func()
+    delay = LOCK_BACKOFF
+    for attempt in range(LOCK_RETRIES):
+        try:
+            return func()
+        except OperationalError as exc:
+            if not _is_lock_error(exc) or attempt == LOCK_RETRIES - 1:
+                raise
+            time.sleep(delay + random.random() * delay)
+            delay *= 2
+
+
+def get_counter(course, year, semester):
+    """
+    Return the SeatCounter row for a course section, creating it on first use and
+    seeding `taken` from the CONFIRMED registrations that already exist.
+    """
+    counter = SeatCounter.objects.filter(course=course, year=year, semester=str(semester)).first()
+    if counter is not None:
+        return counter
+    confirmed = Registration.objects.filter(course=course, year=year, semester=str(semester), status='CONFIRMED').count()
+    counter, _ = SeatCounter.objects.get_or_create(
+        course=course, year=year, semester=str(semester), defaults={'taken': confirmed}
+    )
+    return counter
+
+
+def reserve_seat(student, course, year, semester):
+    """
+    Atomically take one seat in `course` for the term and confirm the student's registration.
+
+    The seat is taken with a single guarded UPDATE (taken < capacity), so two concurrent
+    requests can never both get the last seat. Counter and Registration change in the same
+    transaction: if creating the Registration fails, the seat is given back by the rollback.
+
+    Returns the CONFIRMED Registration, or None when the section is full.
+    An already confirmed registration is returned as-is without taking another seat.
+    """
+    semester = str(semester)
+
+    def _reserve():
+        with transaction.atomic():
+            counter = get_counter(course, year, semester)
+            existing = (Registration.objects.select_for_update()
+                        .filter(student=student, course=course, year=year, semester=semester).first())
+            if existing is not None and existing.status == 'CONFIRMED':
+                return existing
+
+            got_seat = SeatCounter.objects.filter(pk=counter.pk, taken__lt=course.capacity).update(
+                taken=F('taken') + 1, updated_at=timezone.now()
+            )
+            if not got_seat:
+                return None
+
+            if existing is not None:
+                existing.status = 'CONFIRMED'
+                existing.units = course.units
+                existing._seat_reserved = True
+                existing.save(update_fields=['status', 'units'])
+                return existing
+            reg = Registration(student=student, course=course, year=year, semester=semester,
+                               units=course.units, status='CONFIRMED')
+            reg._seat_reserved = True
+            reg.save()
+            return reg
+
+    return _retry_on_lock(_reserve)
+
+
+def _availability_queryset(course_ids, year, semester):
+    taken = SeatCounter.objects.filter(course=OuterRef('pk'), year=year, semester=str(semester)).values('taken')[:1]
+    return (Course.objects.filter(pk__in=course_ids)
+            .annotate(seats_taken=Coalesce(Subquery(taken), 0))
+            .values_list('pk', 'code', 'capacity', 'seats_taken'))
+
+
+def _availability_rows(rows):
+    return {
+        pk: {'code': code, 'capacity': capacity, 'taken': taken, 'left': max(capacity - taken, 0)}
+        for pk, code, capacity, taken in rows
+    }
+
+
+def availability(course_ids, year, semester):
+    """
+    {course_id: {'code', 'capacity', 'taken', 'left'}} for the term, from the seat counters (one query).
+    Unknown ids are left out.
+    """
+    return _availability_rows(_availability_queryset(course_ids, year, semester))
+
+
+async def aavailability(course_ids, year, semester):
+    """
+    availability() for async views, through the async ORM.
+    """
+    return _availability_rows([row async for row in _availability_queryset(course_ids, year, semester)])
+
+
+def release_seat(course_id, year, semester):
+    """
+    Give one seat back (never below zero). Called when a CONFIRMED registration is removed.
+    """
+    return SeatCounter.objects.filter(
+        course_id=course_id, year=year, semester=str(semester), taken__gt=0
+    ).update(taken=F('taken') - 1, updated_at=timezone.now())
+
+
+def take_seat_unchecked(course_id, year, semester):
+    """
+    Count a CONFIRMED registration created outside reserve_seat (e.g. from the admin).
+    No capacity guard: staff may deliberately overbook a section.
+    """
+    return SeatCounter.objects.filter(
+        course_id=course_id, year=year, semester=str(semester)
+    ).update(taken=F('taken') + 1, updated_at=timezone.now())
+
+
+def reconcile_seats(year=None, semester=None, course_ids=None, dry_run=False):
+    """
+    Recompute every SeatCounter from the real CONFIRMED Registration rows (one grouped query,
+    plus one over ArchivedRegistration: archived rows still hold their seat). Counters are
+    created for sections that have confirmed registrations but no counter yet.
+
+    Returns a list of (course_id, year, semester, old_taken, new_taken) for rows that drifted.
+    """
+    filters = {}
+    if year is not None:
+        filters['year'] = year
+    if semester is not None:
+        filters['semester'] = str(semester)
+    if course_ids is not None:
+        filters['course_id__in'] = course_ids
+    counters = SeatCounter.objects.filter(**filters)
+
+    actual = {}
+    for model in (Registration, ArchivedRegistration):
+        rows = (model.objects.filter(status='CONFIRMED', **filters)
+                .values('course_id', 'year', 'semester').annotate(n=Count('id')))
+        for row in rows:
+            key = (row['course_id'], row['year'], row['semester'])
+            actual[key] = actual.get(key, 0) + row['n']
+    existing = {(c.course_id, c.year, c.semester): c for c in counters}
+
+    drift = []
+    to_update = []
+    to_create = []
+    for key, counter in existing.items():
+        real = actual.get(key, 0)
+        if counter.taken != real:
+            drift.append((key[0], key[1], key[2], counter.taken, real))
+            counter.taken = real
+            to_update.append(counter)
+    for key, real in actual.items():
+        if key not in existing:
+            drift.append((key[0], key[1], key[2], None, real))
+            to_create.append(SeatCounter(course_id=key[0], year=key[1], semester=key[2], taken=real))
+
+    if not dry_run:
+        with transaction.atomic():
+            if to_update:
+                SeatCounter.objects.bulk_update(to_update, ['taken'], batch_size=500)
+            if to_create:
+                SeatCounter.objects.bulk_create(to_create, batch_size=500, ignore_conflicts=True)
+    return drift
@@ -0,0 +1,120 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Faculty, Department, Course, Registration, Student
+from . import accounts, httpcache, refdata, seatfeed, seats, search, summaries, terms, timetable, waitlist
+
+
+@receiver(pre_save, sender=Registration)
+def registration_saving(sender, instance, **kwargs):
+    # remember the term the row belonged to, in case this save moves it to another student/term
+    instance._summary_old_key = None
+    instance._seat_old = None
+    if instance.pk and not instance._state.adding:
+        old = (Registration.objects.filter(pk=instance.pk)
+               .values_list('student_id', 'year', 'semester', 'course_id', 'status').first())
+        if old:
+            instance._summary_old_key = old[:3]
+            instance._seat_old = (old[3], old[1], old[2], old[4])
+
+
+@receiver(post_save, sender=Registration)
+def registration_saved(sender, instance, created, **kwargs):
+    _count_seats(instance, created)
+    key = (instance.student_id, instance.year, str(instance.semester))
+    summaries.refresh(*key)
+    old_key = getattr(instance, '_summary_old_key', None)
+    if old_key and old_key != key:
+        summaries.refresh(*old_key)
+    # live seat feed: only confirmations and un-confirmations move a seat
+    section = (instance.course_id, instance.year, str(instance.semester), instance.status)
+    old_section = getattr(instance, '_seat_old', None)
+    if created and instance.status == 'CONFIRMED':
+        _publish_seats(section)
+    elif old_section and old_section != section and 'CONFIRMED' in (old_section[3], section[3]):
+        _publish_seats(section)
+        if old_section[:3] != section[:3]:
+            _publish_seats(old_section)
+
+
+def _count_seats(instance, created):
+    # reserve_seat() already counted its own registrations; only count ones confirmed elsewhere
+    # (admin, shell, importer), and give the seat back when a confirmed row is downgraded or moved
+    reserved = getattr(instance, '_seat_reserved', False)
+    instance._seat_reserved = False
+    section = (instance.course_id, instance.year, str(instance.semester))
+    confirmed = instance.status == 'CONFIRMED'
+    old = None if created else getattr(instance, '_seat_old', None)
+    was_confirmed = old is not None and old[3] == 'CONFIRMED'
+    if was_confirmed and (not confirmed or old[:3] != section):
+        seats.release_seat(*old[:3])
+        waitlist.schedule(*old[:3])
+    if confirmed and not reserved and (created or (old is not None and (not was_confirmed or old[:3] != section))):
+        seats.take_seat_unchecked(*section)
+
+
+@receiver(post_delete, sender=Registration)
+def registration_deleted(sender, instance, **kwargs):
+    if terms.archiving():
+        # moved to ArchivedRegistration, not dropped: it keeps its seat and its term totals
+        return
+    if instance.status == 'CONFIRMED':
+        seats.release_seat(instance.course_id, instance.year, instance.semester)
+        _publish_seats((instance.course_id, instance.year, str(instance.semester)))
+        # the freed seat goes to the head of the section's waitlist, outside this request
+        waitlist.schedule(instance.course_id, instance.year, instance.semester)
+    summaries.refresh(instance.student_id, instance.year, instance.semester)
+
+
+def _publish_seats(section):
+    # robust: a broker outage is logged, it never fails the already committed request
+    course_id, year, semester = section[:3]
+    transaction.on_commit(lambda: seatfeed.publish_change(course_id, year, semester), robust=True)
+    # pages listing seats left (course_list) are cached until the next seat change
+    transaction.on_commit(httpcache.bump_seats, robust=True)
+
+
+@receiver(post_save, sender=Course)
+def course_saved(sender, instance, created, update_fields=None, **kwargs):
+    # keep the parsed Meeting rows in step with the schedule string
+    if update_fields is None or 'schedule' in update_fields:
+        timetable.sync_meetings(instance)
+    search.index_object(search.COURSE, instance)
+
+
+@receiver(post_delete, sender=Course)
+def course_deleted(sender, instance, **kwargs):
+    search.remove_object(search.COURSE, instance.pk)
+
+
+@receiver(post_save, sender=Student)
+def student_saved(sender, instance, **kwargs):
+    search.index_object(search.STUDENT, instance)
+
+
+@receiver(post_delete, sender=Student)
+def student_deleted(sender, instance, **kwargs):
+    search.remove_object(search.STUDENT, instance.pk)
+
+
+@receiver(post_save, sender=Faculty)
+@receiver(post_delete, sender=Faculty)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(m2m_changed, sender=Course.prerequisites.through)
+def reference_data_changed(sender, action='post_', **kwargs):
+    if action.startswith('pre_'):
+        return  # m2m_changed fires before and after; the post_ signal is enough
+    # bump after commit so no reader can cache pre-commit data under the new version
+    transaction.on_commit(refdata.invalidate)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_created(sender, instance, created, raw=False, **kwargs):
+    # an account made outside signup/import (admin, createsuperuser) for an existing student id
+    if created and not raw:
+        accounts.link_accounts({instance.username: instance.username})
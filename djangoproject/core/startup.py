@@ -0,0 +1,26 @@
+import logging
+
+from django.conf import settings
+from django.db.utils import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+
+def warm_caches():
+    """
+    Called from the WSGI/ASGI entry points once the app registry is ready.
+    Failures (e.g. tables not migrated yet) are logged and never stop the server.
+    """
+    if getattr(settings, 'TEMPLATE_PRECOMPILE_ON_STARTUP', False):
+        from . import precompile
+        timings, errors = precompile.precompile()
+        for name, message in errors:
+            logger.error('template %s does not compile: %s', name, message)
+        logger.info('%d templates precompiled in %.0f ms', len(timings), sum(timings.values()))
+    if not getattr(settings, 'REFDATA_WARM_ON_STARTUP', False):
+        return
+    from . import refdata
+    try:
+        refdata.warm()
+    except DatabaseError:
+        logger.warning('reference data warm-up skipped: database not ready', exc_info=True)
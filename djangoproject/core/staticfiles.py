@@ -0,0 +1,156 @@
+"""
+Production static pipeline (settings: STORAGES['staticfiles'] and STATIC_SERVE, on with DJANGO_DEBUG=0):
+
+- StaticFilesConfig replaces django.contrib.staticfiles in INSTALLED_APPS so collectstatic
+  skips what no page loads: the RTL, grid, reboot, utilities, ESM and unminified Bootstrap
+  builds and their source maps (PRUNED)
+- CompressedManifestStaticFilesStorage: content-hashed names (theme.3f2a9c1d0b7e.css) plus
+  gzip and, when the optional `brotli` package is installed, brotli copies of every text
+  file, written once by collectstatic
+- StaticFileServer (core.middleware.StaticFilesMiddleware) serves STATIC_ROOT from the
+  Django process: hashed names as immutable for a year, the smallest precompressed variant
+  the client accepts, and 304s for revalidations of unhashed names
+
+    DJANGO_DEBUG=0 python manage.py collectstatic --noinput
+"""
+import gzip
+import json
+import mimetypes
+import os
+import posixpath
+from pathlib import Path
+
+from django.contrib.staticfiles.apps import StaticFilesConfig as BaseStaticFilesConfig
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.utils.http import http_date, quote_etag
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+PRUNED = [
+    'bootstrap.css*', 'bootstrap.js*', 'bootstrap.esm*', 'bootstrap.bundle.js*',
+    'bootstrap*.rtl*', 'bootstrap-grid*', 'bootstrap-reboot*', 'bootstrap-utilities*',
+]
+COMPRESSIBLE = {'.css', '.js', '.map', '.svg', '.json', '.txt', '.html', '.xml', '.ico'}
+# a variant that saves less than this is not worth a second file
+MIN_SAVING = 0.05
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=0, must-revalidate'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class StaticFilesConfig(BaseStaticFilesConfig):
+    ignore_patterns = BaseStaticFilesConfig.ignore_patterns + PRUNED
+
+
+def compress(path):
+    """
+    Write path.gz (and path.br) next to path when they are meaningfully smaller.
+    Returns the names of the files written.
+    """
+    data = Path(path).read_bytes()
+    written = []
+    variants = [('.gz', lambda b: gzip.compress(b, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', lambda b: brotli.compress(b, quality=11)))
+    for suffix, encode in variants:
+        packed = encode(data)
+        if len(packed) <= len(data) * (1 - MIN_SAVING):
+            Path(f'{path}{suffix}').write_bytes(packed)
+            written.append(f'{path}{suffix}')
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE:
+                for written in compress(self.path(name)):
+                    yield name, os.path.relpath(written, self.location), True
+
+
+class StaticFile:
+    __slots__ = ('path', 'size', 'mtime', 'etag', 'content_type', 'variants', 'immutable')
+
+    def __init__(self, path, immutable):
+        stat = os.stat(path)
+        self.path = path
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.etag = quote_etag(f'{int(stat.st_mtime):x}-{stat.st_size:x}')
+        content_type, _ = mimetypes.guess_type(path)
+        self.content_type = content_type or 'application/octet-stream'
+        if self.content_type.startswith('text/') or self.content_type == 'application/javascript':
+            self.content_type += '; charset=utf-8'
+        # (encoding, path, size) smallest first
+        self.variants = sorted(
+            ((encoding, path + suffix, os.path.getsize(path + suffix)) for encoding, suffix in ENCODINGS
+             if os.path.exists(path + suffix)),
+            key=lambda v: v[2],
+        )
+        self.immutable = immutable
+
+
+class StaticFileServer:
+    """
+    Index of STATIC_ROOT built once (a deploy runs collectstatic before starting the processes).
+    """
+
+    def __init__(self, root, prefix, manifest_name='staticfiles.json'):
+        self.root = str(root)
+        self.prefix = prefix
+        self.files = {}
+        immutable = self._hashed_names(os.path.join(self.root, manifest_name))
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(('.gz', '.br')) and os.path.exists(os.path.join(directory, name[:-3])):
+                    continue
+                path = os.path.join(directory, name)
+                rel = os.path.relpath(path, self.root).replace(os.sep, '/')
+                self.files[rel] = StaticFile(path, rel in immutable)
+
+    @staticmethod
+    def _hashed_names(manifest_path):
+        try:
+            with open(manifest_path, encoding='utf-8') as fh:
+                return set(json.load(fh).get('paths', {}).values())
+        except (OSError, ValueError):
+            return set()
+
+    def find(self, url_path):
+        if not url_path.startswith(self.prefix):
+            return None
+        rel = posixpath.normpath(url_path[len(self.prefix):]).lstrip('/')
+        if rel.startswith('..'):
+            return None
+        return self.files.get(rel)
+
+    @staticmethod
+    def choose(static_file, accept_encoding):
+        """
+        (path, size, content encoding or None) of the smallest variant the client accepts.
+        """
+        accepted = {part.split(';')[0].strip() for part in accept_encoding.split(',')}
+        for encoding, path, size in static_file.variants:
+            if encoding in accepted:
+                return path, size, encoding
+        return static_file.path, static_file.size, None
+
+    @staticmethod
+    def headers(static_file, encoding):
+        headers = {
+            'Cache-Control': IMMUTABLE if static_file.immutable else REVALIDATE,
+            # each encoding is its own representation
+            'ETag': static_file.etag[:-1] + f'-{encoding}"' if encoding else static_file.etag,
+            'Last-Modified': http_date(static_file.mtime),
+        }
+        if static_file.variants:
+            headers['Vary'] = 'Accept-Encoding'
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        return headers
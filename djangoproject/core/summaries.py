@@ -0,0 +1,133 @@
+from django.db import transaction
+from django.db.models import Case, F, FloatField, IntegerField, Sum, Value, When
+
+from .models import ArchivedRegistration, Registration, StudentTermSummary
+
+GRADE_POINTS = {'A': 4.0, 'B': 3.0, 'C': 2.0, 'D': 1.0, 'F': 0.0}
+FIELDS = ('confirmed_units', 'draft_units', 'graded_units', 'grade_points')
+
+
+def _totals_annotations():
+    # conditional sums so every total of a term comes out of one grouped query
+    return {
+        'confirmed_units': Sum(Case(When(status='CONFIRMED', then=F('units')), default=Value(0), output_field=IntegerField())),
+        'draft_units': Sum(Case(When(status='DRAFT', then=F('units')), default=Value(0), output_field=IntegerField())),
+        'graded_units': Sum(Case(When(grade__in=GRADE_POINTS, then=F('units')), default=Value(0), output_field=IntegerField())),
+        'grade_points': Sum(Case(
+            *[When(grade=g, then=F('units') * Value(p)) for g, p in GRADE_POINTS.items()],
+            default=Value(0.0), output_field=FloatField(),
+        )),
+    }
+
+
+def gpa_of(graded_units, grade_points):
+    return round(grade_points / graded_units, 2) if graded_units else None
+
+
+def _source_totals(**filters):
+    """
+    {(student_id, year, semester): {field: value}} aggregated from the Registration rows and
+    the ArchivedRegistration rows (core.terms) matching filters; a term can have both.
+    """
+    totals = {}
+    for model in (Registration, ArchivedRegistration):
+        rows = model.objects.filter(**filters).values('student_id', 'year', 'semester').annotate(**_totals_annotations())
+        for r in rows:
+            values = totals.setdefault((r['student_id'], r['year'], r['semester']), dict.fromkeys(FIELDS, 0))
+            for f in FIELDS:
+                values[f] += r[f] or 0
+    return totals
+
+
+def refresh(student_id, year, semester):
+    """
+    Recompute the summary row of one student/term from its registrations (called from signals).
+    The row is deleted when the term has no registrations left.
+    """
+    semester = str(semester)
+    totals = _source_totals(student_id=student_id, year=year, semester=semester)
+    values = totals.get((student_id, year, semester))
+    if values is None:
+        StudentTermSummary.objects.filter(student_id=student_id, year=year, semester=semester).delete()
+        return None
+    values['gpa'] = gpa_of(values['graded_units'], values['grade_points'])
+    summary, _ = StudentTermSummary.objects.update_or_create(
+        student_id=student_id, year=year, semester=semester, defaults=values
+    )
+    return summary
+
+
+def term_summary(student, year, semester):
+    """
+    The student's summary row for a term; an unsaved all-zero row when there is none yet.
+    """
+    summary = StudentTermSummary.objects.filter(student=student, year=year, semester=str(semester)).first()
+    return summary or StudentTermSummary(student=student, year=year, semester=str(semester))
+
+
+def _rollup(agg):
+    graded_units = agg['graded_units'] or 0
+    grade_points = agg['grade_points'] or 0.0
+    return {'graded_units': graded_units, 'grade_points': grade_points, 'gpa': gpa_of(graded_units, grade_points)}
+
+
+def cumulative(student):
+    """
+    Cumulative rollup over every term: {'graded_units', 'grade_points', 'gpa'} in one query.
+    """
+    return _rollup(StudentTermSummary.objects.filter(student=student).aggregate(
+        graded_units=Sum('graded_units'), grade_points=Sum('grade_points'),
+    ))
+
+
+async def acumulative(student):
+    """
+    cumulative() for async views.
+    """
+    return _rollup(await StudentTermSummary.objects.filter(student=student).aaggregate(
+        graded_units=Sum('graded_units'), grade_points=Sum('grade_points'),
+    ))
+
+
+def rebuild(batch_size=1000):
+    """
+    Rebuild every summary row from scratch: one grouped query, then bulk inserts.
+    Returns the number of rows written.
+    """
+    totals = _source_totals()
+    rows = [
+        StudentTermSummary(student_id=student_id, year=year, semester=semester,
+                           gpa=gpa_of(values['graded_units'], values['grade_points']), **values)
+        for (student_id, year, semester), values in totals.items()
+    ]
+    with transaction.atomic():
+        StudentTermSummary.objects.all().delete()
+        StudentTermSummary.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def check(tolerance=1e-6):
+    """
+    Compare stored summaries with the registrations they are derived from.
+    Returns a list of (student_id, year, semester, field, stored, expected) for every difference;
+    missing rows are reported with stored=None and orphan rows with expected=None.
+    """
+    expected = _source_totals()
+    problems = []
+    seen = set()
+    for s in StudentTermSummary.objects.all().iterator():
+        key = (s.student_id, s.year, s.semester)
+        seen.add(key)
+        want = expected.get(key)
+        if want is None:
+            problems.append(key + ('*', 'row', None))
+            continue
+        for field in FIELDS:
+            if abs(getattr(s, field) - want[field]) > tolerance:
+                problems.append(key + (field, getattr(s, field), want[field]))
+        want_gpa = gpa_of(want['graded_units'], want['grade_points'])
+        if s.gpa != want_gpa and (s.gpa is None or want_gpa is None or abs(s.gpa - want_gpa) > 0.005):
+            problems.append(key + ('gpa', s.gpa, want_gpa))
+    for key in expected.keys() - seen:
+        problems.append(key + ('*', None, 'row'))
+    return problems
@@ -0,0 +1,284 @@
+"""
+Background jobs for work too slow for a request: a large register_selected, rebuilding every
+term summary, seeding, waitlist sweeps.
+
+A view calls enqueue() and returns at once; `manage.py run_workers` claims due jobs from the
+Job table and runs them in a pool of threads (or processes). Clients poll the job's status
+(core.views.job_status). Everything lives in the project database, so no broker is needed.
+
+  @task(max_attempts=3)            register a function; it is called with the job's kwargs
+  def rebuild_term_summaries(): ...  (JSON-serialisable) and its return value, also JSON, is
+                                   stored as the job's result
+  enqueue('rebuild_term_summaries', key='rebuild')
+
+A job that raises is retried after RETRY_DELAY * 2**(attempt - 1) seconds, up to its
+max_attempts, then marked FAILED with the traceback. `key` deduplicates in-flight work:
+enqueueing with the key of a QUEUED or RUNNING job returns that job instead of a new one.
+
+Settings:
+  TASK_BACKEND         'core.tasks.DatabaseBackend' (default): jobs wait for run_workers
+                       'core.tasks.ImmediateBackend': run inside enqueue() (tests, scripts)
+  TASK_LEASE_SECONDS   a RUNNING job older than this (its worker died) is claimable again (default 600)
+  TASK_INLINE_LIMIT    register_selected with more courses than this is queued (default 8)
+"""
+import hashlib
+import logging
+import threading
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import IntegrityError, close_old_connections
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job, Student
+from .seats import _retry_on_lock, reserve_seat
+from .validation import RegistrationValidator
+from . import summaries, waitlist
+
+logger = logging.getLogger(__name__)
+
+# seconds before the first retry; doubled for each further attempt
+RETRY_DELAY = 5
+FINISHED = ('DONE', 'FAILED')
+
+_registry = {}
+
+
+def task(name=None, max_attempts=3, staff=False):
+    """
+    Register the decorated function as a task. `staff` tasks may be queued by staff users
+    from the jobs endpoint. The function itself is returned unchanged.
+    """
+    def decorator(func):
+        _registry[name or func.__name__] = {'func': func, 'max_attempts': max_attempts, 'staff': staff}
+        return func
+    return decorator
+
+
+def registered(name):
+    return _registry.get(name)
+
+
+def staff_tasks():
+    return sorted(name for name, spec in _registry.items() if spec['staff'])
+
+
+class DatabaseBackend:
+    """
+    Jobs are rows of the Job table; workers claim them with a guarded UPDATE, so any number of
+    worker threads and processes can share the table (SQLite included, which has no SKIP LOCKED).
+    Other backends implement the same four methods.
+    """
+
+    def __init__(self, **options):
+        pass
+
+    def enqueue(self, name, kwargs, key=None, user=None, delay=0):
+        spec = _registry[name]
+        fields = {'name': name, 'kwargs': kwargs, 'user': user, 'max_attempts': spec['max_attempts'],
+                  'run_after': timezone.now() + timedelta(seconds=delay)}
+        if key is None:
+            return Job.objects.create(**fields)
+        existing = Job.objects.filter(key=key).first()
+        if existing is not None:
+            if existing.status not in FINISHED:
+                return existing
+            # finished work does not block the same work being queued again
+            Job.objects.filter(pk=existing.pk, status__in=FINISHED).update(key=None)
+        try:
+            return Job.objects.create(key=key, **fields)
+        except IntegrityError:
+            # a concurrent enqueue with the same key won
+            return Job.objects.get(key=key)
+
+    def claim(self, worker):
+        """
+        Mark the oldest due job RUNNING for this worker and return it, or None.
+        """
+        now = timezone.now()
+        self.requeue_expired(now)
+        candidates = list(Job.objects.filter(status='QUEUED', run_after__lte=now)
+                          .order_by('run_after', 'id').values_list('id', flat=True)[:5])
+        for pk in candidates:
+            # another worker may claim the same row first: only one UPDATE matches
+            claimed = Job.objects.filter(pk=pk, status='QUEUED').update(
+                status='RUNNING', worker=worker, started_at=now, attempts=F('attempts') + 1)
+            if claimed:
+                return Job.objects.get(pk=pk)
+        return None
+
+    def requeue_expired(self, now):
+        lease = timedelta(seconds=getattr(settings, 'TASK_LEASE_SECONDS', 600))
+        expired = Job.objects.filter(status='RUNNING', started_at__lt=now - lease)
+        expired.filter(attempts__lt=F('max_attempts')).update(status='QUEUED', run_after=now, error='lease expired')
+        expired.update(status='FAILED', finished_at=now, error='lease expired')
+
+    def finish(self, job, status, **fields):
+        # guarded on the claim: a job requeued after its lease expired belongs to someone else now
+        return Job.objects.filter(pk=job.pk, status='RUNNING', worker=job.worker).update(status=status, **fields)
+
+
+class ImmediateBackend(DatabaseBackend):
+    """
+    Runs each job as soon as it is enqueued, in the caller's thread; the Job row still records
+    status and result. For tests and one-off scripts.
+    """
+
+    def enqueue(self, name, kwargs, key=None, user=None, delay=0):
+        job = super().enqueue(name, kwargs, key=key, user=user)
+        if job.status == 'QUEUED':
+            Job.objects.filter(pk=job.pk).update(status='RUNNING', worker='immediate',
+                                                 started_at=timezone.now(), attempts=F('attempts') + 1)
+            job.refresh_from_db()
+            run_job(job, self)
+            job.refresh_from_db()
+        return job
+
+
+_backends = {}
+
+
+def backend():
+    path = getattr(settings, 'TASK_BACKEND', 'core.tasks.DatabaseBackend')
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
+
+
+def enqueue(name, key=None, user=None, delay=0, **kwargs):
+    """
+    Queue task `name` with kwargs; returns the Job (the existing one for a key still in flight).
+    """
+    if name not in _registry:
+        raise KeyError(f'unknown task {name!r}')
+    return backend().enqueue(name, kwargs, key=key, user=user, delay=delay)
+
+
+def run_job(job, using=None):
+    """
+    Run a claimed (RUNNING) job and record its outcome: DONE with the result, QUEUED again
+    with a backoff when attempts remain, else FAILED.
+    """
+    using = using or backend()
+    spec = _registry.get(job.name)
+    if spec is None:
+        using.finish(job, 'FAILED', error=f'unknown task {job.name!r}', finished_at=timezone.now())
+        return
+    try:
+        result = spec['func'](**job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('job %s (%s) failed, attempt %d/%d', job.pk, job.name, job.attempts, job.max_attempts)
+        if job.attempts < job.max_attempts:
+            delay = RETRY_DELAY * 2 ** (job.attempts - 1)
+            using.finish(job, 'QUEUED', error=error, run_after=timezone.now() + timedelta(seconds=delay))
+        else:
+            using.finish(job, 'FAILED', error=error, finished_at=timezone.now())
+        return
+    using.finish(job, 'DONE', result=result, error='', finished_at=timezone.now())
+
+
+class Worker:
+    """
+    `threads` threads, each claiming and running one job at a time. run(once=True) returns
+    when no job is due instead of polling.
+    """
+
+    def __init__(self, threads=1, poll=1.0, name=None):
+        self.threads = max(threads, 1)
+        self.poll = poll
+        self.name = name or f'worker-{uuid.uuid4().hex[:8]}'
+        self.stopping = threading.Event()
+        self.processed = 0
+        self.lock = threading.Lock()
+
+    def stop(self):
+        self.stopping.set()
+
+    def _loop(self, ident, once):
+        worker = f'{self.name}/{ident}'
+        using = backend()
+        while not self.stopping.is_set():
+            job = _retry_on_lock(lambda: using.claim(worker))
+            if job is None:
+                if once:
+                    return
+                self.stopping.wait(self.poll)
+                continue
+            run_job(job, using)
+            with self.lock:
+                self.processed += 1
+
+    def _thread(self, ident, once):
+        try:
+            self._loop(ident, once)
+        finally:
+            close_old_connections()
+
+    def run(self, once=False):
+        if self.threads == 1:
+            self._loop(0, once)
+            return self.processed
+        pool = [threading.Thread(target=self._thread, args=(n, once), name=f'{self.name}-{n}', daemon=True)
+                for n in range(self.threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            while thread.is_alive():
+                thread.join(0.5)
+        return self.processed
+
+
+def selection_key(student, course_ids, year, semester):
+    digest = hashlib.sha1(','.join(sorted(str(c) for c in course_ids)).encode()).hexdigest()[:16]
+    return f'register_selected:{student.pk}:{year}:{semester}:{digest}'
+
+
+# --- tasks ---
+
+@task(max_attempts=2)
+def register_selected(student_id, course_ids, year, semester):
+    """
+    Validate and register a selection of courses; sections that are full put the student on
+    their waitlist. Returns {'registered': [code], 'waitlisted': [[code, place]], 'errors': [msg]}.
+    """
+    student = Student.objects.get(pk=student_id)
+    outcome = {'registered': [], 'waitlisted': [], 'errors': []}
+    for verdict in RegistrationValidator(student, year, semester).validate(course_ids):
+        full = bool(verdict.reasons) and all(code == 'full' for code, _ in verdict.reasons)
+        if not verdict.ok and not full:
+            outcome['errors'].extend(msg for _, msg in verdict.reasons)
+        elif verdict.ok and reserve_seat(student, verdict.course, year, semester) is not None:
+            outcome['registered'].append(verdict.course.code)
+        else:
+            _, place = waitlist.join(student, verdict.course, year, semester)
+            outcome['waitlisted'].append([verdict.course.code, place])
+    return outcome
+
+
+@task(staff=True)
+def rebuild_term_summaries():
+    return {'rows': summaries.rebuild()}
+
+
+@task()
+def promote_waitlist(course_id, year, semester):
+    return {'promoted': len(waitlist.promote(course_id, year, semester))}
+
+
+@task(staff=True)
+def promote_waitlists(year=None, semester=None):
+    sections = waitlist.sections_to_promote(year, semester)
+    promoted = sum(len(waitlist.promote(*section)) for section in sections)
+    return {'sections': len(sections), 'promoted': promoted}
+
+
+@task(max_attempts=1, staff=True)
+def seed_data():
+    call_command('seed_data', verbosity=0)
+    return {}
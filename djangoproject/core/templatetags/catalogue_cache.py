@@ -0,0 +1,34 @@
+"""
+{% catalogue_cache "name" [vary_on ...] %} ... {% endcatalogue_cache %}
+
+Like Django's {% cache %}, but with no timeout to pick: the key holds the catalogue version
+(core.refdata), so the fragment is re-rendered on the first request after any catalogue edit.
+Querysets evaluated only inside the block are not run at all on a hit.
+"""
+from django import template
+
+from core import httpcache
+
+register = template.Library()
+
+
+class CatalogueCacheNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        vary_on = [v.resolve(context) for v in self.vary_on]
+        return httpcache.fragment(self.name.resolve(context), vary_on, lambda: self.nodelist.render(context))
+
+
+@register.tag('catalogue_cache')
+def do_catalogue_cache(parser, token):
+    nodelist = parser.parse(('endcatalogue_cache',))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name")
+    return CatalogueCacheNode(nodelist, parser.compile_filter(bits[1]),
+                              [parser.compile_filter(bit) for bit in bits[2:]])
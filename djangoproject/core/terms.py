@@ -0,0 +1,161 @@
+"""
+Term lifecycle and archival of finished terms:
+
+    OPEN -> CLOSED (grading is done) -> ARCHIVED (graded registrations moved)
+
+Every hot query filters Registration on (year, semester), but the table keeps every term
+ever taught. Archiving a CLOSED term moves its graded, confirmed registrations into
+ArchivedRegistration (same database, original ids kept), so the live table and its
+indexes only hold terms still in use. Rows of the term without a grade stay live.
+
+Moving a row changes nothing a student sees: StudentTermSummary rows are left as they
+are (the term's totals do not change), and the readers of past grades go through here:
+passed_course_ids() (prerequisite checks), graded_history() (results page) and the
+transcript/class list exports (core.exports) read both tables.
+
+archive() works in short transactions of batch_size rows with a pause between them, so
+registration writes are never blocked for long (`manage.py archive_terms`). The moved rows
+are deleted with QuerySet.delete(), so Registration's post_delete signal fires; while
+archiving() is true it skips the seat release, waitlist promotion and summary refresh meant
+for a drop (core.signals).
+"""
+import contextvars
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import PASSING_GRADES, ArchivedRegistration, Registration, Term
+
+BATCH_SIZE = 500
+# seconds between batches; lets waiting writers take the database lock
+PAUSE = 0.05
+
+_archiving = contextvars.ContextVar('archiving', default=False)
+
+
+def archiving():
+    """
+    True while archive_batch() deletes the rows it has just copied to the archive.
+    """
+    return _archiving.get()
+
+
+def status(year, semester):
+    """
+    The term's status; a term without a Term row is open.
+    """
+    row = Term.objects.filter(year=year, semester=str(semester)).values_list('status', flat=True).first()
+    return row or 'OPEN'
+
+
+def close(year, semester):
+    """
+    Mark a term as closed (grading finished), making it eligible for archival.
+    """
+    term, _ = Term.objects.get_or_create(year=year, semester=str(semester))
+    if term.status == 'OPEN':
+        term.status = 'CLOSED'
+        term.closed_at = timezone.now()
+        term.save(update_fields=['status', 'closed_at'])
+    return term
+
+
+def closed_terms():
+    """
+    (year, semester) of every term waiting to be archived.
+    """
+    return list(Term.objects.filter(status='CLOSED').order_by('year', 'semester').values_list('year', 'semester'))
+
+
+def archivable(year, semester):
+    """
+    The live registrations of a term that archive() moves: graded and confirmed.
+    """
+    return Registration.objects.filter(year=year, semester=str(semester), status='CONFIRMED').exclude(grade='')
+
+
+def archive_batch(year, semester, batch_size=BATCH_SIZE):
+    """
+    Move one batch of the term's graded registrations to the archive, in one transaction.
+    Returns the number of rows moved (0 when the term is done).
+    The delete sends Registration's post_delete signal with archiving() true.
+    """
+    with transaction.atomic():
+        regs = list(archivable(year, semester).order_by('id')[:batch_size])
+        if not regs:
+            return 0
+        ArchivedRegistration.objects.bulk_create([
+            ArchivedRegistration(id=r.pk, student_id=r.student_id, course_id=r.course_id, year=r.year,
+                                 semester=r.semester, units=r.units, grade=r.grade, status=r.status,
+                                 created_at=r.created_at)
+            for r in regs
+        ])
+        token = _archiving.set(True)
+        try:
+            Registration.objects.filter(pk__in=[r.pk for r in regs]).delete()
+        finally:
+            _archiving.reset(token)
+    return len(regs)
+
+
+def archive(year, semester, batch_size=BATCH_SIZE, pause=PAUSE, progress=None):
+    """
+    Archive a closed term batch by batch and mark it ARCHIVED. Archiving an already archived
+    term again moves rows graded since. progress(moved_so_far) is called after each batch.
+    Returns the number of rows moved.
+    """
+    semester = str(semester)
+    term = Term.objects.filter(year=year, semester=semester).first()
+    if term is None or term.status == 'OPEN':
+        raise ValueError(f'term {year}/{semester} is open; close it before archiving')
+    moved = 0
+    while True:
+        n = archive_batch(year, semester, batch_size)
+        if not n:
+            break
+        moved += n
+        if progress is not None:
+            progress(moved)
+        if pause:
+            time.sleep(pause)
+    if term.status != 'ARCHIVED':
+        term.status = 'ARCHIVED'
+        term.archived_at = timezone.now()
+        term.save(update_fields=['status', 'archived_at'])
+    return moved
+
+
+def passed_course_ids(student):
+    """
+    Ids of the courses the student has passed, live and archived: one query (a UNION).
+    """
+    live = Registration.objects.filter(student=student, grade__in=PASSING_GRADES).values_list('course_id', flat=True)
+    archived = (ArchivedRegistration.objects.filter(student=student, grade__in=PASSING_GRADES)
+                .values_list('course_id', flat=True))
+    return live.union(archived)
+
+
+def _history_order(reg):
+    return (reg.year, reg.semester, reg.course.code, reg.pk)
+
+
+def _history_querysets(student):
+    return (ArchivedRegistration.objects.filter(student=student).select_related('course'),
+            Registration.objects.filter(student=student).exclude(grade='').select_related('course'))
+
+
+def graded_history(student):
+    """
+    The student's graded registrations from both tables, oldest term first.
+    """
+    archived, live = _history_querysets(student)
+    return sorted([*archived, *live], key=_history_order)
+
+
+async def agraded_history(student):
+    """
+    graded_history() for async views.
+    """
+    archived, live = _history_querysets(student)
+    return sorted([r async for r in archived] + [r async for r in live], key=_history_order)
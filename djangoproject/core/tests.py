@@ -0,0 +1,1208 @@
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from importlib import import_module
+from pathlib import Path
+from unittest import mock
+
+from django.apps import apps as django_apps
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.sessions.models import Session
+from django.contrib.staticfiles.utils import matches_patterns
+from django.db import OperationalError, connection, connections
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.template import Engine
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from .models import (Faculty, Department, Course, Student, Registration, SeatCounter, StudentTermSummary, Meeting, Waitlist, Job,
+                     Term, ArchivedRegistration)
+from .seats import reserve_seat, reconcile_seats
+from .cart import Cart, decode, encode
+from .catalogue import CourseSearch, decode_cursor, encode_cursor
+from .db import ReadReplicaRouter, replica_reads
+from .importer import RegistryImporter
+from .listing import RegistrationListing, StudentListing, approximate_count
+from .metrics import registry as metrics_registry
+from .middleware import StudentMiddleware, fingerprint
+from .prereqs import PrerequisiteGraph, eligibility_for
+from . import (async_views, exports, httpcache, precompile, pubsub, queryplans, refdata, search, seatfeed, staticfiles,
+               summaries, tasks, terms, waitlist)
+from .timetable import parse_schedule, find_clashes, TimetableIndex, term_clash_report
+from .validation import RegistrationValidator
+from lukwaproject.dbprofiles import database_settings
+
+
+def make_catalogue(capacity=2, n_courses=1):
+    fac = Faculty.objects.create(code='SCI', name='คณะวิทยาศาสตร์')
+    dept = Department.objects.create(code='CS', name='วิทยาการคอมพิวเตอร์', faculty=fac)
+    courses = [
+        Course.objects.create(code=f'CS{100 + i}', name=f'วิชา {i}', units=3, department=dept, capacity=capacity)
+        for i in range(n_courses)
+    ]
+    return dept, courses
+
+
+def make_students(dept, n, prefix='s'):
+    return [
+        Student.objects.create(student_id=f'{prefix}{i:05d}', first_name=f'fn{i}', last_name=f'ln{i}', department=dept)
+        for i in range(n)
+    ]
+
+
+@override_settings(WAITLIST_PROMOTION='inline')
+class SeatReservationTests(TestCase):
+    def setUp(self):
+        self.dept, (self.course,) = make_catalogue(capacity=2)
+        self.students = make_students(self.dept, 3)
+
+    def test_reserve_until_full(self):
+        self.assertIsNotNone(reserve_seat(self.students[0], self.course, 2025, '1'))
+        self.assertIsNotNone(reserve_seat(self.students[1], self.course, 2025, '1'))
+        self.assertIsNone(reserve_seat(self.students[2], self.course, 2025, '1'))
+        self.assertEqual(SeatCounter.objects.get(course=self.course).taken, 2)
+
+    def test_reserve_is_idempotent_for_same_student(self):
+        reserve_seat(self.students[0], self.course, 2025, '1')
+        reserve_seat(self.students[0], self.course, 2025, '1')
+        self.assertEqual(SeatCounter.objects.get(course=self.course).taken, 1)
+
+    def test_reserve_confirms_existing_draft(self):
+        Registration.objects.create(student=self.students[0], course=self.course, year=2025, semester='1', units=3, status='DRAFT')
+        reg = reserve_seat(self.students[0], self.course, 2025, '1')
+        self.assertEqual(reg.status, 'CONFIRMED')
+        self.assertEqual(Registration.objects.count(), 1)
+
+    def test_delete_releases_seat(self):
+        reg = reserve_seat(self.students[0], self.course, 2025, '1')
+        reserve_seat(self.students[1], self.course, 2025, '1')
+        reg.delete()
+        self.assertEqual(SeatCounter.objects.get(course=self.course).taken, 1)
+        self.assertIsNotNone(reserve_seat(self.students[2], self.course, 2025, '1'))
+
+    def test_status_changes_outside_reserve_seat_move_the_counter(self):
+        reserve_seat(self.students[0], self.course, 2025, '1')
+        reg = Registration.objects.create(student=self.students[1], course=self.course, year=2025, semester='1',
+                                          units=3, status='DRAFT')
+        taken = lambda: SeatCounter.objects.get(course=self.course).taken
+        self.assertEqual(taken(), 1)
+        reg.status = 'CONFIRMED'
+        reg.save()
+        self.assertEqual(taken(), 2)
+        reg.save()
+        self.assertEqual(taken(), 2)
+        reg.status = 'DRAFT'
+        reg.save()
+        self.assertEqual(taken(), 1)
+        self.assertEqual(reconcile_seats(dry_run=True), [])
+
+    def test_reconcile_fixes_drift(self):
+        reserve_seat(self.students[0], self.course, 2025, '1')
+        SeatCounter.objects.update(taken=7)
+        drift = reconcile_seats()
+        self.assertEqual(drift, [(self.course.id, 2025, '1', 7, 1)])
+        self.assertEqual(SeatCounter.objects.get(course=self.course).taken, 1)
+
+
+class SeatContentionTests(TransactionTestCase):
+    """
+    Fire many threads at one course at the same time: nobody may get a seat past capacity.
+    """
+    THREADS = 24
+    CAPACITY = 5
+
+    def test_parallel_reservations_never_overbook(self):
+        dept, (course,) = make_catalogue(capacity=self.CAPACITY)
+        students = make_students(dept, self.THREADS)
+        start = threading.Barrier(self.THREADS)
+        results, latencies, failures = [], [], []
+        lock = threading.Lock()
+
+        def worker(student):
+            try:
+                start.wait()
+                t0 = time.perf_counter()
+                reg = reserve_seat(student, course, 2025, '1')
+                elapsed = time.perf_counter() - t0
+                with lock:
+                    results.append(reg is not None)
+                    latencies.append(elapsed)
+            except Exception as exc:
+                with lock:
+                    failures.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(s,)) for s in students]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(failures, [])
+        self.assertEqual(sum(results), self.CAPACITY)
+        self.assertEqual(Registration.objects.filter(course=course, status='CONFIRMED').count(), self.CAPACITY)
+        self.assertEqual(SeatCounter.objects.get(course=course).taken, self.CAPACITY)
+        self.assertLess(max(latencies), 5.0)
+
+
+class RegistrationValidatorTests(TestCase):
+    def setUp(self):
+        self.dept, self.courses = make_catalogue(capacity=40, n_courses=12)
+        (self.student,) = make_students(self.dept, 1)
+
+    def _query_count(self, n):
+        validator = RegistrationValidator(self.student, 2025, '1')
+        ids = [c.pk for c in self.courses[:n]]
+        with self.assertNumQueries(6):
+            validator.validate(ids[:1], cart_ids=ids[1:])
+        with self.assertNumQueries(6):
+            validator.validate(ids)
+
+    def test_query_count_constant_as_cart_grows(self):
+        for n in (1, 3, 12):
+            self._query_count(n)
+
+    def test_verdicts(self):
+        a, b, c, d = self.courses[:4]
+        b.prerequisites.add(a)
+        c.schedule = 'Mon 09:00-11:00'
+        c.save()
+        d.schedule = 'Mon 09:00-11:00'
+        d.capacity = 0
+        d.save()
+        verdicts = RegistrationValidator(self.student, 2025, '1').validate([a.pk, b.pk, c.pk, d.pk, 999999])
+        self.assertEqual([v.codes for v in verdicts], [[], ['prerequisite'], [], ['full', 'clash'], ['not_found']])
+
+    def test_partial_overlap_is_a_clash(self):
+        a, b, c = self.courses[:3]
+        a.schedule = 'Mon 09:00-11:00'
+        b.schedule = 'Mon 10:00-12:00'
+        c.schedule = 'Mon 11:00-12:00'
+        for course in (a, b, c):
+            course.save()
+        reserve_seat(self.student, a, 2025, '1')
+        verdicts = RegistrationValidator(self.student, 2025, '1').validate([b.pk, c.pk])
+        self.assertEqual([v.codes for v in verdicts], [['clash'], []])
+        self.assertEqual(verdicts[0].clashes_with, [a.pk])
+
+    def test_credit_limit_is_cumulative(self):
+        for c in self.courses:
+            c.units = 6
+            c.save()
+        verdicts = RegistrationValidator(self.student, 2025, '1').validate([c.pk for c in self.courses[:5]])
+        self.assertEqual([v.ok for v in verdicts], [True, True, True, False, False])
+
+
+class RegistrationViewTests(TestCase):
+    def setUp(self):
+        self.dept, self.courses = make_catalogue(capacity=1, n_courses=4)
+        self.student, self.other = make_students(self.dept, 2)
+        self.user = User.objects.create_user(username=self.student.student_id, password='pw')
+        self.client.force_login(self.user)
+
+    def test_confirm_cart(self):
+        session = self.client.session
+        session['registration_cart'] = [c.pk for c in self.courses[:3]]
+        session.save()
+        reserve_seat(self.other, self.courses[2], 2025, '1')
+        self.client.post(reverse('core:register'), {'action': 'confirm'})
+        regs = Registration.objects.filter(student=self.student, status='CONFIRMED')
+        self.assertEqual(sorted(r.course_id for r in regs), [self.courses[0].pk, self.courses[1].pk])
+
+    def test_register_selected(self):
+        self.client.post(reverse('core:register'), {'action': 'register_selected', 'course_ids': [self.courses[0].pk, self.courses[3].pk]})
+        self.assertEqual(Registration.objects.filter(student=self.student, status='CONFIRMED').count(), 2)
+        self.assertEqual(SeatCounter.objects.get(course=self.courses[0]).taken, 1)
+
+    def test_save_draft_keeps_confirmed_registrations(self):
+        reserve_seat(self.student, self.courses[0], 2025, '1')
+        session = self.client.session
+        session['registration_cart'] = [self.courses[0].pk, self.courses[1].pk]
+        session.save()
+        self.client.post(reverse('core:register'), {'action': 'save_draft'})
+        statuses = dict(Registration.objects.filter(student=self.student).values_list('course_id', 'status'))
+        self.assertEqual(statuses, {self.courses[0].pk: 'CONFIRMED', self.courses[1].pk: 'DRAFT'})
+        self.assertEqual(SeatCounter.objects.get(course=self.courses[0]).taken, 1)
+
+    def test_page_context_has_each_list_once(self):
+        page = self.client.get(reverse('core:register'))
+        for legacy in ('courses', 'available_courses', 'cart_courses', 'registered_courses', 'faculties', 'departments'):
+            self.assertNotIn(legacy, page.context.keys())
+        self.assertEqual(len(page.context['course_rows']), 4)
+
+
+class TemplatePrecompileTests(SimpleTestCase):
+    def test_every_project_template_compiles(self):
+        timings, errors = precompile.precompile()
+        self.assertEqual(errors, [])
+        self.assertIn('registration_page.html', timings)
+
+    def test_missing_parent_is_reported(self):
+        engine = Engine(loaders=[('django.template.loaders.locmem.Loader', {'child.html': '{% extends "gone.html" %}'})])
+        self.assertEqual(precompile.precompile(['child.html'], engine=engine)[1][0][0], 'child.html')
+
+
+class StudentAccountTests(TestCase):
+    def setUp(self):
+        self.dept, _ = make_catalogue()
+        self.students = make_students(self.dept, 3)
+
+    def test_new_account_links_to_its_student_and_loads_once(self):
+        user = User.objects.create_user(username=self.students[1].student_id, password='pw')
+        self.assertEqual(Student.objects.get(user=user), self.students[1])
+        request = RequestFactory().get('/')
+        request.user = user
+        StudentMiddleware(lambda r: None).process_request(request)
+        with self.assertNumQueries(1):
+            self.assertEqual(request.student.pk, self.students[1].pk)
+            self.assertEqual(request.student.department.faculty.code, 'SCI')
+
+    def test_backfill_uses_the_old_lookups(self):
+        backfill = import_module('core.migrations.0013_student_user').link_students
+        by_id = User.objects.create_user(username=self.students[0].student_id)
+        by_name = User.objects.create_user(username=self.students[2].first_name)
+        User.objects.create_user(username='nobody')
+        Student.objects.update(user=None)
+        backfill(django_apps, None)
+        self.assertEqual(dict(Student.objects.filter(user__isnull=False).values_list('pk', 'user')),
+                         {self.students[0].pk: by_id.pk, self.students[2].pk: by_name.pk})
+
+
+class StaticPipelineTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        (self.root / 'css').mkdir()
+        body = b'body { color: #333; }\n' * 200
+        (self.root / 'css' / 'theme.css').write_bytes(body)
+        (self.root / 'css' / 'theme.0123456789ab.css').write_bytes(body)
+        staticfiles.compress(self.root / 'css' / 'theme.0123456789ab.css')
+        (self.root / 'staticfiles.json').write_text(json.dumps({'paths': {'css/theme.css': 'css/theme.0123456789ab.css'}}))
+
+    def test_hashed_files_are_immutable_and_precompressed(self):
+        with override_settings(STATIC_SERVE=True, STATIC_ROOT=str(self.root)):
+            client = self.client_class()
+            resp = client.get('/static/css/theme.0123456789ab.css', HTTP_ACCEPT_ENCODING='gzip, deflate')
+            self.assertEqual(resp['Content-Encoding'], 'gzip')
+            self.assertIn('immutable', resp['Cache-Control'])
+            self.assertTrue(resp.streaming)
+            self.assertEqual(gzip.decompress(b''.join(resp.streaming_content)), (self.root / 'css' / 'theme.css').read_bytes())
+            plain = client.get('/static/css/theme.css')
+            self.assertNotIn('Content-Encoding', plain)
+            self.assertIn('must-revalidate', plain['Cache-Control'])
+            head = client.head('/static/css/theme.css')
+            self.assertEqual(head['Content-Length'], plain['Content-Length'])
+            self.assertEqual(head.content, b'')
+            self.assertEqual(client.get('/static/css/theme.css', HTTP_IF_NONE_MATCH=plain['ETag']).status_code, 304)
+            self.assertEqual(client.get('/static/../settings.py').status_code, 404)
+
+    def test_unused_bootstrap_builds_are_not_collected(self):
+        ignored = django_apps.get_app_config('staticfiles').ignore_patterns
+        self.assertTrue(matches_patterns('bootstrap.rtl.min.css', ignored))
+        self.assertTrue(matches_patterns('bootstrap-grid.min.css.map', ignored))
+        self.assertFalse(matches_patterns('bootstrap.min.css', ignored))
+        self.assertFalse(matches_patterns('bootstrap.bundle.min.js', ignored))
+
+
+class CartTests(TestCase):
+    def setUp(self):
+        self.dept, self.courses = make_catalogue(capacity=5, n_courses=3)
+        (self.student,) = make_students(self.dept, 1)
+        self.user = User.objects.create_user(username=self.student.student_id, password='pw')
+
+    def test_storage_format_and_legacy_session(self):
+        self.assertEqual(encode([12, 7], 4), '1:4:12.7')
+        self.assertEqual(decode('1:4:12.7'), ([12, 7], 4))
+        self.assertEqual(decode('9:1:12'), ([], 0))
+        self.assertEqual(decode('garbage'), ([], 0))
+        session = {'registration_cart': [3, '3', 5]}
+        cart = Cart(session)
+        self.assertEqual(cart.ids, [3, 5])
+        self.assertEqual(session, {'cart': '1:0:3.5'})
+
+    def test_courses_units_and_clashes_resolved_once(self):
+        a, b, c = self.courses
+        a.schedule = b.schedule = 'Mon 09:00-11:00'
+        a.save()
+        b.save()
+        cart = Cart({'cart': encode([a.pk, b.pk, c.pk, 999999], 1)})
+        with self.assertNumQueries(2):
+            self.assertEqual([x.pk for x in cart.courses()], [a.pk, b.pk, c.pk])
+            self.assertEqual(cart.units(), 9)
+            self.assertEqual(cart.clashes(), {a.pk: {b.pk}, b.pk: {a.pk}})
+            cart.units()
+            cart.clashes()
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_cart_edits_in_signed_cookie_session(self):
+        self.client.force_login(self.user)
+        for course in self.courses[:2]:
+            self.client.post(reverse('core:register'), {'action': 'add_course', 'course': course.pk})
+        self.client.post(reverse('core:register'), {'action': 'remove_course', 'course': self.courses[0].pk})
+        page = self.client.get(reverse('core:register'))
+        self.assertEqual(page.context['cart_ids'], [self.courses[1].pk])
+        self.client.post(reverse('core:register'), {'action': 'confirm'})
+        self.assertEqual(list(Registration.objects.filter(student=self.student).values_list('course_id', flat=True)),
+                         [self.courses[1].pk])
+        self.assertEqual(Session.objects.count(), 0)
+
+
+class TimetableTests(TestCase):
+    def test_parse_schedule(self):
+        self.assertEqual(parse_schedule('Mon 09:00-11:00, wed 13:30-15:00,bogus,Fri 10:00-09:00'),
+                         [(0, 540, 660), (2, 810, 900)])
+
+    def test_index_and_sweep_agree(self):
+        timetable = {
+            1: [(0, 540, 660)],
+            2: [(0, 600, 720)],
+            3: [(0, 720, 780), (2, 540, 600)],
+            4: [(2, 480, 720)],
+        }
+        self.assertEqual(find_clashes(timetable), {(1, 2), (3, 4)})
+        index = TimetableIndex()
+        index.add(1, timetable[1])
+        index.add(4, timetable[4])
+        self.assertEqual(index.conflicts(timetable[2]), {1})
+        self.assertEqual(index.conflicts(timetable[3]), {4})
+
+    def test_meetings_follow_schedule(self):
+        dept, (course,) = make_catalogue()
+        course.schedule = 'Tue 08:00-10:00,Thu 08:00-10:00'
+        course.save()
+        self.assertEqual(list(course.meetings.values_list('day', 'start_minute', 'end_minute')), [(1, 480, 600), (3, 480, 600)])
+
+    def test_term_clash_report(self):
+        dept, courses = make_catalogue(n_courses=3)
+        for course, sched in zip(courses, ['Mon 09:00-11:00', 'Mon 10:30-12:00', 'Tue 09:00-11:00']):
+            course.schedule = sched
+            course.save()
+        s1, s2 = make_students(dept, 2)
+        for course in courses:
+            Registration.objects.create(student=s1, course=course, year=2025, semester='1', units=3)
+        Registration.objects.create(student=s2, course=courses[0], year=2025, semester='1', units=3)
+        with self.assertNumQueries(3):
+            report = term_clash_report(2025, '1')
+        self.assertEqual(report, {s1.student_id: [('CS100', 'CS101')]})
+
+
+class CourseSearchTests(TestCase):
+    def setUp(self):
+        self.dept, self.courses = make_catalogue(capacity=1, n_courses=30)
+        self.courses[3].status = 'E'
+        self.courses[3].save()
+
+    def test_keyset_pages_cover_catalogue_once(self):
+        seen, after = [], ''
+        while True:
+            resp = self.client.get(reverse('core:course_search'), {'limit': 7, 'after': after})
+            data = resp.json()
+            seen += [c['code'] for c in data['results']]
+            if not data['next']:
+                break
+            after = data['next']
+        self.assertEqual(seen, sorted(c.code for c in self.courses))
+
+    def test_filters(self):
+        (student,) = make_students(self.dept, 1)
+        reserve_seat(student, self.courses[0], 2025, '1')
+        codes = lambda **p: [c.code for c in CourseSearch(p).page()[0]]
+        self.assertEqual(codes(code='cs11', limit=100), [f'CS{n}' for n in range(110, 120)])
+        self.assertEqual(codes(status='E'), ['CS103'])
+        self.assertNotIn('CS100', codes(open='1', limit=100))
+        self.assertEqual(len(codes(department=self.dept.pk, limit=100)), 30)
+
+    def test_page_query_count_is_constant(self):
+        with self.assertNumQueries(2):
+            courses, cursor = CourseSearch({'limit': 10}).page()
+        self.assertEqual(decode_cursor(cursor), [courses[-1].code, courses[-1].pk])
+
+    def test_bad_cursor(self):
+        resp = self.client.get(reverse('core:course_search'), {'after': '!!!'})
+        self.assertEqual(resp.status_code, 400)
+        # decodable, but not a (code, id) pair
+        for values in (['CS100', 'abc'], ['CS100', {'x': 1}], [1, 2]):
+            after = encode_cursor(*values)
+            self.assertEqual(self.client.get(reverse('core:course_search'), {'after': after}).status_code, 400)
+            self.assertRedirects(self.client.get(reverse('core:courses'), {'after': after}), reverse('core:courses'),
+                                 fetch_redirect_response=False)
+
+    def test_html_renders_first_page_only(self):
+        resp = self.client.get(reverse('core:courses'))
+        self.assertEqual(len(resp.context['courses']), 24)
+        self.assertIsNotNone(resp.context['next_cursor'])
+
+
+@override_settings(WAITLIST_PROMOTION='inline')
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.dept, self.courses = make_catalogue(n_courses=3)
+        self.courses[1].name = 'การเขียนโปรแกรมคอมพิวเตอร์'
+        self.courses[1].instructor = 'อ.สมชาย ทองดี'
+        self.courses[1].save()
+        Student.objects.create(student_id='kpru1001', first_name='สมชาย', last_name='ทองดี', department=self.dept)
+        Student.objects.create(student_id='kpru1002', first_name='สุดา', last_name='ใจงาม', department=self.dept)
+
+    def test_thai_substring_without_spaces(self):
+        self.assertEqual([c.code for c in search.search_courses('โปรแกรม')], ['CS101'])
+        self.assertEqual([c.code for c in search.search_courses('ทองดี')], ['CS101'])
+        self.assertEqual([s.student_id for s in search.search_students('ใจง')], ['kpru1002'])
+        self.assertEqual([s.student_id for s in search.search_students('สมชาย ทอง')], ['kpru1001'])
+        self.assertEqual(search.search_students('ไม่มี'), [])
+
+    def test_words_shorter_than_a_gram_fall_back_to_substring(self):
+        self.assertEqual([s.student_id for s in search.search_students('ใ')], ['kpru1002'])
+        self.assertEqual([c.code for c in search.search_courses('ม')], ['CS101'])
+        # a long word still narrows through the index; the short one is checked as a substring
+        self.assertEqual([s.student_id for s in search.search_students('ทองดี ส')], ['kpru1001'])
+        self.assertEqual([c.code for c in CourseSearch({'q': 'ก'}).page()[0]], ['CS101'])
+
+    def test_index_follows_saves_and_deletes(self):
+        student = Student.objects.get(student_id='kpru1002')
+        student.first_name = 'มณีรัตน์'
+        student.save()
+        self.assertEqual([s.student_id for s in search.search_students('มณี')], ['kpru1002'])
+        self.assertEqual(search.search_students('สุดา'), [])
+        student.delete()
+        self.assertFalse(search.SearchGram.objects.filter(kind=search.STUDENT, object_id=student.pk).exists())
+
+    def test_rebuild_matches_incremental(self):
+        before = set(search.SearchGram.objects.values_list('kind', 'object_id', 'gram'))
+        search.rebuild()
+        self.assertEqual(set(search.SearchGram.objects.values_list('kind', 'object_id', 'gram')), before)
+
+    def test_catalogue_and_student_list_use_index(self):
+        self.assertEqual([c.code for c in CourseSearch({'q': 'คอมพิว'}).page()[0]], ['CS101'])
+        self.client.force_login(User.objects.create_user(username='staff', password='pw', is_staff=True))
+        resp = self.client.get(reverse('core:students'), {'q': 'สุดา'})
+        self.assertEqual([s.student_id for s in resp.context['students']], ['kpru1002'])
+
+
+class ReferenceDataCacheTests(TestCase):
+    def setUp(self):
+        self.dept, self.courses = make_catalogue(n_courses=2)
+        self.fac = self.dept.faculty
+        refdata.invalidate()
+        refdata.reset_stats()
+
+    def test_snapshot_hits_after_first_load(self):
+        with self.assertNumQueries(1):
+            refdata.faculties()
+        with self.assertNumQueries(0):
+            self.assertEqual([f.code for f in refdata.faculties()], [self.fac.code])
+        self.assertEqual(refdata.stats()['faculties'], {'hits': 1, 'misses': 1})
+
+    def test_save_invalidates_after_commit(self):
+        refdata.warm()
+        with self.captureOnCommitCallbacks(execute=True):
+            Department.objects.create(code='MTH', name='Mathematics', faculty=self.fac)
+        self.assertIn('MTH', [d.code for d in refdata.departments()])
+        self.assertEqual({c['code'] for c in refdata.department_choices()}, {self.dept.code, 'MTH'})
+
+    def test_reference_pages_skip_queries_once_warm(self):
+        refdata.warm()
+        self.client.get(reverse('core:faculties'))
+        with self.assertNumQueries(0):
+            resp = self.client.get(reverse('core:departments'))
+        self.assertEqual(resp.status_code, 200)
+
+    def test_stats_endpoint_is_staff_only(self):
+        self.client.force_login(User.objects.create_user(username='u', password='pw'))
+        self.assertEqual(self.client.get(reverse('core:refdata_stats')).status_code, 403)
+        self.client.force_login(User.objects.create_user(username='staff', password='pw', is_staff=True))
+        self.assertIn('snapshots', self.client.get(reverse('core:refdata_stats')).json())
+
+
+class HttpCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        httpcache.reset_stats()
+        self.dept, self.courses = make_catalogue()
+
+    def test_anonymous_page_cached_until_catalogue_changes(self):
+        url = reverse('core:faculties')
+        first = self.client.get(url)
+        self.assertTrue(first.has_header('ETag'))
+        self.assertTrue(first.has_header('Last-Modified'))
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second.content, first.content)
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], first['ETag'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Faculty.objects.create(code='ART', name='คณะศิลปกรรม')
+        fresh = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertContains(fresh, 'คณะศิลปกรรม')
+        self.assertEqual(httpcache.stats()['page']['faculty_list'],
+                         {'hits': 1, 'misses': 2, 'not_modified': 1, 'bypassed': 0, 'hit_ratio': 0.5})
+
+    def test_logged_in_users_are_not_served_the_anonymous_page(self):
+        url = reverse('core:departments')
+        anonymous = self.client.get(url)
+        self.client.force_login(User.objects.create_user(username='staff', password='pw', is_staff=True))
+        staff = self.client.get(url)
+        self.assertNotEqual(staff['ETag'], anonymous['ETag'])
+        self.assertContains(staff, '/admin/core/department/')
+        self.assertIn('private', staff['Cache-Control'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=anonymous['ETag']).status_code, 200)
+
+    def test_course_list_follows_seat_changes(self):
+        url = reverse('core:courses')
+        before = self.client.get(url)['ETag']
+        student = make_students(self.dept, 1)[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_seat(student, self.courses[0], 2025, '1')
+        self.assertNotEqual(self.client.get(url)['ETag'], before)
+
+    def test_fragment_skips_its_queries_on_a_hit(self):
+        url = reverse('core:department_detail', args=[self.dept.pk])
+        self.client.get(url)
+        self.client.force_login(User.objects.create_user(username='u', password='pw'))
+        page = self.client.get(url)
+        self.assertContains(page, self.courses[0].code)
+        self.assertEqual(httpcache.stats()['fragment']['department_courses']['hits'], 1)
+
+
+@override_settings(WAITLIST_PROMOTION='inline')
+class StudentTermSummaryTests(TestCase):
+    def setUp(self):
+        self.dept, self.courses = make_catalogue(capacity=10, n_courses=3)
+        self.student = make_students(self.dept, 1)[0]
+
+    def summary(self, year=2025, semester='1'):
+        return StudentTermSummary.objects.get(student=self.student, year=year, semester=semester)
+
+    def test_follows_registration_changes(self):
+        a, b, c = self.courses
+        reserve_seat(self.student, a, 2025, '1')
+        Registration.objects.create(student=self.student, course=b, year=2025, semester='1', units=2, status='DRAFT')
+        self.assertEqual((self.summary().confirmed_units, self.summary().draft_units), (3, 2))
+
+        reserve_seat(self.student, b, 2025, '1')
+        reg = Registration.objects.get(student=self.student, course=a)
+        reg.grade = 'B'
+        reg.save()
+        s = self.summary()
+        self.assertEqual((s.confirmed_units, s.draft_units, s.graded_units, s.gpa), (6, 0, 3, 3.0))
+
+        reg.year = 2024
+        reg.save()
+        self.assertEqual(self.summary().confirmed_units, 3)
+        self.assertEqual(self.summary(year=2024).gpa, 3.0)
+        Registration.objects.filter(course=b).first().delete()
+        self.assertFalse(StudentTermSummary.objects.filter(student=self.student, year=2025).exists())
+
+    def test_cumulative_gpa_and_rebuild(self):
+        for course, (year, grade) in zip(self.courses, [(2024, 'A'), (2025, 'C'), (2025, 'I')]):
+            Registration.objects.create(student=self.student, course=course, year=year, semester='1', units=3, grade=grade)
+        self.assertEqual(summaries.cumulative(self.student), {'graded_units': 6, 'grade_points': 18.0, 'gpa': 3.0})
+        self.assertEqual(summaries.check(), [])
+
+        StudentTermSummary.objects.filter(year=2024).update(confirmed_units=99)
+        StudentTermSummary.objects.filter(year=2025).delete()
+        self.assertEqual(len(summaries.check()), 2)
+        self.assertEqual(summaries.rebuild(), 2)
+        self.assertEqual(summaries.check(), [])
+
+    def test_results_view_reads_rollup(self):
+        Registration.objects.create(student=self.student, course=self.courses[0], year=2025, semester='1', units=3, grade='A')
+        self.client.force_login(User.objects.create_user(username=self.student.student_id, password='pw'))
+        result = self.client.get(reverse('core:results')).context['results'][0]
+        self.assertEqual((result['total_units'], result['gpa']), (3, 4.0))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class RegistryImportTests(TestCase):
+    def setUp(self):
+        self.dept, _ = make_catalogue()
+        refdata.invalidate()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', encoding='utf-8') as fh:
+            fh.write(text)
+        return path
+
+    def test_students_users_and_rejects(self):
+        path = self.write('students.csv', (
+            'student_id,first_name,last_name,department,password\n'
+            '6601,สมชาย,ทองดี,cs,secret\n'
+            '6602,สุดา,ใจงาม,CS,\n'
+            '6603,ไม่มี,สาขา,XX,\n'
+            '6601,ซ้ำ,ซ้ำ,CS,\n'
+            ',ไม่มี,รหัส,CS,\n'
+        ))
+        report = RegistryImporter('students', path, chunk_size=2).run()
+        self.assertEqual(report.imported, 2)
+        self.assertEqual([line for line, _ in report.rejected], [4, 5, 6])
+        self.assertTrue(User.objects.get(username='6601').check_password('secret'))
+        self.assertFalse(User.objects.get(username='6602').has_usable_password())
+        self.assertEqual([s.student_id for s in search.search_students('ใจงาม')], ['6602'])
+        self.assertTrue(RegistryImporter('students', path).run().already_done)
+
+    def test_resumes_after_last_committed_chunk(self):
+        path = self.write('courses.csv', 'code,name,department,units,schedule\n' + ''.join(
+            f'IMP{i},วิชานำเข้า {i},CS,2,Mon 09:00-11:00\n' for i in range(5)
+        ) + 'IMP0,ซ้ำ,CS,4,\n')
+
+        def crash(index, *args):
+            if index == 0:
+                raise RuntimeError('interrupted')
+
+        with self.assertRaises(RuntimeError), self.captureOnCommitCallbacks(execute=True):
+            RegistryImporter('courses', path, chunk_size=2, on_chunk=crash).run()
+        self.assertEqual(Course.objects.filter(code__startswith='IMP').count(), 2)
+        # the committed chunk is already in the reference-data cache
+        self.assertIn('IMP1', [c.code for c in refdata.courses()])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            report = RegistryImporter('courses', path, chunk_size=2).run()
+        self.assertEqual((report.skipped_chunks, report.imported), (1, 3))
+        # IMP0 was imported before the interruption: its repeat on line 7 is still a duplicate
+        self.assertEqual(report.rejected, [(7, 'duplicate code IMP0 in file')])
+        self.assertEqual(Course.objects.filter(code__startswith='IMP', units=2).count(), 5)
+        self.assertEqual(Meeting.objects.filter(course__code__startswith='IMP').count(), 5)
+        self.assertIn('IMP4', [c.code for c in refdata.courses()])
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.dept, self.courses = make_catalogue(capacity=100, n_courses=20)
+
+    def add_registrations(self, n, start=0):
+        students = make_students(self.dept, n // len(self.courses), prefix=f'x{start}-')
+        Registration.objects.bulk_create([
+            Registration(student=s, course=c, year=2025, semester='1', units=3, grade='A')
+            for s in students for c in self.courses
+        ])
+        return students
+
+    def peak_while_streaming(self):
+        tracemalloc.start()
+        try:
+            for _ in exports.stream('registrations', 'ndjson', chunk_size=200):
+                pass
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_memory_stays_flat_as_rows_grow(self):
+        self.add_registrations(1000)
+        small = self.peak_while_streaming()
+        self.add_registrations(7000, start=1)
+        large = self.peak_while_streaming()
+        self.assertEqual(Registration.objects.count(), 8000)
+        self.assertLess(large, small * 1.5)
+
+    def test_views_stream_filtered_rows(self):
+        student = self.add_registrations(20)[0]
+        Registration.objects.filter(course=self.courses[0]).update(year=2024)
+        staff = User.objects.create_user(username='staff', password='pw', is_staff=True)
+        self.client.force_login(staff)
+
+        resp = self.client.get(reverse('core:export_registrations'), {'year': 2025})
+        self.assertTrue(resp.streaming)
+        lines = b''.join(resp.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0].split(',')[:4], ['student_id', 'first_name', 'last_name', 'course_code'])
+        self.assertEqual(len(lines) - 1, 19)
+
+        # invalid filters are ignored instead of failing mid-stream
+        resp = self.client.get(reverse('core:export_registrations'), {'year': 'abc', 'department': 'CS'})
+        self.assertEqual(len(b''.join(resp.streaming_content).decode('utf-8-sig').splitlines()) - 1, 20)
+        # not a decimal id, so a (non-existent) department code
+        resp = self.client.get(reverse('core:export_registrations'), {'department': '²'})
+        self.assertEqual(len(b''.join(resp.streaming_content).decode('utf-8-sig').splitlines()), 1)
+
+        resp = self.client.get(reverse('core:export_class_list', args=[self.courses[1].pk]), {'format': 'ndjson'})
+        self.assertEqual(len(b''.join(resp.streaming_content).splitlines()), 1)
+
+        self.client.force_login(User.objects.create_user(username=student.student_id, password='pw'))
+        self.assertEqual(self.client.get(reverse('core:export_registrations')).status_code, 403)
+        resp = self.client.get(reverse('core:export_transcript', args=[student.pk]))
+        self.assertEqual(len(b''.join(resp.streaming_content).decode('utf-8-sig').splitlines()), 21)
+
+
+@override_settings(WAITLIST_PROMOTION='inline')
+class TermArchiveTests(TestCase):
+    def setUp(self):
+        self.dept, (self.intro, self.lab, self.advanced) = make_catalogue(capacity=10, n_courses=3)
+        self.advanced.prerequisites.add(self.intro)
+        self.student = make_students(self.dept, 1)[0]
+        reserve_seat(self.student, self.intro, 2024, '1')
+        reserve_seat(self.student, self.lab, 2024, '1')
+        self.graded = Registration.objects.get(course=self.intro)
+        self.graded.grade = 'B'
+        self.graded.save()
+
+    def test_archived_grades_still_count(self):
+        gpa_before = summaries.cumulative(self.student)
+        call_command('archive_terms', '2024/1', '--close', '--batch-size', '1', '--pause', '0', stdout=open(os.devnull, 'w'))
+
+        self.assertEqual(Term.objects.get(year=2024, semester='1').status, 'ARCHIVED')
+        self.assertFalse(Registration.objects.filter(pk=self.graded.pk).exists())
+        self.assertEqual(ArchivedRegistration.objects.get().pk, self.graded.pk)
+        # the ungraded row stays live
+        self.assertTrue(Registration.objects.filter(course=self.lab, year=2024).exists())
+        # a move, not a drop: seats, summaries and GPA are untouched
+        self.assertEqual(SeatCounter.objects.get(course=self.intro, year=2024).taken, 1)
+        self.assertEqual(reconcile_seats(year=2024, dry_run=True), [])
+        self.assertEqual(summaries.check(), [])
+        self.assertEqual(summaries.cumulative(self.student), gpa_before)
+
+        self.assertTrue(RegistrationValidator(self.student, 2025, '1').validate([self.advanced.pk])[0].ok)
+        self.assertEqual([r.pk for r in terms.graded_history(self.student)], [self.graded.pk])
+        transcript = list(exports.stream('transcript', 'ndjson', student=self.student.pk))
+        self.assertEqual([json.loads(line)['course_code'] for line in transcript], ['CS100', 'CS101'])
+
+    def test_open_terms_are_not_archived(self):
+        with self.assertRaises(CommandError):
+            call_command('archive_terms', '2024/1')
+        terms.close(2024, '1')
+        # select, insert, the delete's collect + delete, inside a savepoint; the post_delete
+        # handler sees archiving() and adds no seat, waitlist or summary queries
+        with self.assertNumQueries(6):
+            self.assertEqual(terms.archive_batch(2024, '1'), 1)
+        self.assertEqual(terms.archive_batch(2024, '1'), 0)
+
+
+class KeysetListingTests(TestCase):
+    def setUp(self):
+        self.dept, self.courses = make_catalogue(capacity=100, n_courses=3)
+        self.students = make_students(self.dept, 5)
+        for s in self.students:
+            for c in self.courses:
+                Registration.objects.create(student=s, course=c, year=2025, semester='1', units=3,
+                                            grade='A' if c == self.courses[0] else '')
+
+    def walk(self, make_listing):
+        seen, after = [], ''
+        while True:
+            rows, after = make_listing(after).page()
+            seen.extend(rows)
+            if not after:
+                return seen
+
+    def test_registration_pages_cover_everything_once(self):
+        regs = self.walk(lambda after: RegistrationListing({'limit': 4, 'after': after}))
+        self.assertEqual([r.pk for r in regs], list(Registration.objects.order_by('-created_at', '-id').values_list('pk', flat=True)))
+        graded = self.walk(lambda after: RegistrationListing({'limit': 2, 'grade': 'a', 'after': after}))
+        self.assertEqual({r.course_id for r in graded}, {self.courses[0].pk})
+        self.assertEqual(len(graded), 5)
+        by_id = self.walk(lambda after: RegistrationListing({'course': str(self.courses[1].pk), 'after': after}))
+        self.assertEqual(len(by_id), 5)
+        for value in ('²', '9' * 30):
+            self.assertEqual(RegistrationListing({'course': value}).page(), ([], None))
+
+    def test_student_pages_and_counts(self):
+        students = self.walk(lambda after: StudentListing({'limit': 2, 'after': after}))
+        self.assertEqual([s.student_id for s in students], sorted(s.student_id for s in self.students))
+        self.assertEqual(approximate_count(Registration.objects.all(), cap=10), (10, False))
+        self.assertEqual(approximate_count(Registration.objects.filter(course=self.courses[0]), cap=10), (5, True))
+
+    def test_staff_view_filters_and_bad_cursor(self):
+        self.client.force_login(User.objects.create_user(username='staff', password='pw', is_staff=True))
+        resp = self.client.get(reverse('core:registrations'), {'course': self.courses[1].code, 'limit': 3, 'count': 1})
+        self.assertEqual(len(resp.context['registrations']), 3)
+        self.assertEqual(resp.context['total'], (5, True))
+        self.assertIn('after=', resp.context['next_query'])
+        resp = self.client.get(reverse('core:registrations'), {'after': 'garbage'})
+        self.assertRedirects(resp, reverse('core:registrations'))
+
+
+class PerfMiddlewareTests(TestCase):
+    def setUp(self):
+        self.dept, self.courses = make_catalogue(n_courses=3)
+        self.student = make_students(self.dept, 1)[0]
+        self.user = User.objects.create_user(username=self.student.student_id, password='pw')
+        metrics_registry.reset()
+
+    def test_records_view_action_queries_and_templates(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('core:courses'))
+        self.client.post(reverse('core:register'), {'action': 'add_course', 'course': self.courses[0].pk})
+        stats = metrics_registry.snapshot()
+        courses = stats[('core:courses', '-')]
+        self.assertEqual(courses['requests'], 1)
+        self.assertGreater(courses['queries'], 0)
+        self.assertGreater(courses['template_seconds'], 0)
+        self.assertIn(('core:register', 'add_course'), stats)
+
+    def test_repeated_query_shapes_share_a_fingerprint(self):
+        self.assertEqual(fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+                         fingerprint('SELECT  *  FROM t WHERE id IN (%s)'))
+
+    def test_metrics_endpoint_is_staff_only_prometheus_text(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('core:courses'))
+        self.assertEqual(self.client.get(reverse('core:metrics')).status_code, 403)
+        self.client.force_login(User.objects.create_user(username='staff', password='pw', is_staff=True))
+        body = self.client.get(reverse('core:metrics')).content.decode()
+        self.assertIn('# TYPE kanitha_request_duration_seconds histogram', body)
+        self.assertIn('kanitha_request_queries_count{view="core:courses",action="-"} 1', body)
+
+
+class PrerequisiteGraphTests(TestCase):
+    def test_closure_order_and_cycles(self):
+        # 4 <- 3 <- 2 <- 1 chain, plus a 5 <-> 6 loop and 7 requiring 6
+        graph = PrerequisiteGraph(range(1, 8), [(2, 1), (3, 2), (4, 3), (5, 6), (6, 5), (7, 6)])
+        self.assertEqual(graph.prerequisites(4, transitive=True), [1, 2, 3])
+        self.assertEqual(graph.prerequisites(4), [3])
+        order = graph.order
+        self.assertLess(order.index(1), order.index(2))
+        self.assertLess(order.index(3), order.index(4))
+        self.assertEqual(graph.cycles, [[5, 6]])
+        self.assertEqual(graph.prerequisites(7, transitive=True), [5, 6])
+
+        result = graph.eligibility(graph.mask([1, 2]))
+        self.assertTrue(result[3][0])
+        self.assertEqual(result[4], (False, [3], [3]))
+        self.assertFalse(result[5][0])
+
+    def test_cached_graph_follows_m2m_and_marks_registration_page(self):
+        dept, (base, advanced) = make_catalogue(n_courses=2)
+        student = make_students(dept, 1)[0]
+        refdata.invalidate()
+        with self.captureOnCommitCallbacks(execute=True):
+            advanced.prerequisites.add(base)
+        graph = refdata.prerequisite_graph()
+        self.assertEqual(graph.prerequisites(advanced.pk), [base.pk])
+        with self.assertNumQueries(1):
+            self.assertFalse(eligibility_for(student, refdata.prerequisite_graph())[advanced.pk][0])
+
+        self.client.force_login(User.objects.create_user(username=student.student_id, password='pw'))
+        rows = dict((c.id, missing) for c, missing in self.client.get(reverse('core:register')).context['course_rows'])
+        self.assertEqual(rows, {base.pk: None, advanced.pk: base.code})
+
+        Registration.objects.create(student=student, course=base, year=2024, semester='1', units=3, grade='B')
+        self.assertTrue(eligibility_for(student, graph)[advanced.pk][0])
+
+
+@override_settings(WAITLIST_PROMOTION='inline')
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.dept, self.courses = make_catalogue(capacity=2, n_courses=3)
+        self.student = make_students(self.dept, 1)[0]
+        self.user = User.objects.create_user(username=self.student.student_id, password='pw')
+        reserve_seat(self.student, self.courses[0], 2025, '1')
+        self.factory = AsyncRequestFactory()
+
+    def _request(self, path, params=None, user=None):
+        request = self.factory.get(path, params or {})
+
+        async def auser():
+            return user
+        request.auser = auser
+        StudentMiddleware(lambda r: None).process_request(request)
+        return request
+
+    async def test_course_search_matches_sync_view(self):
+        response = await async_views.course_search(self._request('/courses/search/', {'limit': 2}))
+        expected = await sync_to_async(self.client.get)(reverse('core:course_search'), {'limit': 2})
+        self.assertEqual(json.loads(response.content), expected.json())
+        self.assertEqual(json.loads(response.content)['results'][0]['seats_left'], 1)
+
+    async def test_seat_availability(self):
+        ids = f'{self.courses[0].pk},{self.courses[1].pk},99999'
+        response = await async_views.seat_availability(self._request('/courses/seats/', {'ids': ids}))
+        seats = json.loads(response.content)['seats']
+        self.assertEqual(seats[str(self.courses[0].pk)]['left'], 1)
+        self.assertEqual(seats[str(self.courses[1].pk)]['left'], 2)
+        self.assertNotIn('99999', seats)
+        expected = await sync_to_async(self.client.get)(reverse('core:seat_availability'), {'ids': ids})
+        self.assertEqual(expected.json()['seats'], seats)
+
+    async def test_results_view(self):
+        await Registration.objects.filter(student=self.student).aupdate(grade='A')
+        response = await async_views.results_view(self._request('/results/', user=self.user))
+        self.assertContains(response, self.courses[0].code)
+        anonymous = await async_views.results_view(self._request('/results/', user=AnonymousUser()))
+        self.assertEqual(anonymous.status_code, 302)
+
+    @override_settings(ASYNC_WRITE_WORKERS=0)
+    async def test_register_and_drop_json(self):
+        metrics_registry.reset()
+        await self.async_client.aforce_login(self.user)
+        url = reverse('core:register_json')
+        course = self.courses[1]
+        response = await self.async_client.post(url, {'action': 'register', 'course': course.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((await SeatCounter.objects.aget(course=course)).taken, 1)
+        again = await self.async_client.post(url, {'action': 'register', 'course': course.pk})
+        self.assertEqual(again.status_code, 409)
+        await self.async_client.post(url, {'action': 'drop', 'course': course.pk})
+        self.assertEqual((await SeatCounter.objects.aget(course=course)).taken, 0)
+        self.assertEqual(metrics_registry.snapshot()[('core:register_json', 'register')]['requests'], 2)
+
+
+@override_settings(WAITLIST_PROMOTION='inline')
+class SeatFeedTests(TestCase):
+    def setUp(self):
+        self.dept, self.courses = make_catalogue(capacity=2, n_courses=2)
+        self.student = make_students(self.dept, 1)[0]
+        self.ids = [c.pk for c in self.courses]
+
+    def test_in_process_broker_fans_out(self):
+        broker = pubsub.InProcessBroker()
+        first, second = broker.subscribe('seats:2025:1'), broker.subscribe('seats:2025:1')
+        self.assertEqual(broker.publish('seats:2025:1', {'course': 1}), 2)
+        self.assertEqual(first.get(timeout=0.1), {'course': 1})
+        self.assertEqual(second.get(timeout=0.1), {'course': 1})
+        first.close()
+        self.assertEqual(broker.publish('seats:2025:1', {'course': 2}), 1)
+        self.assertIsNone(first.get(timeout=0.01))
+
+    def test_confirm_and_drop_publish_after_commit(self):
+        sub = pubsub.broker().subscribe(seatfeed.channel(2025, '1'))
+        self.addCleanup(sub.close)
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_seat(self.student, self.courses[0], 2025, '1')
+        self.assertEqual(sub.get(timeout=0.1), {'course': self.ids[0], 'code': 'CS100', 'capacity': 2, 'taken': 1, 'left': 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            Registration.objects.filter(student=self.student).delete()
+        self.assertEqual(sub.get(timeout=0.1)['left'], 2)
+        # drafts do not move seats
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Registration.objects.create(student=self.student, course=self.courses[1], year=2025, semester='1', units=3, status='DRAFT')
+        self.assertEqual(callbacks, [])
+
+    def test_stream_sends_snapshot_then_changes_for_its_courses(self):
+        events = seatfeed.stream(self.ids[:1], 2025, '1')
+        self.assertTrue(next(events).startswith('retry:'))
+        self.assertIn('"left":2', next(events))
+        channel = seatfeed.channel(2025, '1')
+        pubsub.broker().publish(channel, {'course': self.ids[1], 'left': 0})  # not followed
+        pubsub.broker().publish(channel, {'course': self.ids[0], 'left': 1})
+        self.assertEqual(next(events), 'event: seats\ndata: {"course":%d,"left":1}\n\n' % self.ids[0])
+        events.close()
+        self.assertEqual(pubsub.broker().subscriber_count(channel), 0)
+
+    def test_feed_view(self):
+        response = self.client.get(reverse('core:seat_feed'), {'ids': ''})
+        self.assertEqual(response.status_code, 400)
+        with override_settings(SEAT_FEED_MAX_SECONDS=0):
+            response = self.client.get(reverse('core:seat_feed'), {'ids': self.ids[0]})
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            body = b''.join(response.streaming_content).decode()
+        self.assertIn('event: snapshot', body)
+
+
+@override_settings(WAITLIST_PROMOTION='inline')
+class WaitlistTests(TestCase):
+    def setUp(self):
+        self.dept, (self.course, self.other) = make_catalogue(capacity=1, n_courses=2)
+        self.holder, self.first, self.second = make_students(self.dept, 3)
+        reserve_seat(self.holder, self.course, 2025, '1')
+
+    def test_background_worker_retries_locked_promotions(self):
+        worker = waitlist.PromotionWorker()
+        calls = []
+
+        def flaky(*section):
+            calls.append(section)
+            if len(calls) == 1:
+                raise OperationalError('database table is locked: core_course')
+            return []
+
+        with mock.patch.object(waitlist, 'promote', flaky), mock.patch.object(waitlist, 'PROMOTION_RETRY_DELAY', 0), \
+                self.assertLogs('core.waitlist', 'WARNING'):
+            worker.schedule((self.course.pk, 2025, '1'))
+            self.assertTrue(worker.drain())
+        self.assertEqual(calls, [(self.course.pk, 2025, '1')] * 2)
+
+    def test_full_section_joins_waitlist_and_drop_promotes_head(self):
+        for student in (self.first, self.second):
+            self.client.force_login(User.objects.create_user(username=student.student_id, password='pw'))
+            self.client.post(reverse('core:register'), {'action': 'register', 'course': self.course.pk, 'year': 2025, 'semester': '1'})
+        queued = list(Waitlist.objects.filter(course=self.course).order_by('id').values_list('student_id', flat=True))
+        self.assertEqual(queued, [self.first.pk, self.second.pk])
+        self.assertEqual(waitlist.position(Waitlist.objects.get(student=self.second)), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Registration.objects.filter(student=self.holder).delete()
+        self.assertTrue(Registration.objects.filter(student=self.first, course=self.course, status='CONFIRMED').exists())
+        self.assertEqual(Waitlist.objects.get(student=self.first).status, 'PROMOTED')
+        self.assertEqual(Waitlist.objects.get(student=self.second).status, 'WAITING')
+        self.assertEqual(SeatCounter.objects.get(course=self.course).taken, 1)
+
+    def test_ineligible_head_is_skipped(self):
+        waitlist.join(self.first, self.course, 2025, '1')
+        waitlist.join(self.second, self.course, 2025, '1')
+        # the head now lacks a prerequisite
+        self.course.prerequisites.add(self.other)
+        Registration.objects.create(student=self.second, course=self.other, year=2024, semester='2', units=3, grade='B')
+        with self.captureOnCommitCallbacks(execute=True):
+            Registration.objects.filter(student=self.holder).delete()
+        head = Waitlist.objects.get(student=self.first)
+        self.assertEqual(head.status, 'SKIPPED')
+        self.assertIn(self.other.code, head.note)
+        self.assertEqual(Waitlist.objects.get(student=self.second).status, 'PROMOTED')
+
+
+@override_settings(WAITLIST_PROMOTION='background')
+class WaitlistChurnTests(TransactionTestCase):
+    """
+    Heavy drop/add churn on one section through the background promotion worker: seats go
+    to waitlisted students strictly in join order, never past capacity. (In-memory SQLite
+    locks whole tables across threads, so each drop waits for its promotion to finish.)
+    """
+    CAPACITY = 5
+    STUDENTS = 50
+
+    def test_churn_promotes_in_fifo_order(self):
+        dept, (course,) = make_catalogue(capacity=self.CAPACITY)
+        students = make_students(dept, self.STUDENTS)
+        for s in students[:self.CAPACITY]:
+            reserve_seat(s, course, 2025, '1')
+        late = students[self.CAPACITY * 4:]
+        for s in students[self.CAPACITY:self.CAPACITY * 4]:
+            waitlist.join(s, course, 2025, '1')
+
+        t0 = time.perf_counter()
+        drops = 0
+        while Waitlist.objects.filter(status='WAITING').exists() or late:
+            if late:
+                # new students keep joining the back of the queue
+                waitlist.join(late.pop(0), course, 2025, '1')
+            reg = Registration.objects.filter(course=course, status='CONFIRMED').order_by('?').first()
+            reg.delete()
+            drops += 1
+            self.assertTrue(waitlist.worker.drain())
+            self.assertEqual(SeatCounter.objects.get(course=course).taken, self.CAPACITY)
+        elapsed = time.perf_counter() - t0
+
+        joined = list(Waitlist.objects.order_by('id').values_list('student_id', flat=True))
+        promoted = list(Waitlist.objects.filter(status='PROMOTED').order_by('updated_at', 'id').values_list('student_id', flat=True))
+        self.assertEqual(promoted, joined)
+        self.assertEqual(Registration.objects.filter(course=course, status='CONFIRMED').count(), self.CAPACITY)
+        self.assertGreater(len(promoted) / elapsed, 5, f'{len(promoted)} promotions after {drops} drops in {elapsed:.2f}s')
+
+
+@tasks.task(name='test_always_fails', max_attempts=2)
+def _always_fails():
+    raise RuntimeError('boom')
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        self.dept, self.courses = make_catalogue(capacity=5, n_courses=3)
+        (self.student,) = make_students(self.dept, 1)
+        self.user = User.objects.create_user(username=self.student.student_id, password='pw')
+
+    def test_key_deduplicates_in_flight_jobs(self):
+        first = tasks.enqueue('rebuild_term_summaries', key='rebuild')
+        self.assertEqual(tasks.enqueue('rebuild_term_summaries', key='rebuild').pk, first.pk)
+        call_command('run_workers', '--once', '--threads', '1', stdout=open(os.devnull, 'w'))
+        first.refresh_from_db()
+        self.assertEqual(first.status, 'DONE')
+        # finished work can be queued again
+        self.assertNotEqual(tasks.enqueue('rebuild_term_summaries', key='rebuild').pk, first.pk)
+
+    def test_failing_job_is_retried_then_failed(self):
+        job = tasks.enqueue('test_always_fails')
+        worker = tasks.Worker(threads=1)
+        self.assertEqual(worker.run(once=True), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('QUEUED', 1))
+        self.assertIn('boom', job.error)
+        # backed off: not due yet
+        self.assertEqual(tasks.Worker(threads=1).run(once=True), 0)
+        Job.objects.filter(pk=job.pk).update(run_after=job.created_at)
+        tasks.Worker(threads=1).run(once=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('FAILED', 2))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_expired_lease_is_claimed_again(self):
+        job = tasks.enqueue('rebuild_term_summaries')
+        claimed = tasks.backend().claim('dead-worker')
+        self.assertEqual(claimed.pk, job.pk)
+        with override_settings(TASK_LEASE_SECONDS=0):
+            again = tasks.backend().claim('live-worker')
+        self.assertEqual((again.pk, again.worker, again.attempts), (job.pk, 'live-worker', 2))
+
+    @override_settings(TASK_INLINE_LIMIT=2)
+    def test_large_selection_is_queued_and_reported(self):
+        self.client.force_login(self.user)
+        ids = [c.pk for c in self.courses]
+        resp = self.client.post(reverse('core:register'), {'action': 'register_selected', 'course_ids': ids})
+        self.assertEqual(resp.status_code, 302)
+        job = Job.objects.get(name='register_selected')
+        self.assertEqual((job.status, job.user_id), ('QUEUED', self.user.pk))
+        self.assertFalse(Registration.objects.filter(student=self.student).exists())
+        self.assertEqual(self.client.get(reverse('core:job_status', args=[job.pk])).json()['status'], 'QUEUED')
+
+        tasks.Worker(threads=1).run(once=True)
+        job.refresh_from_db()
+        self.assertEqual(sorted(job.result['registered']), sorted(c.code for c in self.courses))
+        self.assertEqual(Registration.objects.filter(student=self.student, status='CONFIRMED').count(), 3)
+
+        page = self.client.get(reverse('core:register'))
+        self.assertTrue(any('ลงทะเบียนเรียบร้อย' in str(m) for m in page.context['messages']))
+        self.assertNotIn('registration_job', self.client.session)
+
+        other = User.objects.create_user(username='someone', password='pw')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(reverse('core:job_status', args=[job.pk])).status_code, 404)
+
+
+class DatabaseProfileTests(SimpleTestCase):
+    def test_profiles(self):
+        dbs, routers = database_settings('sqlite', Path('/srv'), {})
+        self.assertEqual(dbs['default']['PRAGMAS']['journal_mode'], 'WAL')
+        self.assertEqual(dbs['default']['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        self.assertEqual(routers, [])
+        self.assertNotIn('PRAGMAS', database_settings('sqlite-plain', Path('/srv'), {})[0]['default'])
+
+        dbs, routers = database_settings('postgres', Path('/srv'), {
+            'DATABASE_URL': 'postgres://reg:p%40ss@db:5433/kanitha',
+            'DATABASE_REPLICA_URL': 'postgres://reg@replica/kanitha',
+        })
+        self.assertEqual((dbs['default']['HOST'], dbs['default']['PORT'], dbs['default']['PASSWORD']), ('db', '5433', 'p@ss'))
+        self.assertEqual((dbs['default']['CONN_MAX_AGE'], dbs['default']['CONN_HEALTH_CHECKS']), (60, True))
+        self.assertEqual(dbs['replica']['TEST'], {'MIRROR': 'default'})
+        self.assertEqual(routers, ['core.db.ReadReplicaRouter'])
+
+        pooled = database_settings('postgres', Path('/srv'), {'DB_POOL': '1', 'DB_POOL_MAX': '20'})[0]['default']
+        self.assertEqual((pooled['CONN_MAX_AGE'], pooled['OPTIONS']['pool']['max_size']), (0, 20))
+        with self.assertRaises(ValueError):
+            database_settings('mysql', Path('/srv'), {})
+
+    def test_replica_router(self):
+        router = ReadReplicaRouter()
+        self.assertEqual(router.db_for_read(Course), 'default')  # no replica configured
+        with mock.patch.dict(connections.settings, {'replica': {}}):
+            # only views that opt in read from the replica; a lookup before a write never does
+            self.assertEqual(router.db_for_read(Course), 'default')
+            self.assertEqual(router.db_for_read(Registration), 'default')
+            with replica_reads():
+                self.assertEqual(router.db_for_read(Course), 'replica')
+                self.assertEqual(router.db_for_read(Registration), 'replica')
+            self.assertEqual(router.db_for_write(Course), 'default')
+            self.assertFalse(router.allow_migrate('replica', 'core'))
+
+
+class QueryPlanTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        scans = {name: tables for name, _, tables in queryplans.check() if tables}
+        self.assertEqual(scans, {})
+
+    def test_full_scan_is_detected(self):
+        plan = queryplans.explain(Student.objects.filter(address='x'))
+        self.assertEqual(queryplans.full_scans(plan), ['core_student'])
+        with self.assertRaises(CommandError):
+            with mock.patch.dict(queryplans.HOT_QUERIES, {'by_address': lambda: Student.objects.filter(address='x')}):
+                call_command('check_query_plans', 'by_address', stdout=open(os.devnull, 'w'))
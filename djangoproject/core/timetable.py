@@ -0,0 +1,164 @@
+import bisect
+import heapq
+import re
+from collections import defaultdict
+
+from .models import Course, Meeting, Registration
+
+DAY_NAMES = {
+    'mon': 0, 'monday': 0, 'จ': 0, 'จันทร์': 0,
+    'tue': 1, 'tuesday': 1, 'อ': 1, 'อังคาร': 1,
+    'wed': 2, 'wednesday': 2, 'พ': 2, 'พุธ': 2,
+    'thu': 3, 'thursday': 3, 'พฤ': 3, 'พฤหัส': 3, 'พฤหัสบดี': 3,
+    'fri': 4, 'friday': 4, 'ศ': 4, 'ศุกร์': 4,
+    'sat': 5, 'saturday': 5, 'ส': 5, 'เสาร์': 5,
+    'sun': 6, 'sunday': 6, 'อา': 6, 'อาทิตย์': 6,
+}
+
+_TOKEN_RE = re.compile(r'^\s*(\S+)\s+(\d{1,2})[:.](\d{2})\s*[-–]\s*(\d{1,2})[:.](\d{2})\s*$')
+
+
+def parse_schedule(schedule_str):
+    """
+    Parse a schedule string like "Mon 09:00-11:00,Wed 13:00-15:00" into a list of
+    (day, start_minute, end_minute). Tokens that cannot be parsed are skipped.
+    """
+    slots = []
+    if not schedule_str:
+        return slots
+    for token in schedule_str.split(','):
+        m = _TOKEN_RE.match(token)
+        if not m:
+            continue
+        day = DAY_NAMES.get(m.group(1).lower().rstrip('.'))
+        if day is None:
+            continue
+        start = int(m.group(2)) * 60 + int(m.group(3))
+        end = int(m.group(4)) * 60 + int(m.group(5))
+        if end <= start:
+            continue
+        slots.append((day, start, end))
+    return slots
+
+
+def sync_meetings(course):
+    """
+    Rebuild the Meeting rows of one course from its schedule string.
+    """
+    Meeting.objects.filter(course=course).delete()
+    Meeting.objects.bulk_create([
+        Meeting(course=course, day=day, start_minute=start, end_minute=end)
+        for day, start, end in parse_schedule(course.schedule)
+    ])
+
+
+def sync_meetings_bulk(courses, batch_size=1000):
+    """
+    sync_meetings() for many courses in two queries (used by bulk imports, which send no signals).
+    """
+    courses = list(courses)
+    Meeting.objects.filter(course_id__in=[c.pk for c in courses]).delete()
+    Meeting.objects.bulk_create([
+        Meeting(course_id=c.pk, day=day, start_minute=start, end_minute=end)
+        for c in courses
+        for day, start, end in parse_schedule(c.schedule)
+    ], batch_size=batch_size)
+
+
+def load_meetings(course_ids):
+    """
+    Return {course_id: [(day, start, end), ...]} for the given courses in one query.
+    """
+    out = defaultdict(list)
+    rows = Meeting.objects.filter(course_id__in=set(course_ids)).values_list('course_id', 'day', 'start_minute', 'end_minute')
+    for course_id, day, start, end in rows:
+        out[course_id].append((day, start, end))
+    return out
+
+
+class TimetableIndex:
+    """
+    Per-day interval index of weekly slots.
+
+    Each day keeps its slots sorted by start minute, plus the longest slot length seen,
+    so an overlap query only has to look at the slots starting in (start - longest, end):
+    a bisect plus a short scan instead of comparing against every slot.
+    """
+
+    def __init__(self):
+        self._days = defaultdict(list)    # day -> sorted [(start, end, key)]
+        self._longest = defaultdict(int)  # day -> max slot length
+
+    def add(self, key, slots):
+        for day, start, end in slots:
+            bisect.insort(self._days[day], (start, end, key))
+            self._longest[day] = max(self._longest[day], end - start)
+
+    def conflicts(self, slots):
+        """
+        Return the set of keys whose slots overlap any of the given slots.
+        """
+        found = set()
+        for day, start, end in slots:
+            items = self._days.get(day)
+            if not items:
+                continue
+            lowest = start - self._longest[day]
+            i = bisect.bisect_left(items, (end,)) - 1
+            while i >= 0 and items[i][0] > lowest:
+                s, e, key = items[i]
+                if s < end and e > start:
+                    found.add(key)
+                i -= 1
+        return found
+
+
+def find_clashes(timetable):
+    """
+    Sort-and-sweep over {key: [(day, start, end), ...]}: return the set of clashing
+    (key_a, key_b) pairs with key_a < key_b. O(n log n + clashes).
+    """
+    by_day = defaultdict(list)
+    for key, slots in timetable.items():
+        for day, start, end in slots:
+            by_day[day].append((start, end, key))
+
+    pairs = set()
+    for items in by_day.values():
+        items.sort()
+        active = []  # heap of (end, key)
+        for start, end, key in items:
+            while active and active[0][0] <= start:
+                heapq.heappop(active)
+            for _, other in active:
+                if other != key:
+                    pairs.add((min(other, key), max(other, key)))
+            heapq.heappush(active, (end, key))
+    return pairs
+
+
+def term_clash_report(year, semester):
+    """
+    Find every timetable clash among CONFIRMED registrations for one term.
+    Three queries in total; returns {student_id: [(course_code_a, course_code_b), ...]}.
+    """
+    regs = list(
+        Registration.objects.filter(year=year, semester=str(semester), status='CONFIRMED')
+        .values_list('student__student_id', 'course_id')
+    )
+    meetings = load_meetings({course_id for _, course_id in regs})
+    codes = dict(Course.objects.filter(pk__in=meetings.keys()).values_list('pk', 'code')) if meetings else {}
+
+    per_student = defaultdict(dict)
+    for student_id, course_id in regs:
+        if course_id in meetings:
+            per_student[student_id][course_id] = meetings[course_id]
+
+    report = {}
+    for student_id, timetable in per_student.items():
+        if len(timetable) < 2:
+            continue
+        pairs = find_clashes(timetable)
+        if pairs:
+            report[student_id] = sorted((codes.get(a, a), codes.get(b, b)) for a, b in pairs)
+    return report
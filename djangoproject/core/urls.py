@@ -1,22 +1,37 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 from django.contrib.auth import views as auth_views
 
 app_name = 'core'
 
+# under ASGI the read-heavy endpoints are served by their async versions (see lukwaproject/asgi.py)
+read_views = async_views if getattr(settings, 'ASYNC_VIEWS', False) else views
+
 urlpatterns = [
     path('', views.index, name='index'),
     path('faculties/', views.faculty_list, name='faculties'),
     path('faculties/<int:pk>/', views.faculty_detail, name='faculty_detail'),
     path('departments/', views.department_list, name='departments'),
     path('departments/<int:pk>/', views.department_detail, name='department_detail'),
-    path('courses/', views.course_list, name='courses'),
+    path('courses/', read_views.course_list, name='courses'),
+    path('courses/search/', read_views.course_search, name='course_search'),
+    path('courses/seats/', read_views.seat_availability, name='seat_availability'),
+    path('courses/seats/stream/', read_views.seat_feed, name='seat_feed'),
     path('courses/<int:pk>/', views.course_detail, name='course_detail'),
     path('students/', views.student_list, name='students'),
     path('students/<int:pk>/', views.student_profile, name='student_profile'),
     path('register/', views.registration_create, name='register'),
+    path('register/json/', async_views.register_course, name='register_json'),
     path('registrations/', views.registration_list, name='registrations'),
-    path('results/', views.results_view, name='results'),
+    path('results/', read_views.results_view, name='results'),
+    path('export/registrations/', views.export_registrations, name='export_registrations'),
+    path('export/courses/<int:pk>/classlist/', views.export_class_list, name='export_class_list'),
+    path('export/students/<int:pk>/transcript/', views.export_transcript, name='export_transcript'),
+    path('refdata/stats/', views.refdata_stats, name='refdata_stats'),
+    path('metrics/', views.metrics, name='metrics'),
+    path('jobs/', views.job_enqueue, name='job_enqueue'),
+    path('jobs/<int:pk>/', views.job_status, name='job_status'),
 
     # Authentication
     path('login/', auth_views.LoginView.as_view(template_name='login.html'), name='login'),
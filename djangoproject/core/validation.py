@@ -0,0 +1,163 @@
+from django.db.models import Count
+
+from . import terms
+from .models import Course, Registration
+from .timetable import TimetableIndex, load_meetings
+
+MIN_CREDITS = 9
+# Enforce project requirement: maximum 23 credits per semester
+MAX_CREDITS = 23
+
+
+class Verdict:
+    """
+    Result of validating one course for a student/term.
+    `reasons` is a list of (code, message) pairs; codes are stable identifiers
+    (not_found, already_registered, prerequisite, full, clash, credits).
+    """
+
+    def __init__(self, course_id, course=None):
+        self.course_id = course_id
+        self.course = course
+        self.reasons = []
+        self.clashes_with = []
+
+    @property
+    def ok(self):
+        return not self.reasons
+
+    @property
+    def codes(self):
+        return [code for code, _ in self.reasons]
+
+    def reject(self, code, message):
+        self.reasons.append((code, message))
+
+    def __repr__(self):
+        return f"<Verdict course={self.course_id} ok={self.ok} reasons={self.codes}>"
+
+
+class RegistrationValidator:
+    """
+    Validate registration requests for one student and term with a constant number of queries:
+
+    1. courses by id (in_bulk; none when the caller passes them all in)
+    2. prerequisite edges from the M2M through table
+    3. confirmed seat counts per course (one grouped query)
+    4. courses the student has passed (live and archived terms, one UNION)
+    5. the student's confirmed registrations this term
+    6. weekly meetings of all those courses (for clash detection)
+
+    Seat counts here are advisory (they let us show "full" early); the authoritative capacity
+    check is still core.seats.reserve_seat().
+    """
+
+    def __init__(self, student, year, semester, max_credits=MAX_CREDITS):
+        self.student = student
+        self.year = year
+        self.semester = str(semester)
+        self.max_credits = max_credits
+        self.courses = {}
+        self.prerequisites = {}
+        self.confirmed_counts = {}
+        self.passed = set()
+        self.confirmed = []
+        self.meetings = {}
+
+    def load(self, course_ids, courses=None):
+        ids = set(self._ints(course_ids))
+        # courses the caller already holds (e.g. the request's Cart) are not fetched again
+        known = {pk: c for pk, c in (courses or {}).items() if pk in ids}
+        self.courses = {**known, **Course.objects.in_bulk(ids - known.keys())} if ids - known.keys() else known
+
+        self.prerequisites = {}
+        through = Course.prerequisites.through
+        edges = through.objects.filter(from_course_id__in=ids).values_list('from_course_id', 'to_course_id', 'to_course__code')
+        for course_id, pre_id, pre_code in edges:
+            self.prerequisites.setdefault(course_id, []).append((pre_id, pre_code))
+
+        self.confirmed_counts = dict(
+            Registration.objects.filter(course_id__in=ids, year=self.year, semester=self.semester, status='CONFIRMED')
+            .values('course_id').annotate(n=Count('id')).values_list('course_id', 'n')
+        )
+
+        if self.student is not None:
+            self.passed = set(terms.passed_course_ids(self.student))
+            self.confirmed = list(
+                Registration.objects.filter(student=self.student, year=self.year, semester=self.semester, status='CONFIRMED')
+                .select_related('course')
+            )
+        else:
+            self.passed = set()
+            self.confirmed = []
+        self.meetings = load_meetings(ids | {r.course_id for r in self.confirmed})
+        return self
+
+    def validate(self, course_ids, cart_ids=(), courses=None):
+        """
+        Return one Verdict per entry in course_ids (in order).
+
+        Courses are checked cumulatively: each accepted course counts toward the credit total
+        and clash set of the ones after it. `cart_ids` are courses already held in the cart;
+        they count toward credits/clashes but are not validated themselves. `courses` is an
+        optional {pk: Course} of already loaded courses.
+        """
+        course_ids = list(course_ids)
+        cart_ids = list(cart_ids)
+        self.load(course_ids + cart_ids, courses)
+
+        registered_ids = {r.course_id for r in self.confirmed}
+        checking = set(self._ints(course_ids))
+        cart_courses = [
+            self.courses[cid] for cid in dict.fromkeys(self._ints(cart_ids))
+            if cid in self.courses and cid not in registered_ids and cid not in checking
+        ]
+        units = sum(r.units for r in self.confirmed) + sum(c.units for c in cart_courses)
+        busy = TimetableIndex()
+        for c in [r.course for r in self.confirmed] + cart_courses:
+            busy.add(c.pk, self.meetings.get(c.pk, ()))
+
+        verdicts = []
+        for raw in course_ids:
+            try:
+                cid = int(raw)
+            except (TypeError, ValueError):
+                cid = raw
+            course = self.courses.get(cid)
+            verdict = Verdict(cid, course)
+            verdicts.append(verdict)
+            if course is None:
+                verdict.reject('not_found', f'ไม่พบวิชา id={raw}')
+                continue
+            if cid in registered_ids:
+                verdict.reject('already_registered', f'คุณได้ลงทะเบียนแล้ว: {course.code}')
+                continue
+
+            missing = [code for pre_id, code in self.prerequisites.get(cid, []) if pre_id not in self.passed]
+            if missing:
+                verdict.reject('prerequisite', f"ยังไม่ได้ผ่าน prerequisite สำหรับ {course.code}: {', '.join(missing)}")
+            if self.confirmed_counts.get(cid, 0) >= course.capacity:
+                verdict.reject('full', f"กลุ่มเต็ม: {course.code} ({course.capacity} คน)")
+            slots = self.meetings.get(cid, ())
+            clashes = busy.conflicts(slots)
+            if clashes:
+                verdict.clashes_with = sorted(clashes)
+                verdict.reject('clash', f"เวลาเรียนชนกันสำหรับ {course.code}")
+            if units + course.units > self.max_credits:
+                verdict.reject('credits', f"เกินหน่วยกิตสูงสุด ({self.max_credits}) หากเพิ่ม {course.code} จะเป็น {units + course.units} หน่วยกิต")
+
+            if verdict.ok:
+                units += course.units
+                busy.add(cid, slots)
+                registered_ids.add(cid)
+        return verdicts
+
+    @staticmethod
+    def _ints(values):
+        out = []
+        for v in values:
+            try:
+                out.append(int(v))
+            except (TypeError, ValueError):
+                continue
+        return out
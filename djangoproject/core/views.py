@@ -1,26 +1,24 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import HttpResponse, JsonResponse, HttpResponseForbidden, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
+from django.conf import settings
 from django.db.utils import OperationalError
-from .models import Faculty, Department, Course, Student, Registration
+from .models import Faculty, Department, Course, Student, Registration, Job, COURSE_STATUS, GRADE_CHOICES
+from .seats import reserve_seat, availability as seat_availability_of
+from .catalogue import CourseSearch, InvalidCursor, course_as_dict, DEFAULT_SEMESTER, DEFAULT_YEAR, MAX_PAGE_SIZE, int_or_none
+from .listing import RegistrationListing, StudentListing, approximate_count
+from . import exports, httpcache, prereqs, refdata, search, seatfeed, summaries, tasks, terms, waitlist
+from .metrics import registry as metrics_registry
+from .validation import RegistrationValidator
+from .cart import Cart
+from .db import reads_from_replica
+from .httpcache import CATALOGUE, SEATS, cached_page
 from django.contrib import messages
 from django.contrib.auth import login, logout
 from django.contrib.auth.models import User
 
-PASSING_GRADES = {'A', 'B', 'C', 'D'}
-MIN_CREDITS = 9
-# Enforce project requirement: maximum 23 credits per semester
-MAX_CREDITS = 23
-
-def _parse_schedule_tokens(schedule_str):
-    """
-    Very small helper: split schedule by comma and strip.
-    Example token: "Mon 09:00-11:00"
-    Return set of tokens for naive clash detection.
-    """
-    if not schedule_str:
-        return set()
-    return {t.strip() for t in schedule_str.split(',') if t.strip()}
-
+@cached_page(CATALOGUE)
+@reads_from_replica
 def index(request):
     """
     Public home page: handle missing DB gracefully.
@@ -40,9 +38,9 @@ def index(request):
             {'title': 'สอบกลางภาค', 'date': '2025-10-30'},
         ]
 
-        faculties = list(Faculty.objects.all()[:6])
-        departments = list(Department.objects.select_related('faculty').all()[:8])
-        courses = list(Course.objects.select_related('department').all()[:8])
+        faculties = list(refdata.faculties()[:6])
+        departments = list(refdata.departments()[:8])
+        courses = list(refdata.courses()[:8])
     except OperationalError:
         db_error = True
         announcements = news = events = []
@@ -60,10 +58,12 @@ def index(request):
     return render(request, 'index.html', context)
 
 
+@cached_page(CATALOGUE)
+@reads_from_replica
 def faculty_list(request):
     db_error = False
     try:
-        faculties = list(Faculty.objects.all())
+        faculties = list(refdata.faculties())
     except OperationalError:
         db_error = True
         faculties = []
@@ -82,10 +82,12 @@ def faculty_list(request):
     return render(request, 'faculties.html', {'faculties': faculties, 'db_error': db_error})
 
 
+@cached_page(CATALOGUE)
+@reads_from_replica
 def department_list(request):
     db_error = False
     try:
-        departments = list(Department.objects.select_related('faculty').all())
+        departments = list(refdata.departments())
     except OperationalError:
         db_error = True
         departments = []
@@ -133,16 +135,34 @@ def department_list(request):
     return render(request, 'departments.html', {'departments': departments, 'db_error': db_error})
 
 
+# the cards show seats left, so the page also changes with every seat taken or freed
+@cached_page(CATALOGUE, SEATS)
+@reads_from_replica
 def course_list(request):
+    """
+    Catalogue page: renders only the first page of the (server-side filtered) results;
+    the template fetches further pages from course_search as the user scrolls/searches.
+    """
     db_error = False
+    search = CourseSearch(request.GET)
+    next_cursor = None
     try:
-        courses = list(Course.objects.select_related('department').all())
+        courses, next_cursor = search.page()
+        faculties = refdata.faculties()
+        departments = refdata.departments()
+    except InvalidCursor:
+        return redirect('core:courses')
     except OperationalError:
         db_error = True
         courses = []
+        faculties = departments = []
+    return _course_list_page(request, search, courses, next_cursor, faculties, departments, db_error)
 
+
+def _course_list_page(request, search, courses, next_cursor, faculties, departments, db_error):
+    # shared with core.async_views.course_list; runs no queries of its own
     # Fallback sample courses when DB is empty/unavailable
-    if not courses:
+    if not courses and not search.filtered and not search.after:
         courses = [
             # CPT - เทคโนโลยีคอมพิวเตอร์
             {'code': 'CPT101', 'name': 'การเขียนโปรแกรมคอมพิวเตอร์ 1', 'units': 3, 'department': {'code': 'CPT', 'name': 'สาขา CPT เทคโนโลยีคอมพิวเตอร์'}},
@@ -188,19 +208,160 @@ def course_list(request):
             {'code': 'ART401', 'name': 'นิทรรศการศิลปศึกษา', 'units': 3, 'department': {'code': 'ART', 'name': 'สาขา ART ศิลปศึกษา'}},
         ]
 
-    return render(request, 'courses.html', {'courses': courses, 'db_error': db_error})
+    return render(request, 'courses.html', {
+        'courses': courses,
+        'next_cursor': next_cursor,
+        'search': search,
+        'faculties': faculties,
+        'departments': departments,
+        'status_choices': COURSE_STATUS,
+        'db_error': db_error,
+    })
+
+
+@reads_from_replica
+def course_search(request):
+    """
+    JSON catalogue search: same filters as course_list, keyset paginated.
+    Response: {"results": [...], "next": "<cursor>" | null}
+    """
+    search = CourseSearch(request.GET)
+    try:
+        courses, next_cursor = search.page()
+    except InvalidCursor:
+        return JsonResponse({'error': 'invalid cursor'}, status=400)
+    except OperationalError:
+        return JsonResponse({'error': 'database unavailable'}, status=503)
+    return JsonResponse({'results': [course_as_dict(c) for c in courses], 'next': next_cursor})
+
+
+def _term_of(params):
+    # (year, semester) from request parameters, defaulting to the catalogue's current term
+    try:
+        year = int(params.get('year') or DEFAULT_YEAR)
+    except ValueError:
+        year = DEFAULT_YEAR
+    return year, str(params.get('semester') or DEFAULT_SEMESTER)
+
+
+def _seat_query(request, max_ids=MAX_PAGE_SIZE):
+    """
+    (course_ids, year, semester) from ?ids=1,2,3&year=&semester= (at most max_ids ids).
+    """
+    ids = []
+    for raw in request.GET.get('ids', '').split(','):
+        raw = raw.strip()
+        if raw.isdigit():
+            ids.append(int(raw))
+    return (ids[:max_ids],) + _term_of(request.GET)
+
+
+def _seat_response(year, semester, rows):
+    return JsonResponse({'year': year, 'semester': semester,
+                         'seats': {str(pk): row for pk, row in rows.items()}})
+
+
+def seat_availability(request):
+    """
+    JSON seats left per course for a term: /courses/seats/?ids=1,2,3&year=2025&semester=1
+    """
+    course_ids, year, semester = _seat_query(request)
+    if not course_ids:
+        return JsonResponse({'error': 'ids required'}, status=400)
+    try:
+        rows = seat_availability_of(course_ids, year, semester)
+    except OperationalError:
+        return JsonResponse({'error': 'database unavailable'}, status=503)
+    return _seat_response(year, semester, rows)
+
+
+def _event_stream_response(events):
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: pass events through unbuffered
+    return response
+
+
+def seat_feed(request):
+    """
+    Server-sent events: seat counts of ?ids=... for the term, pushed when they change
+    (see core.seatfeed). Under WSGI each open stream holds a worker thread.
+    """
+    course_ids, year, semester = _seat_query(request, seatfeed.MAX_IDS)
+    if not course_ids:
+        return JsonResponse({'error': 'ids required'}, status=400)
+    return _event_stream_response(seatfeed.stream(course_ids, year, semester))
+
+
+@login_required
+def refdata_stats(request):
+    """
+    Staff-only: reference-data cache version and per-process hit/miss counters.
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'forbidden'}, status=403)
+    return JsonResponse({'version': refdata.version(), 'snapshots': refdata.stats(), 'http': httpcache.stats()})
+
+
+def metrics(request):
+    """
+    Prometheus metrics of this process (core.middleware.PerfMiddleware). Staff only, or a scraper
+    sending "Authorization: Bearer <METRICS_TOKEN>" when that setting is configured.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    authorized = token and request.headers.get('Authorization') == f'Bearer {token}'
+    if not (authorized or (request.user.is_authenticated and request.user.is_staff)):
+        return HttpResponseForbidden()
+    refdata_samples = [
+        ({'snapshot': name, 'outcome': outcome}, n)
+        for name, bucket in sorted(refdata.stats().items())
+        for outcome, n in sorted(bucket.items())
+    ]
+    http_samples = [
+        ({'layer': layer, 'name': name, 'outcome': outcome}, n)
+        for layer, entries in httpcache.stats().items()
+        for name, bucket in entries.items()
+        for outcome, n in bucket.items() if outcome != 'hit_ratio'
+    ]
+    body = metrics_registry.render(extra_counters=[
+        ('kanitha_refdata_lookups_total', 'Reference-data snapshot lookups by outcome.', refdata_samples),
+        ('kanitha_http_cache_lookups_total', 'Page and fragment cache lookups by outcome.', http_samples),
+    ])
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _next_query(request, next_cursor):
+    # current filters plus the cursor of the next page, for a plain "next" link
+    if not next_cursor:
+        return ''
+    params = request.GET.copy()
+    params['after'] = next_cursor
+    return params.urlencode()
 
 
 # require login for student list (private)
 @login_required
+@reads_from_replica
 def student_list(request):
     db_error = False
+    q = request.GET.get('q', '').strip()
+    students, next_cursor, total = [], None, None
     try:
-        students = list(Student.objects.select_related('department').all())
+        listing = StudentListing(request.GET)
+        students, next_cursor = listing.page()
+        if request.GET.get('count'):
+            total = approximate_count(listing.queryset())
+    except InvalidCursor:
+        return redirect('core:students')
     except OperationalError:
         db_error = True
-        students = []
-    return render(request, 'students.html', {'students': students, 'db_error': db_error})
+    return render(request, 'students.html', {
+        'students': students,
+        'q': q,
+        'next_query': _next_query(request, next_cursor),
+        'total': total,
+        'db_error': db_error,
+    })
 
 
 # require login for registration (only logged-in students/staff can register)
@@ -212,18 +373,10 @@ def registration_create(request):
     - POST actions: update_student, add_course, remove_course, save_draft, confirm
     """
     user = request.user
-    try:
-        # Try to find student by username first
-        student = Student.objects.select_related('department__faculty').get(student_id=user.username)
-    except Student.DoesNotExist:
-        try:
-            # If not found, try to find by first_name (assuming first_name matches username)
-            student = Student.objects.select_related('department__faculty').filter(first_name=user.username).first()
-        except Student.DoesNotExist:
-            student = None
+    # the account's linked Student, department and faculty joined (core.middleware.StudentMiddleware)
+    student = request.student or None
 
     # build display_student dict (use Student model if available, otherwise fallback to request.user)
-    display_student = {}
     if student:
         display_student = {
             'student_id': student.student_id,
@@ -235,33 +388,20 @@ def registration_create(request):
             'faculty': student.department.faculty if student.department else None,
         }
     else:
-        # Try to find student by looking up the actual student ID if it's stored in username
-        try:
-            alt_student = Student.objects.select_related('department__faculty').get(student_id='661320115')
-            display_student = {
-                'student_id': alt_student.student_id,
-                'first_name': alt_student.first_name,
-                'last_name': alt_student.last_name,
-                'department_name': alt_student.department.name if alt_student.department else None,
-                'faculty_name': alt_student.department.faculty.name if alt_student.department and alt_student.department.faculty else None,
-                'department': alt_student.department,
-                'faculty': alt_student.department.faculty if alt_student.department else None,
-            }
-        except Student.DoesNotExist:
-            display_student = {
-                'student_id': user.username or '',
-                'first_name': user.first_name or '',
-                'last_name': user.last_name or '',
-                'department_name': None,
-                'faculty_name': None,
-                'department': None,
-                'faculty': None,
-            }
+        display_student = {
+            'student_id': user.username or '',
+            'first_name': user.first_name or '',
+            'last_name': user.last_name or '',
+            'department_name': None,
+            'faculty_name': None,
+            'department': None,
+            'faculty': None,
+        }
 
     # load faculties & departments for the signup / register form (fallback if DB missing)
     try:
-        faculties_qs = list(Faculty.objects.all())
-        departments_qs = list(Department.objects.select_related('faculty').all())
+        faculties_qs = list(refdata.faculties())
+        departments_qs = list(refdata.departments())
         db_ok = True
     except OperationalError:
         faculties_qs = []
@@ -289,10 +429,8 @@ def registration_create(request):
             # ...existing fallback departments...
         ]
     else:
-        # convert model departments to simple dicts for easy JS filtering in template
-        departments = []
-        for d in departments_qs:
-            departments.append({'id': d.id, 'code': getattr(d, 'code', ''), 'name': d.name, 'faculty_id': d.faculty.id if d.faculty else None, 'faculty_name': d.faculty.name if d.faculty else None})
+        # simple dicts for easy JS filtering in template (converted once per reference-data version)
+        departments = list(refdata.department_choices())
 
     # If display_student lacks faculty/department names, try to populate from real DB objects
     try:
@@ -312,7 +450,7 @@ def registration_create(request):
     errors = []
     warnings = []
     try:
-        all_courses = list(Course.objects.select_related('department').all())
+        all_courses = list(refdata.courses())
     except OperationalError:
         db_error = True
         all_courses = []
@@ -337,15 +475,15 @@ def registration_create(request):
             for code, name, units in sample_courses:
                 Course.objects.get_or_create(code=code, defaults={'name': name, 'units': units, 'department': dept})
 
-            # reload all_courses now that we've seeded
-            all_courses = list(Course.objects.select_related('department').all())
+            # reload all_courses now that we've seeded (the saves above invalidated the snapshot)
+            refdata.invalidate()
+            all_courses = list(refdata.courses())
         except Exception:
             # if anything goes wrong, leave all_courses empty and continue (template will show fallback)
             pass
 
-    # ensure session cart exists: list of course ids (pks)
-    cart = request.session.get('registration_cart', [])
-    cart = list(dict.fromkeys(cart))  # unique preserve order
+    # session cart (core.cart): course ids, resolved once per request
+    cart = Cart.for_request(request)
 
     # Precompute current confirmed regs for this student in same year/semester if exists
     current_year = request.POST.get('year') or request.GET.get('year') or 2025
@@ -409,7 +547,7 @@ def registration_create(request):
                         dept_obj = None
                 # create Student record in DB
                 try:
-                    student = Student.objects.create(student_id=posted_sid, first_name=posted_fn, last_name=posted_ln, department=dept_obj)
+                    student = Student.objects.create(student_id=posted_sid, first_name=posted_fn, last_name=posted_ln, department=dept_obj, user=user)
                 except Exception:
                     student = None
                 # update display_student
@@ -440,7 +578,7 @@ def registration_create(request):
         # Prevent creating Registration rows when there is no linked Student record.
         # Many code paths below assume `student` is a Student instance; if it's None
         # a create() would violate NOT NULL constraint on registration.student_id.
-        if student is None and action in ('register_selected', 'register', 'add_course', 'confirm', 'save_draft'):
+        if student is None and action in ('register_selected', 'register', 'add_course', 'confirm', 'save_draft', 'leave_waitlist'):
             messages.error(request, 'ไม่พบข้อมูลนักศึกษาในระบบ (โปรดลงทะเบียนข้อมูลนักศึกษาหรือเข้าสู่ระบบด้วยบัญชีนักศึกษา)')
             return redirect('core:register')
         # bulk registration from checkboxes named 'course_ids'
@@ -450,45 +588,20 @@ def registration_create(request):
                 messages.error(request, 'ยังไม่ได้เลือกวิชาที่ต้องการลงทะเบียน')
                 return redirect('core:register')
 
-            # current confirmed regs for credit/count checks
-            regs_now = list(Registration.objects.filter(student=student, year=current_year, semester=current_semester, status='CONFIRMED'))
-            reg_ids = {r.course.id for r in regs_now}
-            total_credits_now = sum(r.units for r in regs_now)
+            # a large selection goes to the job queue; the page polls the job and reports its outcome
+            if len(selected_ids) > getattr(settings, 'TASK_INLINE_LIMIT', 8):
+                job = tasks.enqueue('register_selected', user=user,
+                                    key=tasks.selection_key(student, selected_ids, current_year, current_semester),
+                                    student_id=student.pk, course_ids=selected_ids,
+                                    year=current_year, semester=current_semester)
+                request.session['registration_job'] = job.pk
+                if job.status not in tasks.FINISHED:
+                    messages.info(request, f'กำลังลงทะเบียน {len(selected_ids)} วิชา ระบบจะแสดงผลเมื่อดำเนินการเสร็จ')
+                return redirect('core:register')
 
-            successes = []
-            failures = []
-            for sid in selected_ids:
-                try:
-                    cid = int(sid)
-                    course_obj = Course.objects.get(pk=cid)
-                except Exception:
-                    failures.append(f'ไม่พบวิชา id={sid}')
-                    continue
-
-                if course_obj.id in reg_ids:
-                    failures.append(f'คุณได้ลงทะเบียนแล้ว: {course_obj.code}')
-                    continue
-
-                confirmed_count = Registration.objects.filter(course=course_obj, year=current_year, semester=current_semester, status='CONFIRMED').count()
-                if confirmed_count >= course_obj.capacity:
-                    failures.append(f'กลุ่มเต็ม: {course_obj.code}')
-                    continue
-
-                if total_credits_now + course_obj.units > MAX_CREDITS:
-                    failures.append(f'เพิ่ม {course_obj.code} จะเกินหน่วยกิตสูงสุด ({MAX_CREDITS})')
-                    continue
-
-                # create registration
-                Registration.objects.create(student=student, course=course_obj, year=current_year, semester=current_semester, units=course_obj.units, status='CONFIRMED')
-                successes.append(course_obj.code)
-                total_credits_now += course_obj.units
-                reg_ids.add(course_obj.id)
-
-            if successes:
-                messages.success(request, f"ลงทะเบียนเรียบร้อย: {', '.join(successes)}")
-            if failures:
-                for fmsg in failures:
-                    messages.error(request, fmsg)
+            # validate the whole selection in a constant number of queries, then take seats
+            outcome = tasks.register_selected(student.pk, selected_ids, current_year, current_semester)
+            _report_selection(request, outcome)
             return redirect('core:register')
 
         selected_course_id = request.POST.get('course') or request.POST.get('course_id')
@@ -506,25 +619,20 @@ def registration_create(request):
                 messages.error(request, 'ไม่พบวิชาที่เลือก')
                 return redirect('core:register')
 
-            # already registered?
-            if Registration.objects.filter(student=student, course=course_obj, year=current_year, semester=current_semester, status='CONFIRMED').exists():
-                messages.error(request, f'คุณได้ลงทะเบียนวิชา {course_obj.code} แล้ว')
+            # prerequisites / duplicate / clash / credit limit
+            verdict = RegistrationValidator(student, current_year, current_semester).validate([course_obj.pk])[0]
+            if _only_full(verdict):
+                _join_waitlist(request, student, course_obj, current_year, current_semester)
                 return redirect('core:register')
-
-            # capacity
-            confirmed_count = Registration.objects.filter(course=course_obj, year=current_year, semester=current_semester, status='CONFIRMED').count()
-            if confirmed_count >= course_obj.capacity:
-                messages.error(request, f'วิชา {course_obj.code} เต็มแล้ว')
+            if not verdict.ok:
+                for _, msg in verdict.reasons:
+                    messages.error(request, msg)
                 return redirect('core:register')
 
-            # credits limit
-            regs_now = Registration.objects.filter(student=student, year=current_year, semester=current_semester, status='CONFIRMED')
-            credits_now = sum(r.units for r in regs_now)
-            if credits_now + getattr(course_obj, 'units', getattr(course_obj, 'credits', 0)) > MAX_CREDITS:
-                messages.error(request, 'เพิ่มวิชานี้จะเกินหน่วยกิตที่กำหนด')
+            # capacity: take a seat atomically; a full section puts the student on its waitlist
+            if reserve_seat(student, course_obj, current_year, current_semester) is None:
+                _join_waitlist(request, student, course_obj, current_year, current_semester)
                 return redirect('core:register')
-
-            Registration.objects.create(student=student, course=course_obj, year=current_year, semester=current_semester, units=getattr(course_obj, 'units', getattr(course_obj, 'credits', 0)), status='CONFIRMED')
             messages.success(request, f'ลงทะเบียนวิชา {course_obj.code} สำเร็จ')
             return redirect('core:register')
 
@@ -539,51 +647,25 @@ def registration_create(request):
                 messages.success(request, f'ถอนรายวิชา {course_obj.code} เรียบร้อย')
             return redirect('core:register')
 
+        if action == 'leave_waitlist' and selected_course_id:
+            course_obj = resolve_course(selected_course_id)
+            if course_obj and waitlist.leave(student, course_obj, current_year, current_semester):
+                messages.success(request, f'ออกจากรายชื่อรอวิชา {course_obj.code} แล้ว')
+            return redirect('core:register')
+
         if action == 'add_course' and selected_course_id:
             course_obj = resolve_course(selected_course_id)
             if not course_obj:
                 errors.append('ไม่พบวิชาที่เลือก')
             else:
-                # existing validation logic (prereq/capacity/clash/credits) unchanged, use course_obj
-                missing_prereq = []
-                for pre in course_obj.prerequisites.all():
-                    passed = Registration.objects.filter(student__student_id=request.user.username, course=pre, grade__in=PASSING_GRADES).exists()
-                    if not passed:
-                        missing_prereq.append(pre.code)
-                if missing_prereq:
-                    errors.append(f"ยังไม่ได้ผ่าน prerequisite: {', '.join(missing_prereq)}")
+                # prereq/capacity/clash/credits against confirmed registrations plus the current cart
+                verdict = RegistrationValidator(student, current_year, current_semester).validate(
+                    [course_obj.pk], cart_ids=cart.ids, courses=cart.by_id())[0]
+                if not verdict.ok:
+                    errors.extend(msg for _, msg in verdict.reasons)
                 else:
-                    confirmed_count = Registration.objects.filter(course=course_obj, status='CONFIRMED', year=current_year, semester=current_semester).count()
-                    if confirmed_count >= getattr(course_obj, 'capacity', 0):
-                        errors.append(f"กลุ่มเต็ม: {course_obj.code} ({course_obj.capacity} คน)")
-                    else:
-                        selected_tokens = _parse_schedule_tokens(course_obj.schedule)
-                        clash = False
-                        for cid in cart:
-                            try:
-                                c2 = Course.objects.get(pk=cid)
-                                if _parse_schedule_tokens(c2.schedule) & selected_tokens:
-                                    clash = True
-                                    break
-                            except Exception:
-                                continue
-                        regs = Registration.objects.filter(student__student_id=request.user.username, status='CONFIRMED', year=current_year, semester=current_semester).select_related('course')
-                        for r in regs:
-                            if _parse_schedule_tokens(r.course.schedule) & selected_tokens:
-                                clash = True
-                                break
-                        if clash:
-                            errors.append("เวลาเรียนชนกันกับรายวิชาที่เลือกไว้หรือที่ลงทะเบียนแล้ว")
-                        else:
-                            cart_units = sum([Course.objects.get(pk=cid).units for cid in cart]) if cart else 0
-                            existing_units = sum([r.units for r in regs]) if regs else 0
-                            total_after = existing_units + cart_units + course_obj.units
-                            if total_after > MAX_CREDITS:
-                                errors.append(f"เกินหน่วยกิตสูงสุด ({MAX_CREDITS}) หากเพิ่มวิชานี้จะเป็น {total_after} หน่วยกิต")
-                            else:
-                                cart.append(course_obj.pk)
-                                request.session['registration_cart'] = cart
-                                messages.success(request, f"เพิ่ม {course_obj.code} ลงในตะกร้า")
+                    cart.add(course_obj)
+                    messages.success(request, f"เพิ่ม {course_obj.code} ลงในตะกร้า")
 
         elif action == 'remove_course' and selected_course_id:
             try:
@@ -593,9 +675,7 @@ def registration_create(request):
                 except Exception:
                     co = resolve_course(selected_course_id)
                     cid = co.pk if co else None
-                if cid and cid in cart:
-                    cart.remove(cid)
-                    request.session['registration_cart'] = cart
+                if cid and cart.remove(cid):
                     messages.success(request, "นำวิชาออกจากตะกร้าแล้ว")
             except Exception:
                 pass
@@ -604,13 +684,16 @@ def registration_create(request):
             if not student:
                 errors.append("ไม่พบข้อมูลนักศึกษาที่เชื่อมโยงกับบัญชีนี้ (กรุณากรอกข้อมูลนักศึกษาและกดบันทึกอีกครั้ง)")
             else:
-                for cid in cart:
+                for cobj in cart.courses():
                     try:
-                        cobj = Course.objects.get(pk=cid)
-                        Registration.objects.update_or_create(
+                        reg, created = Registration.objects.get_or_create(
                             student=student, course=cobj, year=current_year, semester=current_semester,
                             defaults={'units': cobj.units, 'status': 'DRAFT'}
                         )
+                        # a confirmed registration keeps its seat; a draft never downgrades it
+                        if not created and reg.status == 'DRAFT' and reg.units != cobj.units:
+                            reg.units = cobj.units
+                            reg.save(update_fields=['units'])
                     except Exception:
                         pass
                 messages.success(request, "บันทึกร่างเรียบร้อย")
@@ -619,137 +702,223 @@ def registration_create(request):
             if not student:
                 errors.append("ไม่พบข้อมูลนักศึกษาที่เชื่อมโยงกับบัญชีนี้ (กรุณากรอกข้อมูลนักศึกษาและกดยืนยันอีกครั้ง)")
             else:
-                cart_copy = cart[:]
-                for cid in cart_copy:
-                    try:
-                        cobj = Course.objects.get(pk=cid)
-                    except Exception:
-                        errors.append(f"ไม่พบวิชา id={cid}")
+                validator = RegistrationValidator(student, current_year, current_semester)
+                for verdict in validator.validate(cart.ids, courses=cart.by_id()):
+                    if not verdict.ok:
+                        errors.extend(msg for _, msg in verdict.reasons)
                         continue
-                    missing_prereq = [pre.code for pre in cobj.prerequisites.all() if not Registration.objects.filter(student=student, course=pre, grade__in=PASSING_GRADES).exists()]
-                    if missing_prereq:
-                        errors.append(f"ยังไม่ได้ผ่าน prerequisite สำหรับ {cobj.code}: {', '.join(missing_prereq)}")
+                    # capacity check and confirm happen atomically against the seat counter
+                    if reserve_seat(student, verdict.course, current_year, current_semester) is None:
+                        errors.append(f"กลุ่มเต็ม: {verdict.course.code}")
                         continue
-                    confirmed_count = Registration.objects.filter(course=cobj, status='CONFIRMED', year=current_year, semester=current_semester).count()
-                    if confirmed_count >= cobj.capacity:
-                        errors.append(f"กลุ่มเต็ม: {cobj.code}")
-                        continue
-                    sel_tokens = _parse_schedule_tokens(cobj.schedule)
-                    clash_found = False
-                    for r in Registration.objects.filter(student=student, status='CONFIRMED', year=current_year, semester=current_semester).select_related('course'):
-                        if _parse_schedule_tokens(r.course.schedule) & sel_tokens:
-                            clash_found = True
-                            break
-                    if clash_found:
-                        errors.append(f"เวลาเรียนชนกันสำหรับ {cobj.code}")
-                        continue
-                    cart_units = sum([Course.objects.get(pk=x).units for x in cart])
-                    existing_units = sum([r.units for r in Registration.objects.filter(student=student, status='CONFIRMED', year=current_year, semester=current_semester)])
-                    if existing_units + cart_units > MAX_CREDITS:
-                        errors.append(f"เกินหน่วยกิตสูงสุดเมื่อรวมวิชาทั้งหมด (สูงสุด {MAX_CREDITS})")
-                        break
-                    Registration.objects.update_or_create(
-                        student=student, course=cobj, year=current_year, semester=current_semester,
-                        defaults={'units': cobj.units, 'status': 'CONFIRMED'}
-                    )
                 if not errors:
-                    request.session['registration_cart'] = []
+                    cart.clear()
                     messages.success(request, "ยืนยันการลงทะเบียนเรียบร้อย")
 
     # prepare display lists
-    cart_courses = []
-    try:
-        for cid in cart:
-            try:
-                c = Course.objects.get(pk=cid)
-                cart_courses.append(c)
-            except Exception:
-                continue
-    except Exception:
-        cart_courses = []
-
-    cart_units = sum([c.units for c in cart_courses]) if cart_courses else 0
+    cart_ids = []
+    cart_clashes = {}
+    cart_units = 0
     confirmed_units = 0
-    if student and not db_error:
-        confirmed_units = sum([r.units for r in Registration.objects.filter(student=student, status='CONFIRMED', year=current_year, semester=current_semester)])
-    # prepare registered courses list and totals (for template)
-    registered_regs = []
-    if student and not db_error:
-        registered_regs = list(Registration.objects.filter(student=student, status='CONFIRMED', year=current_year, semester=current_semester).select_related('course'))
-
-    registered_courses = [r.course for r in registered_regs]
-    total_credits = sum([r.units for r in registered_regs]) if registered_regs else 0
-
-    # If there are no confirmed registered courses (e.g., student not linked),
-    # fall back to showing the session cart contents so the summary displays something useful.
-    if not registered_courses and cart_courses:
-        try:
-            registered_courses = cart_courses
-            total_credits = sum([c.units for c in cart_courses]) if cart_courses else 0
-        except Exception:
-            # if anything unexpected (e.g., cart contains ids that cannot be resolved), ignore
-            registered_courses = []
-            total_credits = 0
-
-    # ensure template can access student.faculty (some templates read student.faculty.name)
-    if student and getattr(student, 'department', None) and getattr(student.department, 'faculty', None):
+    if not db_error:
+        cart_ids = [c.id for c in cart.courses()]
+        cart_units = cart.units()
+        cart_clashes = cart.clashes()
+        if student:
+            confirmed_units = summaries.term_summary(student, current_year, current_semester).confirmed_units
+
+    # badge courses whose prerequisites are not passed yet: cached graph + one query for passed courses
+    course_rows = [(c, None) for c in all_courses]
+    if not db_error and all_courses:
         try:
-            setattr(student, 'faculty', student.department.faculty)
-        except Exception:
+            codes = {c.id: c.code for c in all_courses}
+            eligible = prereqs.eligibility_for(student, refdata.prerequisite_graph(), [c.id for c in all_courses])
+            course_rows = [
+                (c, None if eligible[c.id][0] else ', '.join(codes.get(p, str(p)) for p in eligible[c.id][1]) or 'วงจรวิชาบังคับก่อน')
+                for c in all_courses
+            ]
+        except OperationalError:
             pass
 
-    # expose variables matching the new template names while keeping legacy keys
+    # the page's whole context: each list appears once (the catalogue only as course_rows, the
+    # cart only as cart_ids); the per-request cart and waitlist are the only per-student queries
     context = {
-        'student': student,
         'display_student': display_student,
-        'available_courses': all_courses,
-        'registered_courses': registered_courses,
-        'total_credits': total_credits,
-        'cart_ids': [c.id for c in cart_courses] if cart_courses else [],
-        # legacy/compat
-        'courses': all_courses,
-        'cart_courses': cart_courses,
+        'course_rows': course_rows,
+        'cart_ids': cart_ids,
         'cart_units': cart_units,
+        'cart_clashes': cart_clashes,
         'confirmed_units': confirmed_units,
         'db_error': db_error,
         'errors': errors,
         'warnings': warnings,
         'year': current_year,
         'semester': current_semester,
-        'faculties': faculties,
-        'departments': departments,
-        'db_ok': db_ok,
+        'waitlist_entries': waitlist.waiting_for(student, current_year, current_semester) if student else [],
+        'registration_job': _registration_job(request),
     }
 
     # render the registration page
     return render(request, 'registration_page.html', context)
 
 
+def _only_full(verdict):
+    # rejected for capacity alone: the student may wait for a seat
+    return bool(verdict.reasons) and all(code == 'full' for code, _ in verdict.reasons)
+
+
+def _join_waitlist(request, student, course, year, semester):
+    _, place = waitlist.join(student, course, year, semester)
+    _waitlisted_message(request, course.code, place)
+
+
+def _waitlisted_message(request, code, place):
+    messages.warning(request, f'วิชา {code} เต็มแล้ว — เพิ่มชื่อคุณในรายชื่อรอ (ลำดับที่ {place}) ระบบจะลงทะเบียนให้อัตโนมัติเมื่อมีที่ว่าง')
+
+
+def _report_selection(request, outcome):
+    # messages for a register_selected outcome (see core.tasks.register_selected)
+    for code, place in outcome['waitlisted']:
+        _waitlisted_message(request, code, place)
+    if outcome['registered']:
+        messages.success(request, f"ลงทะเบียนเรียบร้อย: {', '.join(outcome['registered'])}")
+    for msg in outcome['errors']:
+        messages.error(request, msg)
+
+
+def _registration_job(request):
+    """
+    The student's queued register_selected job while it is still running; once it has
+    finished, report its outcome as messages and forget it.
+    """
+    pk = request.session.get('registration_job')
+    if pk is None:
+        return None
+    job = Job.objects.filter(pk=pk).first()
+    if job is not None and job.status not in tasks.FINISHED:
+        return job
+    del request.session['registration_job']
+    if job is not None and job.status == 'DONE':
+        _report_selection(request, job.result)
+    elif job is not None:
+        messages.error(request, 'การลงทะเบียนไม่สำเร็จเนื่องจากข้อผิดพลาดของระบบ กรุณาลองใหม่อีกครั้ง')
+    return None
+
+
+def _job_as_dict(job):
+    return {
+        'id': job.pk,
+        'name': job.name,
+        'status': job.status,
+        'attempts': job.attempts,
+        'result': job.result,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+@login_required
+def job_status(request, pk):
+    """
+    Status of a background job, for polling: its owner or staff only.
+    """
+    job = Job.objects.filter(pk=pk).first()
+    if job is None or not (request.user.is_staff or job.user_id == request.user.pk):
+        return JsonResponse({'error': 'not found'}, status=404)
+    return JsonResponse(_job_as_dict(job))
+
+
+@login_required
+def job_enqueue(request):
+    """
+    Staff-only: POST name=<task> queues one of the maintenance tasks (core.tasks.staff_tasks).
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'forbidden'}, status=403)
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required', 'tasks': tasks.staff_tasks()}, status=405)
+    name = request.POST.get('name', '')
+    if name not in tasks.staff_tasks():
+        return JsonResponse({'error': 'unknown task', 'tasks': tasks.staff_tasks()}, status=400)
+    job = tasks.enqueue(name, key=name, user=request.user)
+    return JsonResponse(_job_as_dict(job), status=202)
+
+
 # require login for viewing registrations
 @login_required
 def registration_list(request):
+    """
+    Registrations newest first, one keyset page at a time (?after=<cursor>), with DB-side
+    filters: year, semester, status, course, department, grade, student. ?count=1 adds an
+    approximate total.
+    """
     db_error = False
+    regs, next_cursor, total = [], None, None
     try:
         # By default show only the current user's registrations for privacy.
         # Admin/staff can still see all registrations.
         user = request.user
         if user.is_staff or user.is_superuser:
-            regs_qs = Registration.objects.select_related('student', 'course').order_by('-created_at')
+            base_qs = Registration.objects.all()
         else:
-            # try to find linked Student for this user
-            student = Student.objects.filter(student_id=user.username).first()
-            if not student:
-                # fallback: try matching first_name
-                student = Student.objects.filter(first_name=user.username).first()
-            if student:
-                regs_qs = Registration.objects.select_related('student', 'course').filter(student=student).order_by('-created_at')
-            else:
-                regs_qs = Registration.objects.none()
-        regs = list(regs_qs)
+            student = request.student
+            base_qs = Registration.objects.filter(student=student) if student else Registration.objects.none()
+        listing = RegistrationListing(request.GET, queryset=base_qs)
+        regs, next_cursor = listing.page()
+        if request.GET.get('count'):
+            total = approximate_count(listing.queryset())
+    except InvalidCursor:
+        return redirect('core:registrations')
     except OperationalError:
         db_error = True
-        regs = []
-    return render(request, 'registrations.html', {'registrations': regs, 'db_error': db_error})
+    return render(request, 'registrations.html', {
+        'registrations': regs,
+        'next_query': _next_query(request, next_cursor),
+        'total': total,
+        'filters': request.GET,
+        'grade_choices': GRADE_CHOICES,
+        'db_error': db_error,
+    })
+
+
+def _export_response(request, name, filename, **filters):
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in exports.FORMATS:
+        fmt = 'csv'
+    # parsed before streaming starts: a bad value is ignored, never a 500 halfway through the body
+    filters.setdefault('year', int_or_none(request.GET.get('year')))
+    filters.setdefault('semester', (request.GET.get('semester') or '').strip() or None)
+    filters.setdefault('department', (request.GET.get('department') or '').strip() or None)
+    response = StreamingHttpResponse(exports.stream(name, fmt, **filters), content_type=exports.content_type(fmt))
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
+
+
+@login_required
+def export_registrations(request):
+    """
+    Staff-only streamed export of registrations (?year=&semester=&department=&format=csv|ndjson).
+    """
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+    return _export_response(request, 'registrations', 'registrations')
+
+
+@login_required
+def export_class_list(request, pk):
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+    course = get_object_or_404(Course, pk=pk)
+    return _export_response(request, 'classlist', f'classlist-{course.code}', course=course.pk)
+
+
+@login_required
+def export_transcript(request, pk):
+    student = get_object_or_404(Student, pk=pk)
+    # staff, or the student downloading their own transcript
+    if not (request.user.is_staff or student.user_id == request.user.pk):
+        return HttpResponseForbidden()
+    return _export_response(request, 'transcript', f'transcript-{student.student_id}', student=student.pk)
 
 
 # require login for results/grades
@@ -759,30 +928,16 @@ def results_view(request):
     results = []
     try:
         # Show only the logged-in student's results (privacy)
-        user = request.user
-        student = None
-        # attempt to find Student by student_id matching username
-        if user and user.is_authenticated:
-            student = Student.objects.filter(student_id=user.username).first()
-            if not student:
-                # fallback: try matching first_name
-                student = Student.objects.filter(first_name=user.username).first()
-
+        student = request.student
         if not student:
             # no linked Student found -- return empty results (template will show message)
             results = []
         else:
-            regs = student.registrations.exclude(grade='').all()
-            total_units = sum([r.units for r in regs]) if regs else 0
-            if total_units:
-                total_points = 0.0
-                for r in regs:
-                    gp = {'A':4.0,'B':3.0,'C':2.0,'D':1.0,'F':0.0}.get(r.grade,0.0)
-                    total_points += gp * r.units
-                gpa = total_points / total_units
-            else:
-                gpa = None
-            results.append({'student': student, 'total_units': total_units, 'gpa': round(gpa,2) if gpa is not None else None, 'registrations': regs})
+            # graded rows of live and archived terms (core.terms)
+            regs = terms.graded_history(student)
+            # GPA and graded units from the per-term summary rows (one aggregate query)
+            rollup = summaries.cumulative(student)
+            results.append({'student': student, 'total_units': rollup['graded_units'], 'gpa': rollup['gpa'], 'registrations': regs})
     except OperationalError:
         db_error = True
         results = []
@@ -827,8 +982,8 @@ def signup_view(request):
         selected_faculty_code = faculty_code_q.strip()
 
     # Load faculties and departments from DB or use fallback data
-    db_faculties = list(Faculty.objects.all())
-    db_departments = list(Department.objects.select_related('faculty').all())
+    db_faculties = list(refdata.faculties())
+    db_departments = list(refdata.departments())
 
     if db_faculties:
         faculties = db_faculties
@@ -989,6 +1144,8 @@ def signup_view(request):
         dept = get_or_create_department(dept_val, faculty)
 
         if student_id:
+            # the account is already linked when its username is an existing student id (core.signals)
+            account = None if Student.objects.filter(user=user).exists() else user
             # Handle existing student
             existing_student = Student.objects.filter(student_id=student_id).first()
             if existing_student:
@@ -1003,6 +1160,9 @@ def signup_view(request):
                 if dept and existing_student.department_id != dept.id:
                     existing_student.department = dept
                     changed = True
+                if existing_student.user_id is None and account:
+                    existing_student.user = account
+                    changed = True
                 if changed:
                     try:
                         existing_student.save()
@@ -1014,7 +1174,8 @@ def signup_view(request):
                     student_id=student_id,
                     first_name=first_name,
                     last_name=last_name,
-                    department=dept
+                    department=dept,
+                    user=account
                 )
 
         login(request, user)
@@ -1030,6 +1191,8 @@ def signup_view(request):
     }
     return render(request, 'registration.html', context)
 
+@cached_page(CATALOGUE)
+@reads_from_replica
 def faculty_detail(request, pk):
     db_error = False
     try:
@@ -1041,6 +1204,8 @@ def faculty_detail(request, pk):
         departments = []
     return render(request, 'faculty_detail.html', {'faculty': faculty, 'departments': departments, 'db_error': db_error})
 
+@cached_page(CATALOGUE)
+@reads_from_replica
 def department_detail(request, pk):
     db_error = False
     try:
@@ -1052,6 +1217,7 @@ def department_detail(request, pk):
         courses = []
     return render(request, 'department_detail.html', {'department': department, 'courses': courses, 'db_error': db_error})
 
+@reads_from_replica
 def course_detail(request, pk):
     db_error = False
     try:
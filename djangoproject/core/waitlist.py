@@ -0,0 +1,226 @@
+"""
+Waitlists for full course sections.
+
+A student who finds a section full joins its queue (join). When a confirmed registration
+is deleted (a drop, or an admin deletion) the Registration signal schedules the section,
+and a background worker promotes the head of the queue: it re-validates the student
+(credits, clashes, prerequisites) and takes the seat in one transaction. Students who are
+no longer eligible when their turn comes are marked SKIPPED and the next one is tried.
+
+Settings:
+  WAITLIST_PROMOTION   'background' (default): a worker thread in this process; a
+                       promotion that hits lock contention is re-queued a few times
+                       before it is left to the sweep below
+                       'inline': promote right after the freeing transaction commits,
+                       in the same thread (tests, management commands)
+                       'queue': enqueue a promote_waitlist job for `manage.py run_workers`
+                       (several server processes: promotions survive a restart)
+
+`manage.py promote_waitlists` sweeps every section with free seats and waiting students,
+e.g. after a restart dropped scheduled promotions or after capacities were raised.
+"""
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import OperationalError, close_old_connections, transaction
+from django.db.models import F
+
+from .models import Course, SeatCounter, Waitlist
+from .seats import _is_lock_error, _retry_on_lock, get_counter, reserve_seat
+from .validation import RegistrationValidator
+
+logger = logging.getLogger(__name__)
+
+# attempts per scheduled section in the background worker, and the base delay between them
+PROMOTION_ATTEMPTS = 5
+PROMOTION_RETRY_DELAY = 0.2  # seconds, times the attempt number
+
+
+def join(student, course, year, semester):
+    """
+    Queue the student for the section (idempotent). Returns (entry, position), position 1-based.
+    """
+    semester = str(semester)
+    entry = Waitlist.objects.filter(student=student, course=course, year=year, semester=semester, status='WAITING').first()
+    if entry is None:
+        entry = Waitlist.objects.create(student=student, course=course, year=year, semester=semester)
+    return entry, position(entry)
+
+
+def leave(student, course, year, semester):
+    return Waitlist.objects.filter(student=student, course=course, year=year, semester=str(semester),
+                                   status='WAITING').update(status='CANCELLED')
+
+
+def position(entry):
+    """
+    1-based place in the queue of a WAITING entry.
+    """
+    return Waitlist.objects.filter(course_id=entry.course_id, year=entry.year, semester=entry.semester,
+                                   status='WAITING', id__lte=entry.id).count()
+
+
+def waiting_for(student, year, semester):
+    """
+    [(entry, position)] of the student's WAITING entries in the term, with course loaded.
+    """
+    entries = list(Waitlist.objects.filter(student=student, year=year, semester=str(semester), status='WAITING')
+                   .select_related('course').order_by('id'))
+    return [(e, position(e)) for e in entries]
+
+
+def _promote_head(course, year, semester):
+    """
+    One promotion attempt in one transaction. Returns the PROMOTED entry, SKIPPED when the
+    head was no longer eligible (try the next one), or None when there is nothing to do.
+    """
+    with transaction.atomic():
+        counter = get_counter(course, year, semester)
+        if counter.taken >= course.capacity:
+            return None
+        entry = (Waitlist.objects.select_for_update()
+                 .filter(course=course, year=year, semester=semester, status='WAITING')
+                 .select_related('student').order_by('id').first())
+        if entry is None:
+            return None
+        verdict = RegistrationValidator(entry.student, year, semester).validate([course.pk])[0]
+        # the validator's advisory 'full' check is superseded by reserve_seat's guarded update
+        reasons = [msg for code, msg in verdict.reasons if code != 'full']
+        if reasons:
+            entry.status = 'SKIPPED'
+            entry.note = '; '.join(reasons)[:300]
+            entry.save(update_fields=['status', 'note', 'updated_at'])
+            return SKIPPED
+        if reserve_seat(entry.student, course, year, semester) is None:
+            return None  # someone else took the seat meanwhile; the entry stays at the head
+        entry.status = 'PROMOTED'
+        entry.note = ''
+        entry.save(update_fields=['status', 'note', 'updated_at'])
+        return entry
+
+
+SKIPPED = object()
+
+
+def promote(course_id, year, semester, limit=None):
+    """
+    Fill free seats of the section from its queue, head first. Each promotion (lock the head
+    entry, re-validate, take the seat, mark PROMOTED) is one transaction.
+    Returns the list of promoted Waitlist entries.
+    """
+    semester = str(semester)
+    course = Course.objects.filter(pk=course_id).first()
+    if course is None:
+        return []
+    promoted = []
+    while limit is None or len(promoted) < limit:
+        outcome = _retry_on_lock(lambda: _promote_head(course, year, semester))
+        if outcome is None:
+            break
+        if outcome is not SKIPPED:
+            promoted.append(outcome)
+    return promoted
+
+
+def sections_to_promote(year=None, semester=None):
+    """
+    (course_id, year, semester) of sections that have WAITING entries and a free seat.
+    """
+    waiting = Waitlist.objects.filter(status='WAITING')
+    if year is not None:
+        waiting = waiting.filter(year=year)
+    if semester is not None:
+        waiting = waiting.filter(semester=str(semester))
+    sections = set(waiting.values_list('course_id', 'year', 'semester').distinct())
+    full = set(
+        SeatCounter.objects.filter(course_id__in={s[0] for s in sections}, taken__gte=F('course__capacity'))
+        .values_list('course_id', 'year', 'semester')
+    )
+    return sorted(sections - full)
+
+
+class PromotionWorker:
+    """
+    A daemon thread promoting scheduled sections one at a time. A section scheduled again
+    while still pending is queued once. A promotion that fails on lock contention is queued
+    again, up to PROMOTION_ATTEMPTS times.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.pending = set()
+        self.attempts = {}
+        self.lock = threading.Lock()
+        self.thread = None
+        self.promoted = 0
+
+    def schedule(self, section):
+        with self.lock:
+            if section in self.pending:
+                return
+            self.pending.add(section)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='waitlist-promotion', daemon=True)
+                self.thread.start()
+        self.queue.put(section)
+
+    def _run(self):
+        while True:
+            section = self.queue.get()
+            with self.lock:
+                self.pending.discard(section)
+            try:
+                self.promoted += len(promote(*section))
+                self.attempts.pop(section, None)
+            except OperationalError as exc:
+                attempt = self.attempts.get(section, 0) + 1
+                if not _is_lock_error(exc) or attempt >= PROMOTION_ATTEMPTS:
+                    self.attempts.pop(section, None)
+                    logger.exception('waitlist promotion failed for %s; `manage.py promote_waitlists` '
+                                     'will pick the section up', section)
+                else:
+                    self.attempts[section] = attempt
+                    logger.warning('waitlist promotion for %s hit a locked database, retrying (%d/%d)',
+                                   section, attempt, PROMOTION_ATTEMPTS)
+                    time.sleep(PROMOTION_RETRY_DELAY * attempt)
+                    # queued before task_done(), so drain() keeps waiting for the retry
+                    self.schedule(section)
+            except Exception:
+                self.attempts.pop(section, None)
+                logger.exception('waitlist promotion failed for %s', section)
+            finally:
+                close_old_connections()
+                self.queue.task_done()
+
+    def drain(self, timeout=30):
+        """
+        Wait until every scheduled section has been processed; False on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+
+worker = PromotionWorker()
+
+
+def schedule(course_id, year, semester):
+    """
+    Promote from the section's queue once the current transaction commits.
+    """
+    section = (course_id, year, str(semester))
+    mode = getattr(settings, 'WAITLIST_PROMOTION', 'background')
+    if mode == 'inline':
+        transaction.on_commit(lambda: promote(*section), robust=True)
+    elif mode == 'queue':
+        from . import tasks
+        transaction.on_commit(lambda: tasks.enqueue('promote_waitlist', course_id=course_id, year=year,
+                                                    semester=section[2]), robust=True)
+    else:
+        transaction.on_commit(lambda: worker.schedule(section))
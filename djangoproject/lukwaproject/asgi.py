@@ -1,8 +1,11 @@
 """
-ASGI config for oatproject project.
+ASGI config for lukwaproject project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+    uvicorn lukwaproject.asgi:application --workers 4
+    gunicorn lukwaproject.asgi:application -k uvicorn.workers.UvicornWorker
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -11,6 +14,11 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'oatproject.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lukwaproject.settings')
+# route the read-heavy endpoints to core.async_views (read by settings.ASYNC_VIEWS)
+os.environ.setdefault('DJANGO_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
+
+from core.startup import warm_caches  # noqa: E402  (needs the app registry loaded above)
+warm_caches()
@@ -1,10 +1,13 @@
 import os
 from pathlib import Path
 
+from .dbprofiles import database_settings
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = 'replace-this-with-a-secure-key'
-DEBUG = True
+# DJANGO_DEBUG=0 in production
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') == '1'
 ALLOWED_HOSTS = ['*']
 
 INSTALLED_APPS = [
@@ -13,7 +16,8 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
-    'django.contrib.staticfiles',
+    # django.contrib.staticfiles, minus the Bootstrap builds no page loads (core.staticfiles)
+    'core.staticfiles.StaticFilesConfig',
     'core',
     'lukwaapp',
     'oatapp',  # added to satisfy migration dependency referenced by lukwaapp migrations
@@ -21,11 +25,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # production only (STATIC_SERVE): answers /static/ before anything else runs
+    'core.middleware.StaticFilesMiddleware',
+    # first of the rest, so its timings cover the whole middleware stack
+    'core.middleware.PerfMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.StudentMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -34,6 +43,7 @@ ROOT_URLCONF = 'lukwaproject.urls'
 
 TEMPLATES = [
     {
+        'NAME': 'django',
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
@@ -47,15 +57,74 @@ TEMPLATES = [
         },
     },
 ]
+# Production template profile: every template is compiled once per process and kept (no
+# autoreload checks), and all of them are compiled and validated at startup (core.precompile).
+# In DEBUG, Django's default loaders still cache but reload templates edited on disk.
+TEMPLATE_PRECOMPILE_ON_STARTUP = not DEBUG
+if not DEBUG:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+    TEMPLATES[0]['OPTIONS']['context_processors'].remove('django.template.context_processors.debug')
 
 WSGI_APPLICATION = 'lukwaproject.wsgi.application'
+ASGI_APPLICATION = 'lukwaproject.asgi.application'
+
+# Serve course_list, course_search, seat_availability and results_view from core.async_views.
+# lukwaproject/asgi.py turns this on; under WSGI the sync views are cheaper.
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS') == '1'
+# Threads for ORM writes made from async views (bounds their database connections too).
+# 0 runs them on the request's sync thread instead.
+ASYNC_WRITE_WORKERS = int(os.environ.get('ASYNC_WRITE_WORKERS') or 8)
+
+# Fan-out for the live seat feed (core.pubsub). The in-process broker only reaches clients of
+# the same server process; with several workers use
+#   PUBSUB_BROKER = 'core.pubsub.RedisBroker'; PUBSUB_OPTIONS = {'url': 'redis://localhost:6379/0'}
+PUBSUB_BROKER = os.environ.get('PUBSUB_BROKER', 'core.pubsub.InProcessBroker')
+PUBSUB_OPTIONS = {'url': os.environ['PUBSUB_REDIS_URL']} if os.environ.get('PUBSUB_REDIS_URL') else {}
+SEAT_FEED_HEARTBEAT = 15
+SEAT_FEED_MAX_SECONDS = 300
+
+# Background jobs (core.tasks), run by `manage.py run_workers`. Selections of more than
+# TASK_INLINE_LIMIT courses are registered by a job instead of inside the request.
+TASK_BACKEND = 'core.tasks.DatabaseBackend'
+TASK_LEASE_SECONDS = 600
+TASK_INLINE_LIMIT = 8
+
+# Database profile from the environment (DB_PROFILE=sqlite|sqlite-plain|postgres, DATABASE_URL,
+# DB_CONN_MAX_AGE, DB_POOL, DATABASE_REPLICA_URL, ...); see lukwaproject/dbprofiles.py.
+DB_PROFILE = os.environ.get('DB_PROFILE', 'sqlite')
+DATABASES, DATABASE_ROUTERS = database_settings(DB_PROFILE, BASE_DIR, os.environ)
 
-DATABASES = {
+# How seats freed by drops are handed to waitlisted students (core.waitlist):
+# 'background' promotes in a worker thread after the request, 'inline' right after commit,
+# 'queue' through a promote_waitlist job (core.tasks). Tests pin 'inline' with override_settings.
+WAITLIST_PROMOTION = os.environ.get('WAITLIST_PROMOTION', 'background')
+
+# Cache used for reference data snapshots (core.refdata). Swap in redis/memcached for
+# multi-process deployments; locmem is per-process.
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'kanitha-default',
     }
 }
+# Sessions hold the login and the compact registration cart (core.cart). To keep cart edits
+# off the database use 'django.contrib.sessions.backends.signed_cookies', or
+# 'django.contrib.sessions.backends.cache' with a cache shared by all server processes.
+SESSION_ENGINE = os.environ.get('SESSION_ENGINE', 'django.contrib.sessions.backends.db')
+
+REFDATA_CACHE = 'default'
+REFDATA_TIMEOUT = 60 * 60 * 24
+# public catalogue pages and fragments (core.httpcache); entries are keyed by version stamps,
+# the timeout only bounds how long superseded ones linger
+PAGE_CACHE = 'default'
+PAGE_CACHE_TIMEOUT = 60 * 10
+REFDATA_WARM_ON_STARTUP = True
 
 LANGUAGE_CODE = 'th'
 TIME_ZONE = 'UTC'
@@ -64,6 +133,16 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
+STATIC_ROOT = os.environ.get('STATIC_ROOT') or BASE_DIR / 'staticfiles'
+# Production: collectstatic writes content-hashed, gzip/brotli-precompressed files and the
+# app serves them itself with far-future caching (core.staticfiles). In DEBUG, runserver
+# serves the source files unhashed.
+STATIC_SERVE = not DEBUG
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+                    else 'core.staticfiles.CompressedManifestStaticFilesStorage'},
+}
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -73,3 +152,13 @@ LOGIN_REDIRECT_URL = 'core:index'
 
 # Use console email backend for development so password-reset emails are printed to console
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+# Per-request instrumentation (core.middleware.PerfMiddleware), served at /metrics/
+PERF_METRICS_ENABLED = True
+if PERF_METRICS_ENABLED:
+    # the stock backend, plus template time for the request being measured
+    TEMPLATES[0]['BACKEND'] = 'core.middleware.TimedDjangoTemplates'
+# Log requests slower than this many milliseconds with their repeated query shapes (None = off)
+PERF_SLOW_REQUEST_MS = int(os.environ['PERF_SLOW_REQUEST_MS']) if os.environ.get('PERF_SLOW_REQUEST_MS') else None
+# Lets a Prometheus scraper read /metrics/ with "Authorization: Bearer <token>" instead of a staff login
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
@@ -13,3 +13,6 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lukwaproject.settings')
 
 application = get_wsgi_application()
+
+from core.startup import warm_caches  # noqa: E402  (needs the app registry loaded above)
+warm_caches()